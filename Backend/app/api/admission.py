@@ -0,0 +1,239 @@
+"""
+Admission control for inference endpoints.
+Bounds concurrent prediction requests, queues a limited number (smallest
+uploads first) and sheds the rest with 503 + Retry-After.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from heapq import heapify, heappop, heappush
+from itertools import count
+from typing import List, Pattern, Sequence, Tuple
+import asyncio
+import logging
+import os
+import re
+import time
+
+from app.api.responses import dumps
+from app.utils.logging import log_event
+from app.utils.timing import METRIC_PREFIX, registry, stage_timer
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "4"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "2"))
+
+# (method, path template) of routes that run model inference or simulation
+ADMISSION_ROUTES: Tuple[Tuple[str, str], ...] = (
+    ("POST", "/predict"),
+    ("POST", "/v1/predict"),
+    ("POST", "/v1/predict-schedule"),
+    ("POST", "/v1/risk"),
+    ("GET", "/v1/forecasts/{route}"),
+)
+
+IN_FLIGHT = f"{METRIC_PREFIX}_admission_in_flight"
+QUEUE_DEPTH = f"{METRIC_PREFIX}_admission_queue_depth"
+WAIT_SECONDS = f"{METRIC_PREFIX}_admission_wait_seconds"
+SHED_TOTAL = f"{METRIC_PREFIX}_admission_shed_total"
+
+registry.describe(IN_FLIGHT, "gauge", "Admitted inference requests currently running")
+registry.describe(QUEUE_DEPTH, "gauge", "Inference requests waiting for admission")
+registry.describe(WAIT_SECONDS, "histogram", "Time admitted requests spent queued")
+registry.describe(SHED_TOTAL, "counter", "Inference requests rejected by admission control, by reason")
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a request is shed (queue_full, evicted or timeout)."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+@dataclass(order=True)
+class _Waiter:
+    size: float
+    seq: int
+    future: asyncio.Future = field(compare=False)
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a bounded, size-ordered wait queue.
+
+    At most `max_in_flight` requests run at once. Up to `max_queue` more wait,
+    smallest request body first; when the queue is full a smaller request
+    evicts the largest waiter, otherwise it is rejected. Waiters give up after
+    `queue_timeout` seconds. Single event loop only (no locking).
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout if queue_timeout > 0 else None
+        self.in_flight = 0
+        self._waiting: List[_Waiter] = []
+        self._seq = count()
+
+    def _publish(self) -> None:
+        registry.set(IN_FLIGHT, {}, self.in_flight)
+        registry.set(QUEUE_DEPTH, {}, len(self._waiting))
+
+    def _discard(self, waiter: _Waiter) -> None:
+        if waiter in self._waiting:
+            self._waiting.remove(waiter)
+            heapify(self._waiting)
+            self._publish()
+
+    def _shed(self, reason: str, size: float) -> AdmissionRejected:
+        registry.inc(SHED_TOTAL, {"reason": reason})
+        log_event(
+            logger,
+            "warning",
+            "admission_shed",
+            reason=reason,
+            bytes=None if size == float("inf") else int(size),
+            in_flight=self.in_flight,
+            queued=len(self._waiting),
+        )
+        return AdmissionRejected(reason)
+
+    async def acquire(self, size: float) -> float:
+        """Wait for a slot; returns the seconds spent queued."""
+        if self.in_flight < self.max_in_flight and not self._waiting:
+            self.in_flight += 1
+            self._publish()
+            registry.observe(WAIT_SECONDS, {}, 0.0)
+            return 0.0
+
+        if len(self._waiting) >= self.max_queue:
+            largest = max(self._waiting) if self._waiting else None
+            if largest is None or largest.size <= size:
+                raise self._shed("queue_full", size)
+            self._discard(largest)
+            largest.future.set_exception(self._shed("evicted", largest.size))
+
+        waiter = _Waiter(size, next(self._seq), asyncio.get_running_loop().create_future())
+        heappush(self._waiting, waiter)
+        self._publish()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            raise self._shed("timeout", size)
+        except asyncio.CancelledError:
+            # Client went away; hand back a slot granted in the meantime
+            self._discard(waiter)
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                self.release()
+            raise
+        waited = time.perf_counter() - started
+        registry.observe(WAIT_SECONDS, {}, waited)
+        return waited
+
+    def release(self) -> None:
+        """Free a slot and hand it to the smallest live waiter."""
+        self.in_flight -= 1
+        while self._waiting:
+            waiter = heappop(self._waiting)
+            if not waiter.future.done():
+                self.in_flight += 1
+                waiter.future.set_result(None)
+                break
+        self._publish()
+
+
+def _content_length(scope) -> float:
+    for key, value in scope.get("headers", []):
+        if key == b"content-length":
+            try:
+                return float(int(value))
+            except ValueError:
+                break
+    # Unknown (chunked) bodies queue behind every sized request
+    return float("inf")
+
+
+def _route_pattern(template: str) -> Pattern[str]:
+    parts = [
+        "[^/]+" if part.startswith("{") and part.endswith("}") else re.escape(part)
+        for part in template.rstrip("/").split("/")
+    ]
+    return re.compile("/".join(parts) + "/?")
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying `AdmissionController` to `routes`.
+
+    `routes` are (method, path template) pairs; `{name}` matches one path
+    segment. Shed requests get 503 with `Retry-After` and the usual error
+    detail (stage "admission"); queue time shows up as the `admission` stage
+    in Server-Timing. The guarded handlers are sync functions, so admitted
+    requests run on the threadpool and the event loop stays free to queue,
+    time out and shed the rest.
+    """
+
+    def __init__(
+        self,
+        app,
+        routes: Sequence[Tuple[str, str]] = ADMISSION_ROUTES,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        retry_after: int = ADMISSION_RETRY_AFTER,
+    ):
+        self.app = app
+        self.routes = [(method.upper(), _route_pattern(template)) for method, template in routes]
+        self.retry_after = retry_after
+        self.controller = AdmissionController(max_in_flight, max_queue, queue_timeout)
+
+    def _guarded(self, scope) -> bool:
+        return scope["type"] == "http" and any(
+            scope["method"] == method and pattern.fullmatch(scope["path"])
+            for method, pattern in self.routes
+        )
+
+    async def __call__(self, scope, receive, send):
+        if not self._guarded(scope):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            with stage_timer("admission"):
+                await self.controller.acquire(_content_length(scope))
+        except AdmissionRejected as e:
+            await self._reject(send, e.reason)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    async def _reject(self, send, reason: str) -> None:
+        body = dumps(
+            {
+                "detail": {
+                    "stage": "admission",
+                    "message": f"Server is at capacity ({reason}); retry later",
+                }
+            }
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"retry-after", str(self.retry_after).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
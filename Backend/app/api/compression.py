@@ -0,0 +1,236 @@
+"""
+Compressed uploads and responses.
+Streams gzip/zstd CSV uploads into the parser and compresses large text
+responses according to Accept-Encoding.
+"""
+from __future__ import annotations
+
+from typing import IO, Optional, Tuple
+import gzip
+import io
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Accepted upload file names (compression is detected from the content)
+CSV_EXTENSIONS = (".csv", ".csv.gz", ".csv.zst")
+
+UPLOAD_MAX_DECOMPRESSED_BYTES = int(float(os.getenv("UPLOAD_MAX_DECOMPRESSED_MB", "100")) * 1024 * 1024)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Response media types worth compressing (binary encodings are left alone)
+COMPRESSIBLE_TYPES = (
+    b"application/json",
+    b"text/",
+    b"application/x-ndjson",
+    b"application/problem+json",
+)
+
+
+class UnsupportedCompressionError(ValueError):
+    """Raised for compressed uploads this server cannot decode."""
+
+
+class DecompressedSizeError(ValueError):
+    """Raised when an upload inflates beyond UPLOAD_MAX_DECOMPRESSED_BYTES."""
+
+
+def is_csv_filename(filename: Optional[str]) -> bool:
+    return bool(filename) and filename.lower().endswith(CSV_EXTENSIONS)
+
+
+def detect_compression(content: bytes) -> Optional[str]:
+    if content.startswith(GZIP_MAGIC):
+        return "gzip"
+    if content.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+class _LimitedReader(io.RawIOBase):
+    """Binary reader that fails once more than `limit` bytes were read."""
+
+    def __init__(self, raw: IO[bytes], limit: int):
+        self.raw = raw
+        self.limit = limit
+        self.consumed = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.raw.read(len(buffer))
+        self.consumed += len(data)
+        if self.consumed > self.limit:
+            raise DecompressedSizeError(
+                f"Decompressed upload exceeds {self.limit // (1024 * 1024)}MB"
+            )
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def open_compressed(
+    content: bytes,
+    compression: str,
+    limit: int = UPLOAD_MAX_DECOMPRESSED_BYTES,
+) -> IO[bytes]:
+    """Binary stream decompressing `content` incrementally as it is read."""
+    if compression == "gzip":
+        raw: IO[bytes] = gzip.GzipFile(fileobj=io.BytesIO(content), mode="rb")
+    elif compression == "zstd":
+        if zstandard is None:
+            raise UnsupportedCompressionError(
+                "zstd-compressed uploads require the zstandard package"
+            )
+        raw = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(content))
+    else:
+        raise UnsupportedCompressionError(f"Unknown compression: {compression}")
+    return io.BufferedReader(_LimitedReader(raw, limit), buffer_size=1024 * 1024)
+
+
+def csv_source(content: bytes) -> Tuple[IO, Optional[str]]:
+    """
+    File object for `pd.read_csv`: a decompressing stream for gzip/zstd
+    uploads (magic bytes, not the file name, decide), else the raw bytes.
+    """
+    compression = detect_compression(content)
+    if compression is None:
+        return io.BytesIO(content), None
+    return open_compressed(content, compression), compression
+
+
+# --- Responses --------------------------------------------------------------
+
+def _available_codings():
+    codings = ["gzip"]
+    if zstandard is not None:
+        codings.insert(0, "zstd")
+    return codings
+
+
+def negotiate_content_coding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best coding from an Accept-Encoding header (zstd preferred on ties)."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name] = quality
+
+    best, best_quality = None, 0.0
+    for coding in _available_codings():
+        quality = weights.get(coding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _Compressor:
+    def __init__(self, coding: str):
+        self.coding = coding
+        if coding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+        else:
+            self._obj = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, more: bool) -> bytes:
+        out = self._obj.compress(data)
+        if not more:
+            return out + self._obj.flush()
+        # Flush each streamed chunk so clients see rows as they are produced
+        if self.coding == "zstd":
+            return out + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return out + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+
+def _compressible(headers) -> bool:
+    content_type = b""
+    for key, value in headers:
+        if key == b"content-encoding":
+            return False
+        if key == b"content-type":
+            content_type = value.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON/CSV/NDJSON responses (gzip or zstd).
+
+    Single-message bodies smaller than `min_bytes` are sent as-is; streamed
+    bodies are compressed chunk by chunk. Adds `Vary: Accept-Encoding`.
+    """
+
+    def __init__(self, app, min_bytes: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        coding = negotiate_content_coding(accept_encoding)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if compressor is None:
+                headers = list(start_message.get("headers", []))
+                small = not more and len(body) < self.min_bytes
+                if small or not _compressible(headers):
+                    await send(start_message)
+                    start_message = None
+                    await send(message)
+                    return
+                compressor = _Compressor(coding)
+                headers = [(k, v) for k, v in headers if k != b"content-length"]
+                headers.append((b"content-encoding", coding.encode("latin-1")))
+                headers.append((b"vary", b"Accept-Encoding"))
+                await send({**start_message, "headers": headers})
+
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": compressor.compress(body, more),
+                    "more_body": more,
+                }
+            )
+
+        await self.app(scope, receive, send_wrapper)
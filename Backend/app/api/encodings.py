@@ -0,0 +1,182 @@
+"""
+Binary response encodings.
+Content negotiation between JSON (default), MessagePack and Arrow IPC.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi.responses import Response
+
+from app.api.responses import FastJSONResponse, dumps
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Accept media type -> encoding
+ACCEPT_ENCODINGS = {
+    "application/json": "json",
+    "application/*": "json",
+    "*/*": "json",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+    "application/vnd.apache.arrow.stream": "arrow",
+}
+
+# Schema metadata key holding the non-columnar part of an Arrow response
+ARROW_PAYLOAD_KEY = b"payload"
+
+# OpenAPI documentation for the extra response media types
+BINARY_RESPONSES: Dict[int, Dict[str, Any]] = {
+    200: {
+        "content": {
+            MSGPACK_MEDIA_TYPE: {},
+            ARROW_MEDIA_TYPE: {},
+        },
+        "description": "JSON by default; MessagePack or Arrow IPC stream via Accept",
+    }
+}
+
+
+class UnsupportedEncodingError(ValueError):
+    """Raised when no acceptable encoding can be produced."""
+
+
+def encoding_available(encoding: str) -> bool:
+    if encoding == "msgpack":
+        return msgpack is not None
+    if encoding == "arrow":
+        return pa is not None
+    return encoding == "json"
+
+
+def _parse_accept(accept: str) -> List[Tuple[float, str]]:
+    candidates = []
+    for part in accept.split(","):
+        media, _, params = part.partition(";")
+        media = media.strip().lower()
+        if not media:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        candidates.append((quality, media))
+    # Stable sort keeps header order among equal q values
+    return sorted(candidates, key=lambda item: -item[0])
+
+
+def negotiate_encoding(accept: Optional[str]) -> str:
+    """
+    Pick the response encoding for an `Accept` header.
+
+    Returns "json" when the header is missing or names nothing we know.
+    Raises `UnsupportedEncodingError` when the client only accepts a binary
+    encoding whose library is not installed.
+    """
+    if not accept:
+        return "json"
+    unavailable = []
+    known = False
+    for quality, media in _parse_accept(accept):
+        encoding = ACCEPT_ENCODINGS.get(media)
+        if quality <= 0 or encoding is None:
+            continue
+        known = True
+        if encoding_available(encoding):
+            return encoding
+        unavailable.append(media)
+    if known and unavailable:
+        raise UnsupportedEncodingError(
+            f"Requested encoding not available on this server: {', '.join(unavailable)}"
+        )
+    return "json"
+
+
+def _pack_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        # Raw buffer; clients restore it with np.frombuffer(data, dtype)
+        return {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "data": memoryview(array).cast("B"),
+        }
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
+def msgpack_response(content: Any, status_code: int = 200) -> Response:
+    """
+    Encode the JSON-shaped payload as MessagePack.
+
+    NumPy arrays become maps of `dtype`, `shape` and raw `data` bytes
+    instead of per-element floats.
+    """
+    body = msgpack.packb(content, default=_pack_default, use_bin_type=True)
+    return Response(content=body, status_code=status_code, media_type=MSGPACK_MEDIA_TYPE)
+
+
+def arrow_response(
+    columns: Dict[str, Any],
+    payload: Dict[str, Any],
+    status_code: int = 200,
+) -> Response:
+    """
+    Encode `columns` as a single-batch Arrow IPC stream.
+
+    NumPy columns are wrapped without copying; `payload` (summary, metadata,
+    warnings) is stored as JSON under the `payload` schema metadata key.
+    """
+    table = pa.table(
+        {
+            name: pa.array(values) if isinstance(values, np.ndarray) else values
+            for name, values in columns.items()
+        }
+    )
+    table = table.replace_schema_metadata({ARROW_PAYLOAD_KEY: dumps(payload)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(
+        content=sink.getvalue().to_pybytes(),
+        status_code=status_code,
+        media_type=ARROW_MEDIA_TYPE,
+    )
+
+
+def encoded_response(
+    encoding: str,
+    content: Dict[str, Any],
+    columns_key: str,
+) -> Response:
+    """
+    Build the response for a negotiated encoding.
+
+    `content` is the JSON/MessagePack body. Arrow responses need columnar
+    content: `content[columns_key]` becomes the table and the remaining keys
+    the schema metadata payload.
+    """
+    if encoding == "msgpack":
+        return msgpack_response(content)
+    if encoding == "arrow":
+        payload = {key: value for key, value in content.items() if key != columns_key}
+        return arrow_response(content.get(columns_key) or {}, payload)
+    return FastJSONResponse(content=content)
@@ -0,0 +1,202 @@
+"""
+Precomputed forecast store.
+Persists per-route hourly quantile forecasts (and schedule items) in SQLite,
+keyed by (route, target hour) for range scans, and runs the per-route
+forecast pipeline that fills it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.api.responses import COLUMNAR_OMITTED_FIELDS, QUANTILE_NAMES, quantile_arrays
+from app.ml import loader
+from app.ml.adapters.mongo_csv_adapter import aggregate_hourly_demand
+from app.ml.preprocess import preprocess_input
+from app.ml.scheduler import SchedulerConfig, generate_schedule
+from app.utils.logging import log_event
+
+logger = logging.getLogger(__name__)
+
+FORECAST_STORE_PATH = os.getenv("FORECAST_STORE_PATH", "data/forecasts.sqlite3")
+FORECAST_MAX_AGE_HOURS = float(os.getenv("FORECAST_MAX_AGE_HOURS", "24"))
+# Directory of per-route ticket histories (<route>.csv[.gz|.zst]) for live fallback
+FORECAST_HISTORY_DIR = os.getenv("FORECAST_HISTORY_DIR", "")
+
+HOUR_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS forecasts (
+    route TEXT NOT NULL,
+    target_hour TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    {", ".join(f"{name} REAL" for name in QUANTILE_NAMES)},
+    schedule TEXT,
+    PRIMARY KEY (route, target_hour)
+) WITHOUT ROWID
+"""
+
+
+@dataclass
+class RouteForecast:
+    """Quantile forecasts for one route, one entry per target hour."""
+    route: str
+    timestamps: List[str]
+    quantiles: Dict[str, np.ndarray]
+    schedule: Optional[List[Dict[str, Any]]] = None
+
+    def forecast_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"route": self.route, "timestamp": self.timestamps, **self.quantiles})
+
+
+def forecast_history(
+    route: str,
+    df: pd.DataFrame,
+    schedule_config: Optional[SchedulerConfig] = None,
+    capacity: int = 50,
+    last_n: Optional[int] = None,
+) -> RouteForecast:
+    """
+    Aggregate (raw tickets), preprocess and predict one route's history (its
+    most recent `last_n` hours only, if given), and schedule the p50 forecast
+    when `schedule_config` is given.
+    """
+    hourly = df if "demand" in df.columns else aggregate_hourly_demand(df)
+    model_inputs, timestamps = preprocess_input(hourly, last_n=last_n, return_timestamps=True)
+    predictions = loader.get_model().predict(model_inputs, verbose=0)
+    quantiles = dict(quantile_arrays(predictions))
+    if len(next(iter(quantiles.values()))) != len(timestamps):
+        raise ValueError("Could not align predictions with input hours")
+
+    forecast = RouteForecast(route=route, timestamps=timestamps, quantiles=quantiles)
+    if schedule_config is not None:
+        result = generate_schedule(
+            prediction_payload={"predictions": [{"quantile": "p50", "values": quantiles["p50"].tolist()}]},
+            capacity=capacity,
+            config=schedule_config,
+            timestamps=timestamps,
+        )
+        forecast.schedule = result.get("schedule", [])
+    return forecast
+
+
+class ForecastStore:
+    """
+    SQLite table of forecasts clustered on (route, target_hour), so a route's
+    time range is one index range scan. WAL mode lets the API read while batch
+    workers write; each thread keeps its own connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, forecast: RouteForecast, model_version: str) -> int:
+        """Insert or replace `forecast`'s hours; returns the number of rows written."""
+        created_at = time.time()
+        quantiles = [forecast.quantiles.get(name) for name in QUANTILE_NAMES]
+        schedule = forecast.schedule
+        rows = [
+            (
+                forecast.route,
+                hour,
+                model_version,
+                created_at,
+                *(None if values is None else float(values[index]) for values in quantiles),
+                None if schedule is None else json.dumps(
+                    {key: value for key, value in schedule[index].items() if key not in COLUMNAR_OMITTED_FIELDS}
+                ),
+            )
+            for index, hour in enumerate(forecast.timestamps)
+        ]
+        columns = ["route", "target_hour", "model_version", "created_at", *QUANTILE_NAMES, "schedule"]
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns[2:])
+        with self._connection() as conn:
+            conn.executemany(
+                f"INSERT INTO forecasts ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT (route, target_hour) DO UPDATE SET {updates}",
+                rows,
+            )
+        return len(rows)
+
+    def range(self, route: str, start: str, end: str) -> List[sqlite3.Row]:
+        """Stored hours of `route` with start <= target_hour <= end, in order."""
+        conn = self._connection()
+        cursor = conn.execute(
+            f"SELECT target_hour, model_version, created_at, {', '.join(QUANTILE_NAMES)}, schedule "
+            "FROM forecasts WHERE route = ? AND target_hour BETWEEN ? AND ? ORDER BY target_hour",
+            (route, start, end),
+        )
+        cursor.row_factory = sqlite3.Row
+        return cursor.fetchall()
+
+    def routes(self) -> List[str]:
+        return [row[0] for row in self._connection().execute("SELECT DISTINCT route FROM forecasts ORDER BY route")]
+
+
+def expected_hours(start: pd.Timestamp, end: pd.Timestamp) -> List[str]:
+    return pd.date_range(start.floor("h"), end.floor("h"), freq="h").strftime(HOUR_FORMAT).tolist()
+
+
+def stale_hours(
+    rows: Sequence[sqlite3.Row],
+    model_version: Optional[str],
+    max_age_hours: float = FORECAST_MAX_AGE_HOURS,
+) -> List[str]:
+    """Hours produced by another model version or longer than `max_age_hours` ago."""
+    oldest = time.time() - max_age_hours * 3600 if max_age_hours > 0 else None
+    return [
+        row["target_hour"]
+        for row in rows
+        if (model_version is not None and row["model_version"] != model_version)
+        or (oldest is not None and row["created_at"] < oldest)
+    ]
+
+
+def history_path(route: str, directory: str = FORECAST_HISTORY_DIR) -> Optional[Path]:
+    """Ticket history file for `route` in `directory`, if any."""
+    if not directory or Path(route).name != route:
+        return None
+    for suffix in (".csv", ".csv.gz", ".csv.zst"):
+        candidate = Path(directory) / f"{route}{suffix}"
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+_store: Optional[ForecastStore] = None
+_store_lock = threading.Lock()
+
+
+def get_forecast_store(path: Optional[str] = None) -> ForecastStore:
+    """The process-wide store (FORECAST_STORE_PATH unless `path` is given first)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ForecastStore(path or FORECAST_STORE_PATH)
+                log_event(logger, "info", "forecast_store_opened", path=str(_store.path))
+    return _store
@@ -0,0 +1,325 @@
+"""
+Background job execution.
+Runs long pipelines on a bounded worker pool and persists status and results to disk.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+from fastapi import HTTPException
+
+from app.utils.logging import log_event
+from app.utils.timing import observe_stage
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "16"))
+JOB_DIR = os.getenv("JOB_DIR", "jobs")
+# Finished jobs older than this are deleted (0 keeps them forever)
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+JOB_PRUNE_INTERVAL_SECONDS = float(os.getenv("JOB_PRUNE_INTERVAL_SECONDS", "600"))
+
+STATUS_FILE = "status.json"
+TERMINAL_STATES = {"succeeded", "failed"}
+
+_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# A job task receives a stage callback and returns result chunks
+JobTask = Callable[[Callable[[str], None]], Iterable[bytes]]
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the job queue is at capacity."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+class JobManager:
+    """
+    Bounded background job runner.
+
+    At most `workers` jobs run at once and at most `max_queue` wait for a
+    worker; further submissions raise `QueueFullError`. Each job gets a
+    directory under `directory` holding `status.json` (rewritten on every
+    stage change) and the result file, so finished jobs survive restarts.
+    Finished jobs older than `retention_seconds` are deleted at startup and
+    then every `prune_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        workers: int,
+        max_queue: int,
+        retention_seconds: float = 0,
+        prune_interval: float = 0,
+    ):
+        self.directory = Path(directory)
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.retention_seconds = max(0.0, retention_seconds)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="job",
+        )
+        self._lock = threading.Lock()
+        self._active: Dict[str, Dict[str, Any]] = {}
+        self._recover()
+        self.prune()
+        self._stop = threading.Event()
+        self._pruner: Optional[threading.Thread] = None
+        if self.retention_seconds and prune_interval > 0:
+            self._pruner = threading.Thread(
+                target=self._prune_loop,
+                args=(prune_interval,),
+                name="job-prune",
+                daemon=True,
+            )
+            self._pruner.start()
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.directory / job_id
+
+    def _write_status(self, status: Dict[str, Any]) -> None:
+        job_dir = self._job_dir(status["job_id"])
+        tmp = job_dir / f"{STATUS_FILE}.tmp"
+        tmp.write_text(json.dumps(status), encoding="utf-8")
+        os.replace(tmp, job_dir / STATUS_FILE)
+
+    def _recover(self) -> None:
+        """Mark jobs left queued/running by a previous process as failed."""
+        for status_path in self.directory.glob(f"*/{STATUS_FILE}"):
+            try:
+                status = json.loads(status_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if status.get("status") in TERMINAL_STATES:
+                continue
+            status["status"] = "failed"
+            status["finished_at"] = _now()
+            status["error"] = {
+                "status_code": 500,
+                "detail": {"stage": "job", "message": "Job interrupted by server restart"},
+            }
+            self._write_status(status)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete finished jobs older than the retention period; returns how many."""
+        if not self.retention_seconds:
+            return 0
+        cutoff = (time.time() if now is None else now) - self.retention_seconds
+        removed = 0
+        for status_path in self.directory.glob(f"*/{STATUS_FILE}"):
+            job_dir = status_path.parent
+            try:
+                status = json.loads(status_path.read_text(encoding="utf-8"))
+                finished = datetime.fromisoformat(status["finished_at"]).timestamp()
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if status.get("status") not in TERMINAL_STATES or finished > cutoff:
+                continue
+            with self._lock:
+                if job_dir.name in self._active:
+                    continue
+                shutil.rmtree(job_dir, ignore_errors=True)
+            removed += 1
+        if removed:
+            log_event(logger, "info", "jobs_pruned", removed=removed)
+        return removed
+
+    def _prune_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.prune()
+            except Exception as e:
+                log_event(logger, "exception", "job_prune_failed", error=str(e))
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            running = sum(1 for job in self._active.values() if job["status"] == "running")
+            return {"running": running, "queued": len(self._active) - running}
+
+    def submit(
+        self,
+        kind: str,
+        task: JobTask,
+        stages: List[str],
+        media_type: str,
+        filename: str,
+        parameters: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Queue `task` and return its initial status."""
+        job_id = uuid.uuid4().hex
+        status = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "stage": None,
+            "stages": [
+                {"name": name, "status": "pending", "duration_ms": None}
+                for name in stages
+            ],
+            "parameters": parameters or {},
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            if len(self._active) >= self.workers + self.max_queue:
+                raise QueueFullError(
+                    f"Job queue is full ({len(self._active)} jobs queued or running)"
+                )
+            self._job_dir(job_id).mkdir(parents=True)
+            self._write_status(status)
+            self._active[job_id] = status
+        self._executor.submit(self._run, job_id, task, media_type, filename)
+        log_event(logger, "info", "job_submitted", job_id=job_id, kind=kind)
+        return dict(status)
+
+    def _update(self, job_id: str, **changes: Any) -> None:
+        with self._lock:
+            status = self._active[job_id]
+            status.update(changes)
+            self._write_status(status)
+
+    def _run(self, job_id: str, task: JobTask, media_type: str, filename: str) -> None:
+        status = self._active[job_id]
+        stage_started: Dict[str, float] = {}
+
+        def finish_stage() -> None:
+            current = status["stage"]
+            if current is None:
+                return
+            for entry in status["stages"]:
+                if entry["name"] == current:
+                    seconds = time.perf_counter() - stage_started[current]
+                    entry["status"] = "done"
+                    entry["duration_ms"] = round(seconds * 1000, 1)
+                    observe_stage(f"/v1/jobs/{status['kind']}", current, seconds)
+
+        def on_stage(name: str) -> None:
+            with self._lock:
+                finish_stage()
+                stage_started[name] = time.perf_counter()
+                for entry in status["stages"]:
+                    if entry["name"] == name:
+                        entry["status"] = "running"
+                status["stage"] = name
+                self._write_status(status)
+
+        self._update(job_id, status="running", started_at=_now())
+        result_path = self._job_dir(job_id) / filename
+        try:
+            size = 0
+            chunks = iter(task(on_stage))
+            with open(result_path, "wb") as handle:
+                first = True
+                for chunk in chunks:
+                    if first:
+                        on_stage("write")
+                        first = False
+                    handle.write(chunk)
+                    size += len(chunk)
+            with self._lock:
+                finish_stage()
+                for entry in status["stages"]:
+                    if entry["status"] == "pending":
+                        entry["status"] = "skipped"
+            self._update(
+                job_id,
+                status="succeeded",
+                finished_at=_now(),
+                stage=None,
+                result={"media_type": media_type, "filename": filename, "bytes": size},
+            )
+            log_event(logger, "info", "job_succeeded", job_id=job_id, bytes=size)
+        except HTTPException as e:
+            result_path.unlink(missing_ok=True)
+            self._fail(job_id, e.status_code, e.detail)
+        except Exception as e:
+            log_event(logger, "exception", "job_failed", job_id=job_id, error=str(e))
+            result_path.unlink(missing_ok=True)
+            self._fail(
+                job_id,
+                500,
+                {"stage": status.get("stage") or "unknown", "message": "Internal server error"},
+            )
+        finally:
+            with self._lock:
+                self._active.pop(job_id, None)
+
+    def _fail(self, job_id: str, status_code: int, detail: Any) -> None:
+        with self._lock:
+            status = self._active[job_id]
+            for entry in status["stages"]:
+                if entry["name"] == status["stage"]:
+                    entry["status"] = "failed"
+        self._update(
+            job_id,
+            status="failed",
+            finished_at=_now(),
+            error={"status_code": status_code, "detail": detail},
+        )
+        log_event(logger, "warning", "job_failed", job_id=job_id, status_code=status_code)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current status of a job, from memory or disk."""
+        if not _JOB_ID.match(job_id):
+            return None
+        with self._lock:
+            status = self._active.get(job_id)
+            if status is not None:
+                return json.loads(json.dumps(status))
+        try:
+            return json.loads((self._job_dir(job_id) / STATUS_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def result_path(self, status: Dict[str, Any]) -> Path:
+        return self._job_dir(status["job_id"]) / status["result"]["filename"]
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide job manager configured from JOB_* environment variables."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(
+                JOB_DIR,
+                JOB_WORKERS,
+                JOB_MAX_QUEUE,
+                retention_seconds=JOB_RETENTION_HOURS * 3600,
+                prune_interval=JOB_PRUNE_INTERVAL_SECONDS,
+            )
+        return _manager
+
+
+def shutdown_job_manager() -> None:
+    with _manager_lock:
+        if _manager is not None:
+            _manager.shutdown()
@@ -0,0 +1,17 @@
+"""
+Prometheus metrics endpoint.
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.utils.timing import registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -8,6 +8,13 @@ import pandas as pd
 import numpy as np
 import logging
 from io import StringIO
+from app.api.compression import (
+    DecompressedSizeError,
+    UnsupportedCompressionError,
+    detect_compression,
+    is_csv_filename,
+    open_compressed,
+)
 from app.ml.preprocess import preprocess_input
 from app.ml.validators import InputValidationError
 from app.ml.loader import get_model
@@ -40,11 +47,11 @@ def _get_numeric_shape(model_inputs):
 
 
 def validate_csv_file(file: UploadFile):
-    """Validate uploaded file"""
-    if not file.filename.endswith('.csv'):
+    """Validate uploaded file (.csv, or gzip/zstd-compressed .csv.gz / .csv.zst)"""
+    if not is_csv_filename(file.filename):
         raise HTTPException(
             status_code=400,
-            detail="Invalid file type. Only CSV files are accepted."
+            detail="Invalid file type. Only CSV files (optionally .gz or .zst compressed) are accepted."
         )
     
     if file.size and file.size > 10 * 1024 * 1024:  # 10MB limit
@@ -55,9 +62,13 @@ def validate_csv_file(file: UploadFile):
 
 
 def parse_csv(file_content: bytes) -> pd.DataFrame:
-    """Parse CSV content into DataFrame"""
+    """Parse CSV content into DataFrame (gzip/zstd content is decompressed while parsing)"""
     try:
-        df = pd.read_csv(StringIO(file_content.decode('utf-8')))
+        compression = detect_compression(file_content)
+        if compression is None:
+            df = pd.read_csv(StringIO(file_content.decode('utf-8')))
+        else:
+            df = pd.read_csv(open_compressed(file_content, compression), encoding='utf-8')
         
         if df.empty:
             raise ValueError("CSV file is empty")
@@ -68,9 +79,14 @@ def parse_csv(file_content: bytes) -> pd.DataFrame:
             "csv_parsed",
             rows=len(df),
             columns=list(df.columns),
+            compression=compression,
         )
         return df
     
+    except UnsupportedCompressionError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except DecompressedSizeError as e:
+        raise HTTPException(status_code=400, detail=f"File too large. {e}")
     except UnicodeDecodeError:
         raise HTTPException(
             status_code=400,
@@ -143,7 +159,7 @@ def format_predictions(predictions, num_samples):
 
 
 @router.post("", response_model=None)
-async def predict(file: UploadFile = File(...)):
+def predict(file: UploadFile = File(...)):
     """
     Predict bus demand from uploaded CSV file
     
@@ -171,7 +187,7 @@ async def predict(file: UploadFile = File(...)):
         log_event(logger, "info", "file_validated", filename=file.filename)
         
         # 2. Read file content
-        file_content = await file.read()
+        file_content = file.file.read()
         log_event(logger, "info", "file_read", bytes=len(file_content))
         
         # 3. Parse CSV
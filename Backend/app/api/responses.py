@@ -0,0 +1,299 @@
+"""
+Response building and serialization helpers.
+Builds response payloads directly from model output arrays and encodes them once.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Literal, Optional, Tuple
+import json
+import math
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from app.api.schemas import ApiMetadata
+from app.ml.loader import QUANTILE_NAMES
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+ResponseFormat = Literal["records", "columnar"]
+MAX_PRECISION = 8
+
+# Per-trip fields dropped from columnar schedules (explained once in `rules`)
+COLUMNAR_OMITTED_FIELDS = {"rationale"}
+
+SCHEDULE_FLOAT_FIELDS = {
+    "p90_demand",
+    "load_factor",
+    "current_load_factor",
+    "expected_standing_per_bus",
+    "expected_load_per_bus",
+    "expected_seated_load_factor",
+    "headway_multiplier",
+    "adjusted_headway_minutes",
+    "operating_cost",
+}
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite_or_none(obj: Any) -> Any:
+    """Copy of `obj` with NaN/Inf replaced by None, as orjson writes them."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite_or_none(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite_or_none(value) for value in obj]
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return _finite_or_none(obj.tolist())
+    return obj
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content (including numpy arrays) to JSON bytes in a single pass.
+    NaN and Inf become null with or without orjson.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    try:
+        return _stdlib_dumps(content)
+    except ValueError:
+        # Non-finite values: rare, so only then pay for a cleaned copy
+        return _stdlib_dumps(_finite_or_none(content))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that serializes numpy arrays directly, without pydantic."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_to_dict(model: Any) -> Dict[str, Any]:
+    return model.model_dump() if hasattr(model, "model_dump") else model.dict()
+
+
+def parse_quantiles(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Comma-separated quantile names in output order; None (all heads) when
+    empty. Raises ValueError for unknown names.
+    """
+    if not value:
+        return None
+    requested = {item.strip() for item in value.split(",") if item.strip()}
+    unknown = sorted(requested - set(QUANTILE_NAMES))
+    if unknown:
+        raise ValueError(f"Unknown quantiles {unknown}; choose from {QUANTILE_NAMES}")
+    return [name for name in QUANTILE_NAMES if name in requested] or None
+
+
+def quantile_arrays(
+    predictions: Any,
+    names: Optional[List[str]] = None,
+) -> List[Tuple[str, np.ndarray]]:
+    """
+    Flatten raw model output into (quantile, 1-D array) pairs. `names` lists
+    the heads a sub-model evaluated (default: all of QUANTILE_NAMES).
+    """
+    expected = names or QUANTILE_NAMES
+    if isinstance(predictions, (list, tuple)):
+        if len(predictions) != len(expected):
+            raise ValueError(
+                f"Expected {len(expected)} model outputs, got {len(predictions)}"
+            )
+        return [
+            (name, np.ascontiguousarray(np.asarray(output).reshape(-1)))
+            for name, output in zip(expected, predictions)
+        ]
+    name = names[0] if names and len(names) == 1 else "mean"
+    return [(name, np.ascontiguousarray(np.asarray(predictions).reshape(-1)))]
+
+
+def build_prediction_output(
+    predictions: Any,
+    num_samples: int,
+    names: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Same structure as `format_predictions`, but quantile values stay numpy
+    arrays so they are encoded once by `FastJSONResponse`.
+    """
+    series = quantile_arrays(predictions, names)
+    return {
+        "predictions": [
+            {"quantile": name, "values": values}
+            for name, values in series
+        ],
+        "metadata": {
+            "num_predictions": num_samples,
+            "quantiles": [name for name, _ in series],
+        },
+    }
+
+
+def build_confidence_bounds(
+    predictions: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    quantile_map = {item.get("quantile"): item.get("values") for item in predictions}
+    lower = quantile_map.get("p10")
+    upper = quantile_map.get("p90")
+    if lower is None or upper is None:
+        return [], [
+            {
+                "code": "missing_confidence_bounds",
+                "message": "p10/p90 not available; confidence bounds omitted",
+            }
+        ]
+    return [
+        {
+            "lower_quantile": "p10",
+            "upper_quantile": "p90",
+            "lower": lower,
+            "upper": upper,
+        }
+    ], []
+
+
+def build_predict_response(
+    predictions: Any,
+    num_samples: int,
+    names: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """PredictResponseV1-shaped payload built straight from model output."""
+    formatted = build_prediction_output(predictions, num_samples, names)
+    confidence_bounds, warnings = build_confidence_bounds(formatted["predictions"])
+    metadata = ApiMetadata(
+        api_version="v1",
+        num_predictions=formatted["metadata"]["num_predictions"],
+        quantiles=formatted["metadata"]["quantiles"],
+    )
+    return {
+        "predictions": formatted["predictions"],
+        "confidence_bounds": confidence_bounds,
+        "metadata": model_to_dict(metadata),
+        "warnings": warnings,
+    }
+
+
+def build_schedule_response(
+    result: Dict[str, Any],
+    warnings: Optional[List[Dict[str, str]]] = None,
+) -> Dict[str, Any]:
+    """ScheduleResponseV1-shaped payload from `generate_schedule` output."""
+    return {
+        "schedule": result.get("schedule", []),
+        "summary": result.get("summary", {}),
+        "parameters": result.get("parameters", {}),
+        "rules": result.get("rules", []),
+        "metadata": model_to_dict(ApiMetadata(api_version="v1")),
+        "warnings": warnings or [],
+    }
+
+
+def _round_array(values: np.ndarray, precision: Optional[int]) -> np.ndarray:
+    if precision is None:
+        return values
+    # Round in float64 so float32 noise does not reappear when encoded
+    return np.round(values.astype(np.float64), precision)
+
+
+def _round_column(values: List[Any], precision: Optional[int]) -> List[Any]:
+    if precision is None:
+        return values
+    return [None if value is None else round(value, precision) for value in values]
+
+
+def build_columnar_predict_response(
+    predictions: Any,
+    num_samples: int,
+    precision: Optional[int] = None,
+    names: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Columnar prediction payload: one array per quantile under `values`.
+
+    Confidence bounds reference their quantiles instead of repeating the
+    p10/p90 arrays.
+    """
+    series = quantile_arrays(predictions, names)
+    names = [name for name, _ in series]
+    warnings: List[Dict[str, str]] = []
+    if "p10" in names and "p90" in names:
+        confidence_bounds = {"lower_quantile": "p10", "upper_quantile": "p90"}
+    else:
+        confidence_bounds = None
+        warnings.append(
+            {
+                "code": "missing_confidence_bounds",
+                "message": "p10/p90 not available; confidence bounds omitted",
+            }
+        )
+    metadata = ApiMetadata(api_version="v1", num_predictions=num_samples, quantiles=names)
+    return {
+        "format": "columnar",
+        "values": {name: _round_array(values, precision) for name, values in series},
+        "confidence_bounds": confidence_bounds,
+        "metadata": model_to_dict(metadata),
+        "warnings": warnings,
+    }
+
+
+def schedule_to_columns(
+    schedule: List[Dict[str, Any]],
+    precision: Optional[int] = None,
+) -> Dict[str, List[Any]]:
+    """Transpose schedule items into field -> array, without per-trip rationale."""
+    if not schedule:
+        return {}
+    fields = [key for key in schedule[0] if key not in COLUMNAR_OMITTED_FIELDS]
+    columns: Dict[str, List[Any]] = {}
+    for field in fields:
+        values = [item.get(field) for item in schedule]
+        if field in SCHEDULE_FLOAT_FIELDS:
+            values = _round_column(values, precision)
+        columns[field] = values
+    return columns
+
+
+def build_columnar_schedule_response(
+    result: Dict[str, Any],
+    warnings: Optional[List[Dict[str, str]]] = None,
+    precision: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Columnar counterpart of `build_schedule_response`."""
+    schedule = result.get("schedule", [])
+    return {
+        "format": "columnar",
+        "num_trips": len(schedule),
+        "schedule": schedule_to_columns(schedule, precision),
+        "summary": result.get("summary", {}),
+        "parameters": result.get("parameters", {}),
+        "rules": result.get("rules", []),
+        "metadata": model_to_dict(ApiMetadata(api_version="v1")),
+        "warnings": warnings or [],
+    }
@@ -48,15 +48,27 @@ class PredictionPayload(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
+class BusTypeSpec(BaseModel):
+    name: str
+    capacity: int = Field(..., gt=0)
+    cost: float = Field(1.0, ge=0.0)
+
+
 class ScheduleRequestV1(BaseModel):
     prediction_output: PredictionPayload
-    capacity: int = Field(..., gt=0)
+    capacity: Optional[int] = Field(None, gt=0)
     base_headway_minutes: int = Field(15, gt=0)
     standing_ratio: float = Field(0.20, ge=0.0)
     low_load_threshold: float = Field(0.50, ge=0.0)
     low_headway_multiplier: float = Field(1.50, ge=1.0)
     trip_ids: Optional[List[str]] = None
     timestamps: Optional[List[str]] = None
+    fleet: Optional[List[BusTypeSpec]] = None
+
+
+class TimetableRequestV1(ScheduleRequestV1):
+    service_start: Optional[str] = None
+    service_day: Optional[str] = None
 
 
 class ScheduleItem(BaseModel):
@@ -77,6 +89,8 @@ class ScheduleItem(BaseModel):
     base_headway_minutes: int
     headway_multiplier: float
     adjusted_headway_minutes: float
+    bus_mix: Optional[Dict[str, int]] = None
+    operating_cost: Optional[float] = None
     rationale: List[str]
 
 
@@ -92,14 +106,16 @@ class ScheduleSummary(BaseModel):
     current_avg_load_factor: Optional[float] = None
     current_overload_trips: Optional[int] = None
     optimized_overload_trips: Optional[int] = None
+    total_operating_cost: Optional[float] = None
 
 
 class ScheduleParameters(BaseModel):
-    capacity: int
+    capacity: Optional[int] = None
     base_headway_minutes: int
     standing_ratio: float
     low_load_threshold: float
     low_headway_multiplier: float
+    fleet: Optional[List[BusTypeSpec]] = None
 
 
 class ScheduleResponseV1(BaseModel):
@@ -109,3 +125,47 @@ class ScheduleResponseV1(BaseModel):
     rules: List[str]
     metadata: ApiMetadata
     warnings: List[WarningMessage] = Field(default_factory=list)
+
+
+class RiskRequestV1(BaseModel):
+    prediction_output: PredictionPayload
+    capacity: int = Field(..., gt=0)
+    standing_ratio: float = Field(0.20, ge=0.0)
+    draws: int = Field(10000, gt=0, le=200000)
+    seed: Optional[int] = 0
+    target_service_level: float = Field(0.95, gt=0.0, lt=1.0)
+    buses: Optional[List[int]] = None
+
+
+class RiskItem(BaseModel):
+    trip_index: int
+    buses_assigned: int
+    overload_probability: float
+    service_level_demand: float
+    buses_for_service_level: int
+
+
+class RiskSummary(BaseModel):
+    total_hours: int
+    expected_overloaded_hours: float
+    max_overload_probability: float
+    probability_any_overload: float
+    total_buses_assigned: int
+    total_buses_for_service_level: int
+
+
+class RiskParameters(BaseModel):
+    capacity: int
+    draws: int
+    seed: Optional[int] = None
+    target_service_level: float
+    standing_ratio: float
+    quantile_levels: Dict[str, float]
+
+
+class RiskResponseV1(BaseModel):
+    risk: List[RiskItem]
+    summary: RiskSummary
+    parameters: RiskParameters
+    metadata: ApiMetadata
+    warnings: List[WarningMessage] = Field(default_factory=list)
@@ -0,0 +1,133 @@
+"""
+Streaming response helpers.
+Encode row iterators as CSV or NDJSON chunks without materialising the output.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+from app.utils.logging import log_event
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_ROWS = 500
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def iter_csv_chunks(
+    rows: Iterable[Dict[str, Any]],
+    columns: List[str],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Yield a CSV header then encoded batches of `chunk_rows` rows."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(
+        buffer, fieldnames=columns, extrasaction="ignore", lineterminator="\n"
+    )
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def iter_ndjson_chunks(
+    rows: Iterable[Dict[str, Any]],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Yield newline-delimited JSON in batches of `chunk_rows` rows."""
+    lines: List[str] = []
+    for row in rows:
+        lines.append(json.dumps(row, default=str, ensure_ascii=False))
+        if len(lines) >= chunk_rows:
+            lines.append("")
+            yield "\n".join(lines).encode("utf-8")
+            lines = []
+    if lines:
+        lines.append("")
+        yield "\n".join(lines).encode("utf-8")
+
+
+class StreamAborted(RuntimeError):
+    """Row generation failed after a CSV response had started."""
+
+
+def error_line(error: Exception) -> bytes:
+    """Final NDJSON line marking a stream that failed part-way."""
+    return (json.dumps({"error": {"stage": "stream", "message": str(error)}}) + "\n").encode("utf-8")
+
+
+def _guarded_chunks(
+    rows: Iterable[Dict[str, Any]],
+    encode: Callable[[Iterable[Dict[str, Any]]], Iterator[bytes]],
+    output: str,
+) -> Iterator[bytes]:
+    """
+    Encode `rows`, flushing the rows produced before a generation error.
+
+    The status line is already sent by then, so NDJSON ends with an
+    `{"error": {...}}` line and CSV (which has no in-band marker) aborts the
+    response: the connection closes without the final chunk, which clients
+    report as an incomplete transfer rather than a complete file.
+    """
+    failures: List[Exception] = []
+
+    def until_error() -> Iterator[Dict[str, Any]]:
+        try:
+            yield from rows
+        except Exception as e:
+            failures.append(e)
+
+    yield from encode(until_error())
+    if failures:
+        error = failures[0]
+        log_event(logger, "exception", "stream_failed", output=output, error=str(error))
+        if output == "ndjson":
+            yield error_line(error)
+        else:
+            raise StreamAborted(f"{output} stream failed: {error}") from error
+
+
+def streaming_rows_response(
+    rows: Iterable[Dict[str, Any]],
+    output: str,
+    filename: str,
+    columns: Optional[List[str]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> StreamingResponse:
+    """
+    Wrap a row iterator in a CSV or NDJSON `StreamingResponse`. Errors raised
+    by `rows` after the first chunk are handled as in `_guarded_chunks`.
+    """
+    if output == "csv":
+        if columns is None:
+            raise ValueError("columns are required for CSV output")
+        body = _guarded_chunks(rows, lambda guarded: iter_csv_chunks(guarded, columns, chunk_rows), output)
+    elif output == "ndjson":
+        body = _guarded_chunks(rows, lambda guarded: iter_ndjson_chunks(guarded, chunk_rows), output)
+    else:
+        raise ValueError(f"Unsupported streaming output: {output}")
+
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[output],
+        headers={"Content-Disposition": f"attachment; filename={filename}.{output}"},
+    )
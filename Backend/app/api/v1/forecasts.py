@@ -0,0 +1,261 @@
+"""
+Forecast read API (v1).
+Serves precomputed forecasts from the forecast store by route and time range.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+import json
+import logging
+import threading
+import weakref
+
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Query
+
+from app.api.forecasts import (
+    FORECAST_MAX_AGE_HOURS,
+    expected_hours,
+    forecast_history,
+    get_forecast_store,
+    history_path,
+    stale_hours,
+)
+from app.api.predict import parse_csv
+from app.api.responses import QUANTILE_NAMES, FastJSONResponse, model_to_dict
+from app.api.schemas import ApiMetadata
+from app.ml.loader import get_model_version
+from app.ml.scheduler import SchedulerConfig
+from app.ml.validators import InputValidationError
+from app.utils.logging import log_event
+from app.utils.timing import mark_stage
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/v1/forecasts", tags=["Prediction", "v1"])
+
+# Longest range served in one request (one quarter)
+MAX_RANGE_HOURS = 24 * 92
+
+# Routes whose last refresh is remembered; older ones may be refreshed again
+MAX_REFRESHED_ROUTES = 1024
+
+# (history file mtime, model version) per route at its last live refresh:
+# hours still missing or stale afterwards lie outside the history, and
+# re-running on the same file and model would not produce them
+_refreshed_history: "OrderedDict[str, Tuple[int, Optional[str]]]" = OrderedDict()
+# One live refresh per route at a time, so concurrent requests do not repeat
+# it while other routes refresh in parallel; a lock lives while in use
+_route_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_state_lock = threading.Lock()
+
+
+def _parse_hour(name: str, value: str) -> pd.Timestamp:
+    try:
+        ts = pd.Timestamp(value.strip())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"stage": "query", "message": f"{name}: {e}"})
+    if pd.isna(ts):
+        raise HTTPException(status_code=400, detail={"stage": "query", "message": f"{name} must be a timestamp"})
+    if ts.tzinfo is not None:
+        # Stored hours are naive local time, like the uploaded histories
+        raise HTTPException(
+            status_code=400,
+            detail={"stage": "query", "message": f"{name} must be local time without a UTC offset"},
+        )
+    return ts
+
+
+def _parse_range(start: str, end: Optional[str]) -> tuple:
+    start_ts = _parse_hour("start", start)
+    end_ts = _parse_hour("end", end) if end else start_ts + pd.Timedelta(hours=23)
+    if end_ts < start_ts:
+        raise HTTPException(status_code=400, detail={"stage": "query", "message": "end must not be before start"})
+    if (end_ts - start_ts) / pd.Timedelta(hours=1) >= MAX_RANGE_HOURS:
+        raise HTTPException(
+            status_code=400,
+            detail={"stage": "query", "message": f"range exceeds {MAX_RANGE_HOURS} hours"},
+        )
+    return start_ts, end_ts
+
+
+def _current_model_version() -> Optional[str]:
+    try:
+        return get_model_version()
+    except Exception as e:
+        log_event(logger, "warning", "model_version_unavailable", error=str(e))
+        return None
+
+
+def _needs_refresh(rows, hours: List[str], include_schedule: bool, model_version: Optional[str], max_age_hours: float):
+    """Missing, stale and (when schedules are requested) unscheduled hours."""
+    stored = {row["target_hour"] for row in rows}
+    missing = [hour for hour in hours if hour not in stored]
+    stale = stale_hours(rows, model_version, max_age_hours)
+    unscheduled = [row["target_hour"] for row in rows if include_schedule and row["schedule"] is None]
+    return missing, stale, unscheduled
+
+
+def _refresh_route(route: str, path: Path, model_version: Optional[str]) -> Optional[Set[str]]:
+    """
+    Forecast `route` from its history file and write the result to the store.
+    Returns the hours written, or None when this history file and model were
+    already used (re-running would produce the same rows).
+    """
+    with _state_lock:
+        lock = _route_locks.get(route)
+        if lock is None:
+            lock = _route_locks[route] = threading.Lock()
+    with lock:
+        key = (path.stat().st_mtime_ns, model_version)
+        with _state_lock:
+            if _refreshed_history.get(route) == key:
+                _refreshed_history.move_to_end(route)
+                return None
+        mark_stage("live_inference")
+        df = parse_csv(path.read_bytes())
+        forecast = forecast_history(route, df, schedule_config=SchedulerConfig())
+        written = get_forecast_store().upsert(forecast, model_version or "unknown")
+        with _state_lock:
+            _refreshed_history[route] = key
+            _refreshed_history.move_to_end(route)
+            while len(_refreshed_history) > MAX_REFRESHED_ROUTES:
+                _refreshed_history.popitem(last=False)
+    log_event(logger, "info", "forecast_store_refreshed", route=route, hours=written)
+    return set(forecast.timestamps)
+
+
+def _build_response(
+    route: str,
+    rows,
+    hours: List[str],
+    source: str,
+    include_schedule: bool,
+    missing: List[str],
+    stale: List[str],
+    model_version: Optional[str],
+    warnings: List[Dict[str, str]],
+) -> Dict[str, Any]:
+    forecasts: Dict[str, List[Any]] = {"timestamp": [row["target_hour"] for row in rows]}
+    for name in QUANTILE_NAMES:
+        forecasts[name] = [row[name] for row in rows]
+    if missing:
+        warnings.append({"code": "forecast_missing", "message": f"{len(missing)} requested hour(s) have no forecast"})
+    if stale:
+        warnings.append({"code": "forecast_stale", "message": f"{len(stale)} hour(s) are stale or from another model version"})
+    payload: Dict[str, Any] = {
+        "route": route,
+        "start": hours[0],
+        "end": hours[-1],
+        "source": source,
+        "forecasts": forecasts,
+        "coverage": {
+            "requested_hours": len(hours),
+            "returned_hours": len(rows),
+            "missing_hours": len(missing),
+            "stale_hours": len(stale),
+        },
+        "metadata": model_to_dict(
+            ApiMetadata(
+                api_version="v1",
+                model_version=model_version,
+                num_predictions=len(rows),
+                quantiles=QUANTILE_NAMES,
+            )
+        ),
+        "warnings": warnings,
+    }
+    if include_schedule:
+        payload["schedule"] = [json.loads(row["schedule"]) for row in rows if row["schedule"] is not None]
+    return payload
+
+
+@router.get("/{route}", response_class=FastJSONResponse)
+def get_forecasts(
+    route: str,
+    start: str,
+    end: Optional[str] = None,
+    include_schedule: bool = False,
+    max_age_hours: float = Query(FORECAST_MAX_AGE_HOURS, ge=0),
+    live: bool = True,
+):
+    """
+    Forecasts for `route` between `start` and `end` (inclusive, hourly;
+    default: the 24 hours from `start`), read from the forecast store.
+    When hours are missing, older than `max_age_hours` (0 disables the age
+    check) or from another model version, and `live` is set, the route is
+    re-forecast from its history file in FORECAST_HISTORY_DIR and stored
+    before answering (once per history file and model version). Otherwise
+    whatever is stored is returned with warnings. `start`/`end` are naive
+    local hours, like the stored forecasts.
+
+    A plain `def`: SQLite access and live inference run in the threadpool,
+    not on the event loop.
+    """
+    start_ts, end_ts = _parse_range(start, end)
+    hours = expected_hours(start_ts, end_ts)
+    store = get_forecast_store()
+    model_version = _current_model_version()
+
+    mark_stage("store_read")
+    rows = store.range(route, hours[0], hours[-1])
+    missing, stale, unscheduled = _needs_refresh(rows, hours, include_schedule, model_version, max_age_hours)
+    source = "store"
+    warnings: List[Dict[str, str]] = []
+
+    if (missing or stale or unscheduled) and live:
+        path = history_path(route)
+        if path is None:
+            warnings.append(
+                {"code": "live_fallback_unavailable", "message": f"No history for route {route} to forecast from"}
+            )
+        else:
+            try:
+                written = _refresh_route(route, path, model_version)
+            except HTTPException:
+                raise
+            except InputValidationError as e:
+                raise HTTPException(status_code=422, detail={"stage": "validation", "errors": e.errors})
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail={"stage": "preprocess", "message": str(e)})
+            except Exception as e:
+                log_event(logger, "exception", "forecast_refresh_failed", route=route, error=str(e))
+                raise HTTPException(
+                    status_code=500,
+                    detail={"stage": "inference", "message": "Live forecast failed"},
+                )
+            if written:
+                mark_stage("store_read")
+                rows = store.range(route, hours[0], hours[-1])
+                missing, stale, unscheduled = _needs_refresh(
+                    rows, hours, include_schedule, model_version, max_age_hours
+                )
+                if any(row["target_hour"] in written for row in rows):
+                    source = "live"
+
+    if not rows:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "stage": "forecast_store",
+                "message": f"No forecasts for route {route} between {hours[0]} and {hours[-1]}",
+            },
+        )
+
+    mark_stage("format")
+    log_event(
+        logger,
+        "info",
+        "forecasts_served",
+        route=route,
+        source=source,
+        hours=len(rows),
+        missing=len(missing),
+        stale=len(stale),
+    )
+    return FastJSONResponse(
+        content=_build_response(
+            route, rows, hours, source, include_schedule, missing, stale, model_version, warnings
+        )
+    )
@@ -0,0 +1,167 @@
+"""
+Asynchronous job API (v1).
+Submit predict + schedule runs in the background and poll for their results.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterator, Optional
+import logging
+
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse
+
+from app.api.jobs import QueueFullError, get_job_manager
+from app.api.predict import validate_csv_file
+from app.api.responses import MAX_PRECISION, ResponseFormat, dumps
+from app.api.streaming import MEDIA_TYPES, iter_csv_chunks, iter_ndjson_chunks
+from app.api.v1.predict_schedule import (
+    PredictScheduleParams,
+    build_predict_schedule_payload,
+    outcome_rows,
+    run_predict_schedule,
+    schedule_quantiles,
+)
+from app.utils.logging import log_event
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/v1/jobs", tags=["Jobs", "v1"])
+
+PREDICT_SCHEDULE_STAGES = ["parse", "preprocess", "inference", "scheduling", "diff", "write"]
+
+RESULT_MEDIA_TYPES = {"json": "application/json", **MEDIA_TYPES}
+
+
+def _not_found(job_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=404,
+        detail={"stage": "job", "message": f"Job {job_id} not found"},
+    )
+
+
+def _with_links(status: Dict[str, Any]) -> Dict[str, Any]:
+    job_id = status["job_id"]
+    status["status_url"] = f"/v1/jobs/{job_id}"
+    status["result_url"] = f"/v1/jobs/{job_id}/result"
+    return status
+
+
+@router.post("/predict-schedule", status_code=202)
+async def submit_predict_schedule_job(
+    file: UploadFile = File(...),
+    schedule_file: Optional[UploadFile] = File(None),
+    capacity: int = 50,
+    base_headway_minutes: int = 15,
+    standing_ratio: float = 0.15,
+    low_load_threshold: float = 0.50,
+    low_headway_multiplier: float = 1.50,
+    current_buses: Optional[str] = None,
+    last_n: Optional[int] = Query(None, ge=1),
+    quantiles: Optional[str] = None,
+    output: str = Query("json", enum=["json", "csv", "ndjson"]),
+    response_format: ResponseFormat = Query("records", alias="format"),
+    precision: Optional[int] = Query(None, ge=0, le=MAX_PRECISION),
+):
+    """
+    Queue a `/v1/predict-schedule` run and return its job id immediately.
+    Poll `status_url` for per-stage progress and fetch `result_url` once the
+    job has succeeded.
+    """
+    if output not in RESULT_MEDIA_TYPES:
+        output = "json"
+    try:
+        heads = schedule_quantiles(quantiles, output)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"stage": "query", "message": str(e)})
+    validate_csv_file(file)
+    file_content = await file.read()
+    schedule_content = await schedule_file.read() if schedule_file is not None else None
+    params = PredictScheduleParams(
+        capacity=capacity,
+        base_headway_minutes=base_headway_minutes,
+        standing_ratio=standing_ratio,
+        low_load_threshold=low_load_threshold,
+        low_headway_multiplier=low_headway_multiplier,
+        current_buses=current_buses,
+        last_n=last_n,
+        quantiles=heads,
+    )
+
+    def task(on_stage: Callable[[str], None]) -> Iterator[bytes]:
+        outcome = run_predict_schedule(file_content, schedule_content, params, on_stage)
+        if output == "csv":
+            rows, columns = outcome_rows(outcome)
+            yield from iter_csv_chunks(rows, columns)
+        elif output == "ndjson":
+            rows, _ = outcome_rows(outcome)
+            yield from iter_ndjson_chunks(rows)
+        else:
+            yield dumps(
+                build_predict_schedule_payload(
+                    outcome,
+                    columnar=response_format == "columnar",
+                    precision=precision,
+                )
+            )
+
+    try:
+        status = get_job_manager().submit(
+            kind="predict-schedule",
+            task=task,
+            stages=PREDICT_SCHEDULE_STAGES,
+            media_type=RESULT_MEDIA_TYPES[output],
+            filename=f"result.{output}",
+            parameters={
+                "filename": file.filename,
+                "bytes": len(file_content),
+                "output": output,
+                "format": response_format,
+                **vars(params),
+            },
+        )
+    except QueueFullError as e:
+        log_event(logger, "warning", "job_queue_full", error=str(e))
+        raise HTTPException(
+            status_code=503,
+            detail={"stage": "queue", "message": str(e)},
+            headers={"Retry-After": "5"},
+        )
+    return JSONResponse(content=_with_links(status), status_code=202)
+
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str):
+    """Job state, current stage and per-stage durations."""
+    status = get_job_manager().get(job_id)
+    if status is None:
+        raise _not_found(job_id)
+    return _with_links(status)
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """
+    Result file of a succeeded job. Failed jobs return their original error;
+    unfinished jobs return 409.
+    """
+    manager = get_job_manager()
+    status = manager.get(job_id)
+    if status is None:
+        raise _not_found(job_id)
+    if status["status"] == "failed":
+        error = status.get("error") or {}
+        raise HTTPException(
+            status_code=error.get("status_code", 500),
+            detail=error.get("detail"),
+        )
+    if status["status"] != "succeeded":
+        raise HTTPException(
+            status_code=409,
+            detail={"stage": "job", "message": f"Job is {status['status']}"},
+            headers={"Retry-After": "2"},
+        )
+    result = status["result"]
+    return FileResponse(
+        manager.result_path(status),
+        media_type=result["media_type"],
+        filename=f"predict_schedule_{job_id}.{result['filename'].rsplit('.', 1)[-1]}",
+    )
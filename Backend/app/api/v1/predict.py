@@ -3,19 +3,33 @@ Versioned prediction API (v1).
 """
 from __future__ import annotations
 
-from typing import List, Dict, Any
+from typing import Any, Optional
 import logging
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
-
-from app.api.schemas import PredictResponseV1, WarningMessage, ConfidenceBounds, ApiMetadata
-from app.api.predict import validate_csv_file, parse_csv, format_predictions, PredictionError
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Query
+
+from app.api.schemas import PredictResponseV1
+from app.api.predict import validate_csv_file, parse_csv
+from app.api.encodings import (
+    BINARY_RESPONSES,
+    UnsupportedEncodingError,
+    encoded_response,
+    negotiate_encoding,
+)
+from app.api.responses import (
+    MAX_PRECISION,
+    FastJSONResponse,
+    ResponseFormat,
+    build_columnar_predict_response,
+    build_predict_response,
+    parse_quantiles,
+)
 from app.ml.preprocess import preprocess_input
 from app.ml.adapters.mongo_csv_adapter import aggregate_hourly_demand
 from app.ml.validators import InputValidationError
-from app.ml.loader import get_model
+from app.ml.loader import get_head_model
 from app.utils.logging import log_event
+from app.utils.timing import mark_stage
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/v1/predict", tags=["Prediction", "v1"])
@@ -30,51 +44,57 @@ def _get_sample_count(model_inputs: Any) -> int:
     return len(model_inputs)
 
 
-def _build_confidence_bounds(
-    predictions: List[Dict[str, Any]],
-) -> tuple[List[ConfidenceBounds], List[WarningMessage]]:
-    quantile_map = {item.get("quantile"): item.get("values") for item in predictions}
-    warnings: List[WarningMessage] = []
-
-    lower = quantile_map.get("p10")
-    upper = quantile_map.get("p90")
-    if lower is None or upper is None:
-        warnings.append(
-            WarningMessage(
-                code="missing_confidence_bounds",
-                message="p10/p90 not available; confidence bounds omitted",
-            )
-        )
-        return [], warnings
-
-    return [
-        ConfidenceBounds(
-            lower_quantile="p10",
-            upper_quantile="p90",
-            lower=lower,
-            upper=upper,
-        )
-    ], warnings
-
-
-@router.post("", response_model=PredictResponseV1)
-async def predict_v1(file: UploadFile = File(...)):
+@router.post(
+    "",
+    response_model=PredictResponseV1,
+    response_class=FastJSONResponse,
+    responses=BINARY_RESPONSES,
+)
+def predict_v1(
+    file: UploadFile = File(...),
+    response_format: ResponseFormat = Query("records", alias="format"),
+    precision: Optional[int] = Query(None, ge=0, le=MAX_PRECISION),
+    last_n: Optional[int] = Query(None, ge=1),
+    quantiles: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
     """
     Predict bus demand from uploaded CSV file (v1).
     Returns quantiles, confidence bounds, metadata, and warnings.
+    `format=columnar` returns one array per quantile, optionally rounded to
+    `precision` decimals. `Accept: application/msgpack` or
+    `application/vnd.apache.arrow.stream` selects a binary encoding.
+    `last_n` predicts only the most recent `last_n` hours. `quantiles`
+    (e.g. `p50` or `p10,p50,p90`) evaluates and returns only those heads.
     """
     log_event(logger, "info", "prediction_v1_request_received", filename=file.filename)
-    print("STEP 1: FILE RECEIVED", flush=True)
 
     try:
+        try:
+            encoding = negotiate_encoding(accept)
+        except UnsupportedEncodingError as e:
+            raise HTTPException(
+                status_code=406,
+                detail={"stage": "encoding", "message": str(e)},
+            )
+        try:
+            heads = parse_quantiles(quantiles)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail={"stage": "query", "message": str(e)},
+            )
         validate_csv_file(file)
 
-        file_content = await file.read()
+        mark_stage("read")
+        file_content = file.file.read()
         log_event(logger, "info", "file_read", bytes=len(file_content))
 
+        mark_stage("parse")
         df = parse_csv(file_content)
 
         if "demand" not in df.columns:
+            mark_stage("aggregation")
             try:
                 df = aggregate_hourly_demand(df)
                 log_event(logger, "info", "adapter_aggregation_complete", rows=len(df))
@@ -85,8 +105,9 @@ async def predict_v1(file: UploadFile = File(...)):
                     detail={"stage": "aggregation", "message": str(e)},
                 )
 
+        mark_stage("preprocess")
         try:
-            X = preprocess_input(df)
+            X = preprocess_input(df, last_n=last_n)
             sample_count = _get_sample_count(X)
             log_event(logger, "info", "preprocess_complete", samples=sample_count)
         except InputValidationError as e:
@@ -102,8 +123,9 @@ async def predict_v1(file: UploadFile = File(...)):
                 detail={"stage": "preprocess", "message": str(e)},
             )
 
+        mark_stage("inference")
         try:
-            model = get_model()
+            model = get_head_model(heads)
         except Exception as e:
             log_event(logger, "exception", "model_load_failed", error=str(e))
             raise HTTPException(
@@ -112,7 +134,6 @@ async def predict_v1(file: UploadFile = File(...)):
             )
 
         try:
-            print("STEP 3: MODEL PREDICT START", flush=True)
             predictions = model.predict(X, verbose=0)
         except Exception as e:
             log_event(logger, "exception", "inference_failed", error=str(e))
@@ -121,28 +142,23 @@ async def predict_v1(file: UploadFile = File(...)):
                 detail={"stage": "inference", "message": "Model inference failed"},
             )
 
+        mark_stage("format")
         try:
-            formatted = format_predictions(predictions, sample_count)
-        except PredictionError as e:
-            raise HTTPException(status_code=500, detail=str(e))
-
-        confidence_bounds, warnings = _build_confidence_bounds(formatted.get("predictions", []))
-        metadata = ApiMetadata(
-            api_version="v1",
-            num_predictions=formatted.get("metadata", {}).get("num_predictions"),
-            quantiles=formatted.get("metadata", {}).get("quantiles"),
-        )
-
-        response = PredictResponseV1(
-            predictions=formatted.get("predictions", []),
-            confidence_bounds=confidence_bounds,
-            metadata=metadata,
-            warnings=warnings,
-        )
+            if response_format == "columnar" or encoding == "arrow":
+                payload = build_columnar_predict_response(
+                    predictions, sample_count, precision, names=heads
+                )
+            else:
+                payload = build_predict_response(predictions, sample_count, names=heads)
+        except Exception as e:
+            log_event(logger, "exception", "format_predictions_failed", error=str(e))
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to format predictions: {str(e)}",
+            )
 
         log_event(logger, "info", "prediction_v1_request_completed")
-        payload = response.model_dump() if hasattr(response, "model_dump") else response.dict()
-        return JSONResponse(content=payload, status_code=200)
+        return encoded_response(encoding, payload, columns_key="values")
 
     except HTTPException as e:
         log_event(logger, "warning", "http_exception", status_code=e.status_code, detail=e.detail)
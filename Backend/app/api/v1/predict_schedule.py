@@ -3,32 +3,48 @@ Orchestration API (v1): predict + schedule.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
 import logging
-import io
 
+import numpy as np
 import pandas as pd
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import JSONResponse, StreamingResponse
-
-from app.api.predict import validate_csv_file, parse_csv, format_predictions, PredictionError
-from app.api.schemas import (
-    PredictResponseV1,
-    WarningMessage,
-    ConfidenceBounds,
-    ApiMetadata,
-    PredictionPayload,
-    ScheduleResponseV1,
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Query
+
+from app.api.compression import csv_source
+from app.api.predict import validate_csv_file, parse_csv
+from app.api.encodings import (
+    BINARY_RESPONSES,
+    UnsupportedEncodingError,
+    encoded_response,
+    negotiate_encoding,
+)
+from app.api.streaming import streaming_rows_response
+from app.api.responses import (
+    MAX_PRECISION,
+    ResponseFormat,
+    build_columnar_predict_response,
+    build_columnar_schedule_response,
+    build_predict_response,
+    build_schedule_response,
+    parse_quantiles,
+    quantile_arrays,
 )
-from app.api.v1.predict import _build_confidence_bounds
 from app.ml.adapters.mongo_csv_adapter import aggregate_hourly_demand
 from app.ml.preprocess import preprocess_input
 from app.ml.validators import InputValidationError
-from app.ml.loader import get_model, get_feature_config
-from app.ml.feature_engineering import build_features
+from app.ml.loader import get_head_model
 from app.ml.scheduler import SchedulerConfig, generate_schedule
+from app.ml.schedule_diff import (
+    DIFF_COLUMNS,
+    ScheduleDiff,
+    align_current_buses,
+    diff_schedules,
+    schedule_columns,
+)
 from app.utils.logging import log_event
+from app.utils.timing import mark_stage
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/v1/predict-schedule", tags=["Prediction", "Scheduling", "v1"])
@@ -43,353 +59,452 @@ def _get_sample_count(model_inputs: Any) -> int:
     return len(model_inputs)
 
 
-def _extract_p50(predictions: List[Dict[str, Any]]) -> Dict[str, Any]:
-    for item in predictions:
-        if item.get("quantile") == "p50":
-            return item
+def _extract_p50(predictions: Any, names: Optional[List[str]] = None) -> np.ndarray:
+    for name, values in quantile_arrays(predictions, names):
+        if name == "p50":
+            return values
     raise ValueError("p50 quantile not found in prediction output")
 
 
-@router.post("")
-async def predict_schedule_v1(
-    file: UploadFile = File(...),
-    schedule_file: Optional[UploadFile] = File(None),
-    capacity: int = 50,
-    base_headway_minutes: int = 15,
-    standing_ratio: float = 0.15,
-    low_load_threshold: float = 0.50,
-    low_headway_multiplier: float = 1.50,
-    current_buses: Optional[str] = None,
-    output: str = Query("json", enum=["json", "csv"]),
-):
+def schedule_quantiles(quantiles: Optional[str], output: str = "json") -> Optional[List[str]]:
     """
-    Orchestrate prediction + scheduling from uploaded CSV (v1).
-    Returns prediction output and optimized schedule in one response.
-    """
-    log_event(logger, "info", "predict_schedule_v1_request_received", filename=file.filename)
+    Output heads to evaluate for a predict + schedule run (None: all).
 
+    CSV/NDJSON exports contain only the schedule, so just p50 is needed;
+    otherwise the requested heads plus p50, which scheduling reads.
+    Raises ValueError for unknown quantile names.
+    """
+    heads = parse_quantiles(quantiles)
+    if output in ("csv", "ndjson"):
+        return ["p50"]
+    if heads is None or "p50" in heads:
+        return heads
+    return parse_quantiles(",".join([*heads, "p50"]))
+
+
+@dataclass
+class PredictScheduleParams:
+    """Scheduling inputs shared by the synchronous and job endpoints."""
+    capacity: int = 50
+    base_headway_minutes: int = 15
+    standing_ratio: float = 0.15
+    low_load_threshold: float = 0.50
+    low_headway_multiplier: float = 1.50
+    current_buses: Optional[str] = None
+    # Predict and schedule only the most recent `last_n` hours
+    last_n: Optional[int] = None
+    # Output heads to evaluate (see schedule_quantiles); None evaluates all
+    quantiles: Optional[List[str]] = None
+
+
+@dataclass
+class PredictScheduleOutcome:
+    """Everything the predict + schedule pipeline produced for one upload."""
+    predictions: Any
+    sample_count: int
+    result: Dict[str, Any]
+    diff: Optional[ScheduleDiff]
+    warnings: List[Dict[str, str]] = field(default_factory=list)
+    quantiles: Optional[List[str]] = None
+
+
+def _parse_schedule_csv(schedule_content: bytes) -> pd.DataFrame:
     try:
-        validate_csv_file(file)
-        file_content = await file.read()
-        log_event(logger, "info", "file_read", bytes=len(file_content))
+        source, _ = csv_source(schedule_content)
+        schedule_df = pd.read_csv(source)
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"stage": "csv", "message": str(e)},
+        )
 
-        df = parse_csv(file_content)
+    required_cols = {"hour", "current_buses"}
+    if not required_cols.issubset(set(schedule_df.columns)):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "stage": "csv",
+                "message": "schedule CSV must include columns: hour,current_buses",
+            },
+        )
 
-        schedule_df: Optional[pd.DataFrame] = None
-        if schedule_file is not None:
-            try:
-                schedule_df = pd.read_csv(schedule_file.file)
-            except Exception as e:
-                raise HTTPException(
-                    status_code=400,
-                    detail={"stage": "csv", "message": str(e)},
-                )
+    schedule_df = schedule_df[list(required_cols)]
+    schedule_df["hour"] = pd.to_datetime(
+        schedule_df["hour"], errors="coerce"
+    ).dt.floor("h")
+    if schedule_df["hour"].isna().any():
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "stage": "csv",
+                "message": "Invalid hour values in schedule CSV",
+            },
+        )
+    duplicated = schedule_df["hour"].duplicated()
+    if duplicated.any():
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "stage": "csv",
+                "message": (
+                    "schedule CSV contains duplicate hours: "
+                    f"{schedule_df['hour'][duplicated].iloc[0].strftime('%Y-%m-%d %H:%M:%S')}"
+                ),
+            },
+        )
+    schedule_df["current_buses"] = pd.to_numeric(
+        schedule_df["current_buses"], errors="coerce"
+    )
+    if schedule_df["current_buses"].isna().any():
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "stage": "csv",
+                "message": "current_buses must be numeric",
+            },
+        )
+    if (schedule_df["current_buses"] < 0).any():
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "stage": "csv",
+                "message": "current_buses must be >= 0",
+            },
+        )
+    return schedule_df
 
-            required_cols = {"hour", "current_buses"}
-            if not required_cols.issubset(set(schedule_df.columns)):
-                raise HTTPException(
-                    status_code=400,
-                    detail={
-                        "stage": "csv",
-                        "message": "schedule CSV must include columns: hour,current_buses",
-                    },
-                )
 
-            schedule_df = schedule_df[list(required_cols)]
-            schedule_df["hour"] = pd.to_datetime(
-                schedule_df["hour"], errors="coerce"
-            ).dt.floor("h")
-            if schedule_df["hour"].isna().any():
-                raise HTTPException(
-                    status_code=400,
-                    detail={
-                        "stage": "csv",
-                        "message": "Invalid hour values in schedule CSV",
-                    },
-                )
-            schedule_df["current_buses"] = pd.to_numeric(
-                schedule_df["current_buses"], errors="coerce"
-            )
-            if schedule_df["current_buses"].isna().any():
-                raise HTTPException(
-                    status_code=400,
-                    detail={
-                        "stage": "csv",
-                        "message": "current_buses must be numeric",
-                    },
-                )
-            if (schedule_df["current_buses"] < 0).any():
-                raise HTTPException(
-                    status_code=400,
-                    detail={
-                        "stage": "csv",
-                        "message": "current_buses must be >= 0",
-                    },
-                )
+def run_predict_schedule(
+    file_content: bytes,
+    schedule_content: Optional[bytes],
+    params: PredictScheduleParams,
+    on_stage: Optional[Callable[[str], None]] = None,
+) -> PredictScheduleOutcome:
+    """
+    Parse, preprocess, predict, schedule and (with a schedule CSV) diff.
 
-        if "demand" not in df.columns:
-            try:
-                df = aggregate_hourly_demand(df)
-                log_event(logger, "info", "adapter_aggregation_complete", rows=len(df))
-            except Exception as e:
-                log_event(logger, "warning", "adapter_aggregation_failed", error=str(e))
-                raise HTTPException(
-                    status_code=400,
-                    detail={"stage": "aggregation", "message": str(e)},
-                )
+    `on_stage` is called with "parse", "preprocess", "inference",
+    "scheduling" and "diff" as each stage starts. Failures raise
+    HTTPException with a {"stage", "message"} detail.
+    """
+    def stage(name: str) -> None:
+        mark_stage(name)
+        if on_stage is not None:
+            on_stage(name)
 
-        try:
-            X = preprocess_input(df)
-            sample_count = _get_sample_count(X)
-            log_event(logger, "info", "preprocess_complete", samples=sample_count)
-        except InputValidationError as e:
-            log_event(logger, "warning", "input_validation_failed", errors=e.errors)
-            raise HTTPException(
-                status_code=400,
-                detail={"stage": "validation", "errors": e.errors},
-            )
-        except ValueError as e:
-            log_event(logger, "warning", "preprocess_validation_failed", error=str(e))
-            raise HTTPException(
-                status_code=400,
-                detail={"stage": "preprocess", "message": str(e)},
-            )
+    stage("parse")
+    df = parse_csv(file_content)
 
-        try:
-            model = get_model()
-        except Exception as e:
-            log_event(logger, "exception", "model_load_failed", error=str(e))
-            raise HTTPException(
-                status_code=500,
-                detail={"stage": "model_load", "message": "Model loading failed"},
-            )
+    schedule_df: Optional[pd.DataFrame] = None
+    if schedule_content is not None:
+        schedule_df = _parse_schedule_csv(schedule_content)
 
+    stage("preprocess")
+    if "demand" not in df.columns:
         try:
-            predictions_raw = model.predict(X, verbose=0)
+            df = aggregate_hourly_demand(df)
+            log_event(logger, "info", "adapter_aggregation_complete", rows=len(df))
         except Exception as e:
-            log_event(logger, "exception", "inference_failed", error=str(e))
+            log_event(logger, "warning", "adapter_aggregation_failed", error=str(e))
             raise HTTPException(
-                status_code=500,
-                detail={"stage": "inference", "message": "Model inference failed"},
+                status_code=400,
+                detail={"stage": "aggregation", "message": str(e)},
             )
 
-        try:
-            formatted = format_predictions(predictions_raw, sample_count)
-        except PredictionError as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    try:
+        X, window_ends = preprocess_input(df, last_n=params.last_n, return_timestamps=True)
+        sample_count = _get_sample_count(X)
+        log_event(logger, "info", "preprocess_complete", samples=sample_count)
+    except InputValidationError as e:
+        log_event(logger, "warning", "input_validation_failed", errors=e.errors)
+        raise HTTPException(
+            status_code=400,
+            detail={"stage": "validation", "errors": e.errors},
+        )
+    except ValueError as e:
+        log_event(logger, "warning", "preprocess_validation_failed", error=str(e))
+        raise HTTPException(
+            status_code=400,
+            detail={"stage": "preprocess", "message": str(e)},
+        )
 
-        confidence_bounds, prediction_warnings = _build_confidence_bounds(
-            formatted.get("predictions", [])
+    stage("inference")
+    try:
+        model = get_head_model(params.quantiles)
+    except Exception as e:
+        log_event(logger, "exception", "model_load_failed", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail={"stage": "model_load", "message": "Model loading failed"},
         )
-        prediction_metadata = ApiMetadata(
-            api_version="v1",
-            num_predictions=formatted.get("metadata", {}).get("num_predictions"),
-            quantiles=formatted.get("metadata", {}).get("quantiles"),
+
+    try:
+        predictions_raw = model.predict(X, verbose=0)
+    except Exception as e:
+        log_event(logger, "exception", "inference_failed", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail={"stage": "inference", "message": "Model inference failed"},
         )
 
-        prediction_response = PredictResponseV1(
-            predictions=formatted.get("predictions", []),
-            confidence_bounds=confidence_bounds,
-            metadata=prediction_metadata,
-            warnings=prediction_warnings,
+    try:
+        p50 = _extract_p50(predictions_raw, params.quantiles)
+    except ValueError as e:
+        log_event(logger, "warning", "p50_missing", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail={"stage": "format", "message": str(e)},
         )
 
-        try:
-            p50 = _extract_p50(formatted.get("predictions", []))
-        except ValueError as e:
-            log_event(logger, "warning", "p50_missing", error=str(e))
-            raise HTTPException(
-                status_code=500,
-                detail={"stage": "format", "message": str(e)},
-            )
+    stage("scheduling")
+    warnings: List[Dict[str, str]] = []
 
-        try:
-            current_buses_list: Optional[List[int]] = None
-            if current_buses:
-                current_buses_list = [
-                    int(value)
-                    for value in current_buses.split(",")
-                    if value.strip()
-                ]
-            elif schedule_df is not None and not schedule_df.empty:
-                current_buses_list = (
-                    schedule_df["current_buses"].astype(int).tolist()
+    try:
+        # Each prediction belongs to the hour its input window ends at
+        timestamps: Optional[List[str]] = window_ends if len(window_ends) == sample_count else None
+
+        current_buses_list: Optional[List[int]] = None
+        if params.current_buses:
+            current_buses_list = [
+                int(value)
+                for value in params.current_buses.split(",")
+                if value.strip()
+            ]
+        elif schedule_df is not None and not schedule_df.empty:
+            if timestamps is None:
+                # No prediction hours to join on: fall back to row order
+                if len(schedule_df) != sample_count:
+                    raise ValueError(
+                        "schedule CSV row count does not match predictions length"
+                    )
+                timestamps = schedule_df["hour"].dt.strftime("%Y-%m-%d %H:%M:%S").tolist()
+            current_buses_list = align_current_buses(schedule_df, timestamps)
+            if current_buses_list is None:
+                warnings.append(
+                    {
+                        "code": "current_schedule_partial",
+                        "message": "schedule CSV does not cover every predicted hour; per-trip current comparison omitted",
+                    }
                 )
 
-            timestamps: Optional[List[str]] = None
-            try:
-                cfg = get_feature_config()
-                if schedule_df is not None and not schedule_df.empty:
-                    if len(schedule_df) != sample_count:
-                        raise ValueError(
-                            "schedule CSV row count does not match predictions length"
-                        )
-                    timestamps = schedule_df["hour"].dt.strftime("%Y-%m-%d %H:%M:%S").tolist()
-                else:
-                    features_df = build_features(df, cfg)
-                    seq_len = cfg.get("sequence_length", 1)
-                    if len(features_df) >= seq_len:
-                        ts_series = features_df["timestamp"].iloc[seq_len - 1 :]
-                        if len(ts_series) == sample_count:
-                            timestamps = ts_series.astype(str).tolist()
-            except Exception:
-                timestamps = None
-
-            schedule_config = SchedulerConfig(
-                base_headway_minutes=base_headway_minutes,
-                standing_ratio=standing_ratio,
-                low_load_threshold=low_load_threshold,
-                low_headway_multiplier=low_headway_multiplier,
-            )
-            schedule_payload = PredictionPayload(predictions=[p50])
-            result = generate_schedule(
-                prediction_payload=(
-                    schedule_payload.model_dump()
-                    if hasattr(schedule_payload, "model_dump")
-                    else schedule_payload.dict()
-                ),
-                capacity=capacity,
-                config=schedule_config,
-                trip_ids=None,
-                timestamps=timestamps,
-                current_buses=current_buses_list,
-            )
-            schedule_response = ScheduleResponseV1(
-                schedule=result.get("schedule", []),
-                summary=result.get("summary", {}),
-                parameters=result.get("parameters", {}),
-                rules=result.get("rules", []),
-                metadata=ApiMetadata(api_version="v1"),
-                warnings=[],
+        schedule_config = SchedulerConfig(
+            base_headway_minutes=params.base_headway_minutes,
+            standing_ratio=params.standing_ratio,
+            low_load_threshold=params.low_load_threshold,
+            low_headway_multiplier=params.low_headway_multiplier,
+        )
+        result = generate_schedule(
+            prediction_payload={
+                "predictions": [
+                    {"quantile": "p50", "values": p50.tolist()}
+                ]
+            },
+            capacity=params.capacity,
+            config=schedule_config,
+            trip_ids=None,
+            timestamps=timestamps,
+            current_buses=current_buses_list,
+        )
+    except ValueError as e:
+        log_event(logger, "warning", "schedule_validation_failed", error=str(e))
+        raise HTTPException(
+            status_code=400,
+            detail={"stage": "scheduling", "message": str(e)},
+        )
+    except Exception as e:
+        log_event(logger, "exception", "schedule_failed", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail={"stage": "scheduling", "message": "Scheduling failed"},
+        )
+
+    diff: Optional[ScheduleDiff] = None
+    if schedule_df is None:
+        warnings.append(
+            {
+                "code": "refined_schedule_disabled",
+                "message": "Refined schedule disabled: upload schedule CSV with current_buses column",
+            }
+        )
+    else:
+        stage("diff")
+        try:
+            diff = diff_schedules(
+                schedule_df,
+                schedule_columns(result.get("schedule", [])),
             )
         except ValueError as e:
-            log_event(logger, "warning", "schedule_validation_failed", error=str(e))
             raise HTTPException(
                 status_code=400,
                 detail={"stage": "scheduling", "message": str(e)},
             )
-        except Exception as e:
-            log_event(logger, "exception", "schedule_failed", error=str(e))
-            raise HTTPException(
-                status_code=500,
-                detail={"stage": "scheduling", "message": "Scheduling failed"},
+
+    log_event(
+        logger,
+        "info",
+        "predict_schedule_completed",
+        schedule_length=len(result.get("schedule", [])),
+    )
+    return PredictScheduleOutcome(
+        predictions=predictions_raw,
+        sample_count=sample_count,
+        result=result,
+        diff=diff,
+        warnings=warnings,
+        quantiles=params.quantiles,
+    )
+
+
+def build_predict_schedule_payload(
+    outcome: PredictScheduleOutcome,
+    columnar: bool = False,
+    precision: Optional[int] = None,
+) -> Dict[str, Any]:
+    """JSON-shaped response body for a pipeline outcome."""
+    try:
+        if columnar:
+            prediction_response = build_columnar_predict_response(
+                outcome.predictions, outcome.sample_count, precision, names=outcome.quantiles
             )
+        else:
+            prediction_response = build_predict_response(
+                outcome.predictions, outcome.sample_count, names=outcome.quantiles
+            )
+    except Exception as e:
+        log_event(logger, "exception", "format_predictions_failed", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to format predictions: {str(e)}",
+        )
 
-        orchestrator_metadata = {
+    if columnar:
+        schedule_response = build_columnar_schedule_response(
+            outcome.result, precision=precision
+        )
+    else:
+        schedule_response = build_schedule_response(outcome.result)
+
+    refined_schedule: Any = {} if columnar else []
+    refined_summary: Dict[str, Any] = {}
+    if outcome.diff is not None:
+        refined_schedule = (
+            outcome.diff.refined_columns() if columnar else outcome.diff.refined_schedule()
+        )
+        refined_summary = outcome.diff.summary
+
+    return {
+        "predictions": prediction_response,
+        "schedule": schedule_response,
+        "refined_schedule": refined_schedule,
+        "refined_summary": refined_summary,
+        "metadata": {
             "api_version": "v1",
             "orchestration": "predict+schedule",
-        }
-
-        warnings: List[Dict[str, str]] = []
-        refined_schedule: List[Dict[str, Any]] = []
-        refined_summary: Dict[str, Any] = {}
-
-        if schedule_df is None:
-            warnings.append(
-                {
-                    "code": "refined_schedule_disabled",
-                    "message": "Refined schedule disabled: upload schedule CSV with current_buses column",
-                }
-            )
-        else:
-            schedule_output = result.get("schedule", [])
-            if len(schedule_output) != len(schedule_df):
-                raise HTTPException(
-                    status_code=400,
-                    detail={
-                        "stage": "scheduling",
-                        "message": "schedule CSV row count does not match schedule output",
-                    },
-                )
+        },
+        "warnings": list(outcome.warnings),
+    }
 
-            total_added = 0
-            total_removed = 0
-            peak_overload = 0
-            for idx, trip in enumerate(schedule_output):
-                optimized_buses = trip.get("buses_assigned", 0)
-                current_value = int(schedule_df["current_buses"].iloc[idx])
-                delta = int(optimized_buses) - current_value
-                if delta > 0:
-                    total_added += delta
-                elif delta < 0:
-                    total_removed += abs(delta)
-                if (trip.get("load_factor") or 0) > 1.0:
-                    peak_overload += 1
-
-                refined_schedule.append(
-                    {
-                        "hour": schedule_df["hour"].iloc[idx].strftime("%Y-%m-%d %H:%M:%S"),
-                        "current_buses": current_value,
-                        "optimized_buses": optimized_buses,
-                        "delta": delta,
-                    }
-                )
 
-            refined_summary = {
-                "total_hours": len(schedule_output),
-                "total_added_buses": total_added,
-                "total_removed_buses": total_removed,
-                "peak_overload_hours": peak_overload,
-            }
+def outcome_rows(outcome: PredictScheduleOutcome):
+    """Row iterator and column names for CSV/NDJSON export."""
+    if outcome.diff is None:
+        schedule_items = outcome.result.get("schedule", [])
+        columns = list(schedule_items[0]) if schedule_items else []
+        return iter(schedule_items), columns
+    return outcome.diff.iter_rows(), DIFF_COLUMNS
 
-        response_payload = {
-            "predictions": (
-                prediction_response.model_dump()
-                if hasattr(prediction_response, "model_dump")
-                else prediction_response.dict()
-            ),
-            "schedule": (
-                schedule_response.model_dump()
-                if hasattr(schedule_response, "model_dump")
-                else schedule_response.dict()
+
+@router.post("", responses=BINARY_RESPONSES)
+def predict_schedule_v1(
+    file: UploadFile = File(...),
+    schedule_file: Optional[UploadFile] = File(None),
+    capacity: int = 50,
+    base_headway_minutes: int = 15,
+    standing_ratio: float = 0.15,
+    low_load_threshold: float = 0.50,
+    low_headway_multiplier: float = 1.50,
+    current_buses: Optional[str] = None,
+    last_n: Optional[int] = Query(None, ge=1),
+    quantiles: Optional[str] = None,
+    output: str = Query("json", enum=["json", "csv", "ndjson"]),
+    response_format: ResponseFormat = Query("records", alias="format"),
+    precision: Optional[int] = Query(None, ge=0, le=MAX_PRECISION),
+    accept: Optional[str] = Header(None),
+):
+    """
+    Orchestrate prediction + scheduling from uploaded CSV (v1).
+    Returns prediction output and optimized schedule in one response.
+    `format=columnar` applies to the JSON output only. With `output=json`,
+    `Accept` may select MessagePack or an Arrow IPC stream; the Arrow table
+    holds the quantile and schedule columns side by side.
+    `output=csv|ndjson` streams the refined (or, without a schedule CSV, the
+    optimized) schedule row by row instead.
+    `last_n` limits prediction and scheduling to the most recent `last_n`
+    hours (e.g. 24); features still use the whole upload. `quantiles`
+    limits the evaluated and returned heads (p50 is always included);
+    CSV/NDJSON exports evaluate p50 only.
+    """
+    log_event(logger, "info", "predict_schedule_v1_request_received", filename=file.filename)
+
+    try:
+        try:
+            encoding = negotiate_encoding(accept) if output == "json" else "json"
+        except UnsupportedEncodingError as e:
+            raise HTTPException(
+                status_code=406,
+                detail={"stage": "encoding", "message": str(e)},
+            )
+        try:
+            heads = schedule_quantiles(quantiles, output)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail={"stage": "query", "message": str(e)},
+            )
+        validate_csv_file(file)
+        mark_stage("read")
+        file_content = file.file.read()
+        log_event(logger, "info", "file_read", bytes=len(file_content))
+        schedule_content = schedule_file.file.read() if schedule_file is not None else None
+
+        outcome = run_predict_schedule(
+            file_content,
+            schedule_content,
+            PredictScheduleParams(
+                capacity=capacity,
+                base_headway_minutes=base_headway_minutes,
+                standing_ratio=standing_ratio,
+                low_load_threshold=low_load_threshold,
+                low_headway_multiplier=low_headway_multiplier,
+                current_buses=current_buses,
+                last_n=last_n,
+                quantiles=heads,
             ),
-            "refined_schedule": refined_schedule,
-            "refined_summary": refined_summary,
-            "metadata": orchestrator_metadata,
-            "warnings": warnings,
-        }
-
-        log_event(
-            logger,
-            "info",
-            "predict_schedule_v1_request_completed",
-            schedule_length=len(result.get("schedule", [])),
         )
-        if output == "csv":
-            schedule_output = result.get("schedule", [])
-            if schedule_df is None or schedule_df.empty:
-                schedule_df = pd.DataFrame(schedule_output)
-            else:
-                if len(schedule_df) != len(schedule_output):
-                    raise HTTPException(
-                        status_code=400,
-                        detail={
-                            "stage": "csv",
-                            "message": "schedule CSV row count does not match schedule output",
-                        },
-                    )
-                schedule_df["buses_assigned"] = [
-                    trip.get("buses_assigned") for trip in schedule_output
-                ]
-                schedule_df["extra_buses"] = [
-                    trip.get("extra_buses") for trip in schedule_output
-                ]
-                schedule_df["load_factor"] = [
-                    trip.get("load_factor") for trip in schedule_output
-                ]
 
-            csv_buffer = io.StringIO()
-            schedule_df.to_csv(csv_buffer, index=False)
-            csv_buffer.seek(0)
-            return StreamingResponse(
-                csv_buffer,
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": "attachment; filename=refined_schedule.csv"
-                },
+        mark_stage("format")
+        if output in ("csv", "ndjson"):
+            rows, columns = outcome_rows(outcome)
+            return streaming_rows_response(
+                rows,
+                output,
+                filename="refined_schedule",
+                columns=columns,
             )
 
-        return JSONResponse(content=response_payload, status_code=200)
+        response_payload = build_predict_schedule_payload(
+            outcome,
+            columnar=response_format == "columnar" or encoding == "arrow",
+            precision=precision,
+        )
+        if encoding == "arrow":
+            # One table: quantile columns next to the per-trip schedule fields
+            response_payload["columns"] = {
+                **response_payload["predictions"].pop("values"),
+                **response_payload["schedule"].pop("schedule"),
+            }
+        log_event(logger, "info", "predict_schedule_v1_request_completed")
+        return encoded_response(encoding, response_payload, columns_key="columns")
 
     except HTTPException as e:
         log_event(logger, "warning", "http_exception", status_code=e.status_code, detail=e.detail)
@@ -0,0 +1,74 @@
+"""
+Versioned overload risk API (v1).
+"""
+from __future__ import annotations
+
+import logging
+
+from fastapi import APIRouter, HTTPException
+
+from app.api.schemas import RiskRequestV1, RiskResponseV1, ApiMetadata
+from app.ml.risk import RiskConfig, assess_overload_risk
+from app.ml.scheduler import SchedulerConfig, generate_schedule
+from app.utils.logging import log_event
+from app.utils.timing import mark_stage
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/v1/risk", tags=["Scheduling", "v1"])
+
+
+@router.post("", response_model=RiskResponseV1)
+def risk_v1(request: RiskRequestV1):
+    """
+    Simulate overload risk from all prediction quantiles (v1).
+    When `buses` is omitted, risk is evaluated against the deterministic schedule.
+    """
+    try:
+        log_event(logger, "info", "risk_v1_request_received", draws=request.draws)
+        payload = (
+            request.prediction_output.model_dump()
+            if hasattr(request.prediction_output, "model_dump")
+            else request.prediction_output.dict()
+        )
+
+        buses = request.buses
+        if buses is None:
+            mark_stage("scheduling")
+            schedule = generate_schedule(
+                prediction_payload=payload,
+                capacity=request.capacity,
+                config=SchedulerConfig(standing_ratio=request.standing_ratio),
+            )
+            buses = [trip["buses_assigned"] for trip in schedule["schedule"]]
+
+        mark_stage("simulation")
+        result = assess_overload_risk(
+            prediction_payload=payload,
+            capacity=request.capacity,
+            buses=buses,
+            config=RiskConfig(
+                draws=request.draws,
+                seed=request.seed,
+                target_service_level=request.target_service_level,
+                standing_ratio=request.standing_ratio,
+            ),
+        )
+        mark_stage("format")
+        response = RiskResponseV1(
+            risk=result.get("risk", []),
+            summary=result.get("summary", {}),
+            parameters=result.get("parameters", {}),
+            metadata=ApiMetadata(api_version="v1"),
+            warnings=[],
+        )
+        log_event(logger, "info", "risk_v1_request_completed")
+        return response
+    except ValueError as e:
+        log_event(logger, "warning", "risk_validation_failed", error=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        log_event(logger, "exception", "risk_failed", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail={"stage": "risk", "message": "Risk simulation failed"},
+        )
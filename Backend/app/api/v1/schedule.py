@@ -3,24 +3,61 @@ Versioned scheduling API (v1).
 """
 from __future__ import annotations
 
+from typing import Optional
 import logging
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
 
-from app.api.schemas import ScheduleRequestV1, ScheduleResponseV1, ApiMetadata
+from app.api.encodings import (
+    BINARY_RESPONSES,
+    UnsupportedEncodingError,
+    encoded_response,
+    negotiate_encoding,
+)
+from app.api.schemas import ScheduleRequestV1, ScheduleResponseV1
+from app.api.responses import (
+    MAX_PRECISION,
+    FastJSONResponse,
+    ResponseFormat,
+    build_columnar_schedule_response,
+    build_schedule_response,
+)
+from app.ml.fleet import BusType
 from app.ml.scheduler import SchedulerConfig, generate_schedule
 from app.utils.logging import log_event
+from app.utils.timing import mark_stage
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/v1/schedule", tags=["Scheduling", "v1"])
 
 
-@router.post("", response_model=ScheduleResponseV1)
-async def schedule_v1(request: ScheduleRequestV1):
+@router.post(
+    "",
+    response_model=ScheduleResponseV1,
+    response_class=FastJSONResponse,
+    responses=BINARY_RESPONSES,
+)
+async def schedule_v1(
+    request: ScheduleRequestV1,
+    response_format: ResponseFormat = Query("records", alias="format"),
+    precision: Optional[int] = Query(None, ge=0, le=MAX_PRECISION),
+    accept: Optional[str] = Header(None),
+):
     """
     Generate a deterministic bus schedule from prediction output (v1).
     Returns schedule, metadata, and warnings.
+    Pass `fleet` instead of (or with) `capacity` for mixed-fleet assignment.
+    `format=columnar` returns one array per schedule field, without rationale.
+    `Accept` may select MessagePack or an Arrow IPC stream (always columnar).
     """
+    try:
+        encoding = negotiate_encoding(accept)
+    except UnsupportedEncodingError as e:
+        raise HTTPException(
+            status_code=406,
+            detail={"stage": "encoding", "message": str(e)},
+        )
+
     try:
         log_event(logger, "info", "schedule_v1_request_received")
         config = SchedulerConfig(
@@ -34,24 +71,27 @@ async def schedule_v1(request: ScheduleRequestV1):
             if hasattr(request.prediction_output, "model_dump")
             else request.prediction_output.dict()
         )
+        fleet = (
+            [BusType(name=bus.name, capacity=bus.capacity, cost=bus.cost) for bus in request.fleet]
+            if request.fleet
+            else None
+        )
+        mark_stage("scheduling")
         result = generate_schedule(
             prediction_payload=payload,
             capacity=request.capacity,
             config=config,
             trip_ids=request.trip_ids,
             timestamps=request.timestamps,
+            fleet=fleet,
         )
-        metadata = ApiMetadata(api_version="v1")
-        response = ScheduleResponseV1(
-            schedule=result.get("schedule", []),
-            summary=result.get("summary", {}),
-            parameters=result.get("parameters", {}),
-            rules=result.get("rules", []),
-            metadata=metadata,
-            warnings=[],
-        )
+        mark_stage("format")
+        if response_format == "columnar" or encoding == "arrow":
+            response = build_columnar_schedule_response(result, precision=precision)
+        else:
+            response = build_schedule_response(result)
         log_event(logger, "info", "schedule_v1_request_completed")
-        return response
+        return encoded_response(encoding, response, columns_key="schedule")
     except ValueError as e:
         log_event(logger, "warning", "schedule_validation_failed", error=str(e))
         raise HTTPException(status_code=400, detail=str(e))
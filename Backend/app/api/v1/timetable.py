@@ -0,0 +1,83 @@
+"""
+Versioned timetable API (v1): schedule expanded into departures.
+"""
+from __future__ import annotations
+
+from itertools import chain
+import logging
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.api.schemas import TimetableRequestV1
+from app.api.streaming import streaming_rows_response
+from app.ml.fleet import BusType
+from app.ml.scheduler import SchedulerConfig, generate_schedule
+from app.ml.timetable import TIMETABLE_COLUMNS, iter_departures
+from app.utils.logging import log_event
+from app.utils.timing import mark_stage
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/v1/timetable", tags=["Scheduling", "v1"])
+
+
+@router.post("")
+async def timetable_v1(
+    request: TimetableRequestV1,
+    output: str = Query("csv", enum=["csv", "ndjson"]),
+):
+    """
+    Generate a schedule and stream its individual departures (v1).
+    Rows are encoded as they are produced, so large timetables are never
+    held in memory.
+    """
+    try:
+        log_event(logger, "info", "timetable_v1_request_received", output=output)
+        config = SchedulerConfig(
+            base_headway_minutes=request.base_headway_minutes,
+            standing_ratio=request.standing_ratio,
+            low_load_threshold=request.low_load_threshold,
+            low_headway_multiplier=request.low_headway_multiplier,
+        )
+        payload = (
+            request.prediction_output.model_dump()
+            if hasattr(request.prediction_output, "model_dump")
+            else request.prediction_output.dict()
+        )
+        fleet = (
+            [BusType(name=bus.name, capacity=bus.capacity, cost=bus.cost) for bus in request.fleet]
+            if request.fleet
+            else None
+        )
+        mark_stage("scheduling")
+        result = generate_schedule(
+            prediction_payload=payload,
+            capacity=request.capacity,
+            config=config,
+            trip_ids=request.trip_ids,
+            timestamps=request.timestamps,
+            fleet=fleet,
+        )
+        rows = iter_departures(
+            result.get("schedule", []),
+            service_start=request.service_start,
+            service_day=request.service_day,
+        )
+        # Surface input errors as 400 before the response starts streaming
+        first = next(rows, None)
+    except ValueError as e:
+        log_event(logger, "warning", "timetable_validation_failed", error=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        log_event(logger, "exception", "timetable_failed", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail={"stage": "timetable", "message": "Timetable generation failed"},
+        )
+
+    rows = chain([first], rows) if first is not None else iter(())
+    return streaming_rows_response(
+        rows,
+        output=output,
+        filename="timetable",
+        columns=TIMETABLE_COLUMNS,
+    )
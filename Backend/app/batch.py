@@ -0,0 +1,430 @@
+"""
+Offline bulk forecasting.
+
+Runs aggregation, preprocessing, inference and (with --schedule) scheduling
+for a directory or glob of ticket CSVs on a process pool, loading the model
+once per worker, and writes one forecast (and schedule) file per input as
+Parquet or CSV. Completed inputs are recorded in the output directory's
+manifest, so an interrupted run resumes where it stopped when re-run with
+the same arguments.
+
+Usage (from Backend/):
+    python -m app.batch exports/ --output forecasts/ --schedule --workers 4
+    python -m app.batch "exports/**/*.csv.gz" --output forecasts/ --by-route --format csv
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from fastapi import HTTPException
+
+from app.api.compression import is_csv_filename
+from app.api.predict import parse_csv
+from app.api.forecasts import FORECAST_STORE_PATH, forecast_history, get_forecast_store
+from app.api.responses import schedule_to_columns
+from app.ml import loader
+from app.ml.input_cache import INPUT_CACHE_MAX_MB, configure_input_cache
+from app.ml.scheduler import SchedulerConfig
+from app.ml.stub_model import StubQuantileModel
+from app.utils.logging import configure_logging, log_event
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.jsonl"
+ROUTE_COLUMNS = ["from", "to"]
+FORMATS = ("parquet", "csv")
+
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+@dataclass(frozen=True)
+class BatchOptions:
+    """Per-input pipeline settings; part of the resume fingerprint."""
+    output_dir: str
+    output_format: str = "parquet"
+    by_route: bool = False
+    schedule: bool = False
+    capacity: int = 50
+    base_headway_minutes: int = 15
+    standing_ratio: float = 0.15
+    low_load_threshold: float = 0.50
+    low_headway_multiplier: float = 1.50
+    # Forecast only the most recent `last_n` hours of each route
+    last_n: Optional[int] = None
+    # Also upsert forecasts into the forecast store at this path
+    store: Optional[str] = None
+    # Model the outputs come from, so a model swap invalidates them (set by run)
+    stub_model: bool = False
+    model_version: Optional[str] = None
+
+    def fingerprint(self) -> Dict[str, Any]:
+        settings = asdict(self)
+        settings.pop("output_dir")
+        return settings
+
+    def schedule_config(self) -> Optional[SchedulerConfig]:
+        if not self.schedule:
+            return None
+        return SchedulerConfig(
+            base_headway_minutes=self.base_headway_minutes,
+            standing_ratio=self.standing_ratio,
+            low_load_threshold=self.low_load_threshold,
+            low_headway_multiplier=self.low_headway_multiplier,
+        )
+
+
+def discover_inputs(patterns: List[str]) -> List[Path]:
+    """CSV files (.csv, .csv.gz, .csv.zst) in the given directories or globs, sorted."""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = Path(pattern).iterdir()
+        else:
+            candidates = (Path(match) for match in glob.glob(pattern, recursive=True))
+        found.update(path.resolve() for path in candidates if path.is_file() and is_csv_filename(path.name))
+    return sorted(found)
+
+
+def _strip_csv_suffix(name: str) -> str:
+    for suffix in (".gz", ".zst", ".csv"):
+        if name.lower().endswith(suffix):
+            name = name[: -len(suffix)]
+    return name
+
+
+def output_stems(inputs: List[Path]) -> Dict[Path, str]:
+    """
+    Output name per input: its path relative to the inputs' common directory,
+    with "__" for separators and the .csv[.gz|.zst] suffix dropped. Raises
+    ValueError when two inputs (e.g. x.csv and x.csv.gz) map to the same name.
+    """
+    if not inputs:
+        return {}
+    root = Path(os.path.commonpath([path.parent for path in inputs]))
+    stems: Dict[Path, str] = {}
+    claimed: Dict[str, Path] = {}
+    for path in inputs:
+        relative = path.relative_to(root)
+        stem = _UNSAFE_NAME.sub("_", "__".join([*relative.parts[:-1], _strip_csv_suffix(relative.name)]))
+        other = claimed.setdefault(stem.lower(), path)
+        if other != path:
+            raise ValueError(f"{other} and {path} would both write {stem}.*; rename one or run them separately")
+        stems[path] = stem
+    return stems
+
+
+def output_paths(stem: str, options: BatchOptions) -> Dict[str, Path]:
+    directory = Path(options.output_dir)
+    paths = {"forecast": directory / f"{stem}.forecast.{options.output_format}"}
+    if options.schedule:
+        paths["schedule"] = directory / f"{stem}.schedule.{options.output_format}"
+    return paths
+
+
+def _input_state(path: Path) -> Dict[str, Any]:
+    stat = path.stat()
+    return {"input": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+def init_worker(
+    stub_model: bool,
+    log_level: str,
+    input_cache: Optional[str] = None,
+    input_cache_mb: float = INPUT_CACHE_MAX_MB,
+) -> None:
+    """Process-pool initializer: load the model and preprocessing assets once."""
+    configure_logging(log_level, background=False)
+    if input_cache:
+        configure_input_cache(input_cache, input_cache_mb)
+    # The scaler is fitted on a DataFrame but applied to arrays, once per route
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    if stub_model:
+        loader.set_model(StubQuantileModel())
+    loader.get_feature_config()
+    loader.get_scaler()
+    loader.get_model()
+
+
+def _route_frames(df: pd.DataFrame, default_route: str, by_route: bool) -> Iterator[Tuple[str, pd.DataFrame]]:
+    if not by_route or not set(ROUTE_COLUMNS).issubset(df.columns):
+        yield default_route, df
+        return
+    for (origin, destination), group in df.groupby(ROUTE_COLUMNS, sort=True, observed=True):
+        yield f"{origin}-{destination}", group.drop(columns=ROUTE_COLUMNS)
+
+
+def _write_frame(frame: pd.DataFrame, path: Path, output_format: str) -> None:
+    # Write next to the target and rename, so an interrupted run never leaves
+    # a truncated output that looks complete
+    tmp = path.with_name(f"{path.name}.tmp")
+    if output_format == "parquet":
+        frame.to_parquet(tmp, index=False, compression="zstd")
+    else:
+        frame.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, HTTPException):
+        detail = error.detail
+        if isinstance(detail, dict):
+            return str(detail.get("message") or detail.get("errors") or detail)
+        return str(detail)
+    return str(error)
+
+
+def process_file(path: str, stem: str, options: BatchOptions) -> Dict[str, Any]:
+    """
+    Run the pipeline for one input file and write its outputs as `stem`.*
+    (also the route name unless --by-route splits the file).
+
+    Returns a manifest entry. Routes that cannot be forecast (e.g. too little
+    history) are listed under `skipped`; the file fails only when it cannot be
+    parsed or no route produced a forecast.
+    """
+    started = time.perf_counter()
+    source = Path(path)
+    entry: Dict[str, Any] = {**_input_state(source), "options": options.fingerprint()}
+    try:
+        df = parse_csv(source.read_bytes())
+        forecasts, schedules, skipped = [], [], []
+        for route, frame in _route_frames(df, stem, options.by_route):
+            try:
+                forecast = forecast_history(
+                    route,
+                    frame,
+                    options.schedule_config(),
+                    options.capacity,
+                    last_n=options.last_n,
+                )
+            except (HTTPException, ValueError) as e:
+                skipped.append({"route": route, "error": _error_message(e)})
+                continue
+            if options.store:
+                get_forecast_store(options.store).upsert(forecast, loader.get_model_version())
+            forecasts.append(forecast.forecast_frame())
+            if forecast.schedule is not None:
+                schedule = pd.DataFrame(schedule_to_columns(forecast.schedule))
+                schedule.insert(0, "route", route)
+                schedules.append(schedule)
+        if not forecasts:
+            raise ValueError(skipped[0]["error"] if len(skipped) == 1 else "no route could be forecast")
+
+        paths = output_paths(stem, options)
+        _write_frame(pd.concat(forecasts, ignore_index=True), paths["forecast"], options.output_format)
+        if options.schedule:
+            _write_frame(pd.concat(schedules, ignore_index=True), paths["schedule"], options.output_format)
+
+        entry.update(
+            status="ok",
+            routes=len(forecasts),
+            forecasts=sum(len(forecast) for forecast in forecasts),
+            skipped=skipped,
+            outputs={kind: str(output) for kind, output in paths.items()},
+        )
+    except Exception as e:
+        log_event(logger, "warning", "batch_file_failed", input=str(source), error=_error_message(e))
+        entry.update(status="failed", error=_error_message(e))
+    entry["seconds"] = round(time.perf_counter() - started, 3)
+    return entry
+
+
+# ---------------------------------------------------------------------------
+# Driver side
+# ---------------------------------------------------------------------------
+
+def load_manifest(output_dir: Path) -> Dict[str, Dict[str, Any]]:
+    """Latest manifest entry per input path."""
+    entries: Dict[str, Dict[str, Any]] = {}
+    manifest = output_dir / MANIFEST_FILE
+    if not manifest.exists():
+        return entries
+    with open(manifest, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted run
+            entries[entry["input"]] = entry
+    return entries
+
+
+def is_complete(path: Path, stem: str, entry: Optional[Dict[str, Any]], options: BatchOptions) -> bool:
+    """True when `entry` records a successful run of this exact input, with these options, to `stem`.*"""
+    if entry is None or entry.get("status") != "ok" or entry.get("options") != options.fingerprint():
+        return False
+    state = _input_state(path)
+    if entry.get("size") != state["size"] or entry.get("mtime_ns") != state["mtime_ns"]:
+        return False
+    outputs = {kind: str(output) for kind, output in output_paths(stem, options).items()}
+    return entry.get("outputs") == outputs and all(Path(output).exists() for output in outputs.values())
+
+
+def _progress(done: int, total: int, started: float, entry: Dict[str, Any]) -> str:
+    elapsed = time.perf_counter() - started
+    remaining = elapsed / done * (total - done)
+    name = Path(entry["input"]).name
+    if entry["status"] == "ok":
+        outcome = f"{entry['routes']} route(s), {entry['forecasts']:,} forecasts"
+        if entry["skipped"]:
+            outcome += f", {len(entry['skipped'])} skipped"
+    else:
+        outcome = f"FAILED: {entry['error']}"
+    return f"[{done}/{total}] {name}: {outcome} in {entry['seconds']:.1f}s (elapsed {elapsed:.0f}s, ~{remaining:.0f}s left)"
+
+
+def run(
+    inputs: List[Path],
+    options: BatchOptions,
+    workers: int,
+    stub_model: bool = False,
+    force: bool = False,
+    log_level: str = "WARNING",
+    input_cache: Optional[str] = None,
+    input_cache_mb: float = INPUT_CACHE_MAX_MB,
+) -> Dict[str, int]:
+    """
+    Process `inputs`, skipping those already completed; returns outcome counts.
+    Raises ValueError when two inputs would write the same output files.
+    """
+    stems = output_stems(inputs)
+    model_version = StubQuantileModel.__name__ if stub_model else loader.get_model_asset_version()
+    options = replace(options, stub_model=stub_model, model_version=model_version)
+    output_dir = Path(options.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {} if force else load_manifest(output_dir)
+    pending = [path for path in inputs if not is_complete(path, stems[path], manifest.get(str(path)), options)]
+    counts = {"total": len(inputs), "skipped": len(inputs) - len(pending), "ok": 0, "failed": 0}
+    if counts["skipped"]:
+        print(f"resuming: {counts['skipped']} of {len(inputs)} input(s) already done", file=sys.stderr)
+    if not pending:
+        return counts
+
+    started = time.perf_counter()
+    with open(output_dir / MANIFEST_FILE, "a", encoding="utf-8") as manifest_file:
+        def record(done: int, entry: Dict[str, Any]) -> None:
+            # Recorded only after the outputs are in place, so a crash at any
+            # point at worst repeats the files that were in flight
+            manifest_file.write(json.dumps(entry) + "\n")
+            manifest_file.flush()
+            counts[entry["status"]] += 1
+            print(_progress(done, len(pending), started, entry), file=sys.stderr)
+
+        if workers <= 1:
+            init_worker(stub_model, log_level, input_cache, input_cache_mb)
+            for done, path in enumerate(pending, start=1):
+                record(done, process_file(str(path), stems[path], options))
+            return counts
+
+        # spawn: workers must not inherit a half-initialized TensorFlow runtime
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(stub_model, log_level, input_cache, input_cache_mb),
+        )
+        try:
+            futures = [executor.submit(process_file, str(path), stems[path], options) for path in pending]
+            for done, future in enumerate(as_completed(futures), start=1):
+                record(done, future.result())
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("inputs", nargs="+", help="directories or glob patterns of ticket CSVs")
+    parser.add_argument("--output", required=True, help="output directory (holds the resume manifest)")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--by-route", action="store_true", help="forecast each from/to route in a file separately")
+    parser.add_argument("--schedule", action="store_true", help="also write the optimized schedule")
+    parser.add_argument("--last-n", type=int, help="forecast only each route's most recent N hours")
+    parser.add_argument("--capacity", type=int, default=50)
+    parser.add_argument("--base-headway-minutes", type=int, default=15)
+    parser.add_argument("--standing-ratio", type=float, default=0.15)
+    parser.add_argument("--low-load-threshold", type=float, default=0.50)
+    parser.add_argument("--low-headway-multiplier", type=float, default=1.50)
+    parser.add_argument(
+        "--store",
+        nargs="?",
+        const=FORECAST_STORE_PATH,
+        help=f"also write forecasts to the forecast store (default path: {FORECAST_STORE_PATH})",
+    )
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and redo every input")
+    parser.add_argument("--stub-model", action="store_true", help="use the stub model instead of the .keras asset")
+    parser.add_argument("--log-level", default="WARNING", help="app log level inside workers")
+    parser.add_argument("--input-cache", help="prepared-input cache directory shared by workers (default: INPUT_CACHE_*)")
+    parser.add_argument("--input-cache-mb", type=float, default=INPUT_CACHE_MAX_MB)
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            sys.exit("Parquet output requires pyarrow (pip install pyarrow) or use --format csv")
+
+    inputs = discover_inputs(args.inputs)
+    if not inputs:
+        sys.exit(f"no CSV files match {' '.join(args.inputs)}")
+
+    options = BatchOptions(
+        output_dir=args.output,
+        output_format=args.format,
+        by_route=args.by_route,
+        schedule=args.schedule,
+        capacity=args.capacity,
+        base_headway_minutes=args.base_headway_minutes,
+        standing_ratio=args.standing_ratio,
+        low_load_threshold=args.low_load_threshold,
+        low_headway_multiplier=args.low_headway_multiplier,
+        last_n=args.last_n,
+        store=args.store,
+    )
+    started = time.perf_counter()
+    try:
+        counts = run(
+            inputs,
+            options,
+            args.workers,
+            stub_model=args.stub_model,
+            force=args.force,
+            log_level=args.log_level,
+            input_cache=args.input_cache,
+            input_cache_mb=args.input_cache_mb,
+        )
+    except (ValueError, OSError) as e:
+        # Colliding output names, or a missing model asset
+        sys.exit(str(e))
+    except KeyboardInterrupt:
+        sys.exit("interrupted; re-run the same command to resume")
+    print(
+        f"{counts['ok']} done, {counts['failed']} failed, {counts['skipped']} already done "
+        f"of {counts['total']} input(s) in {time.perf_counter() - started:.1f}s -> {args.output}"
+    )
+    sys.exit(1 if counts["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,6 @@ FastAPI application for real-time bus demand forecasting
 """
 import os
 import logging
-import json
 
 # CPU-optimized defaults (can be overridden by environment variables)
 os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
@@ -16,32 +15,25 @@ os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
 from app.api.predict import router as predict_router
 from app.api.schedule import router as schedule_router
 from app.api.v1.predict import router as predict_v1_router
 from app.api.v1.schedule import router as schedule_v1_router
 from app.api.v1.predict_schedule import router as predict_schedule_v1_router
+from app.api.v1.risk import router as risk_v1_router
+from app.api.v1.timetable import router as timetable_v1_router
+from app.api.v1.jobs import router as jobs_v1_router
+from app.api.v1.forecasts import router as forecasts_v1_router
+from app.api.admission import AdmissionMiddleware
+from app.api.compression import CompressionMiddleware
+from app.api.jobs import get_job_manager, shutdown_job_manager
+from app.utils.logging import configure_logging, stop_logging
+from app.utils.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from app.utils.timing import TimingMiddleware
 
-# Configure logging
-class JsonLogFormatter(logging.Formatter):
-    def format(self, record: logging.LogRecord) -> str:
-        payload = {
-            "timestamp": self.formatTime(record, self.datefmt),
-            "level": record.levelname,
-            "logger": record.name,
-            "message": record.getMessage(),
-        }
-        if record.exc_info:
-            payload["exception"] = self.formatException(record.exc_info)
-        return json.dumps(payload, ensure_ascii=False)
-
-
-handler = logging.StreamHandler()
-handler.setFormatter(JsonLogFormatter())
-
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
-root_logger.handlers = [handler]
+# Configure logging (JSON lines, written from a background thread)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
@@ -53,6 +45,9 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Bounded concurrency for inference routes (503 + Retry-After when saturated)
+app.add_middleware(AdmissionMiddleware)
+
 # CORS middleware for web/mobile frontend
 app.add_middleware(
     CORSMiddleware,
@@ -62,13 +57,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/zstd for large JSON/CSV/NDJSON responses (Accept-Encoding)
+app.add_middleware(CompressionMiddleware)
+
+# Per-stage timing (Server-Timing header, /metrics)
+app.add_middleware(TimingMiddleware)
+
+# Opt-in request profiling (X-Profile: 1 or ?profile=1)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Register routers
 app.include_router(health_router)
+app.include_router(metrics_router)
 app.include_router(predict_router)
 app.include_router(schedule_router)
 app.include_router(predict_v1_router)
 app.include_router(schedule_v1_router)
 app.include_router(predict_schedule_v1_router)
+app.include_router(risk_v1_router)
+app.include_router(timetable_v1_router)
+app.include_router(jobs_v1_router)
+app.include_router(forecasts_v1_router)
 
 @app.on_event("startup")
 async def startup_event():
@@ -86,10 +96,17 @@ async def startup_event():
         logger.info("✓ ML assets preloaded")
     except Exception as e:
         logger.exception("ML asset preload failed", exc_info=e)
+    try:
+        # Recovers interrupted jobs, prunes expired ones and starts the pruner
+        get_job_manager()
+    except Exception as e:
+        logger.exception("Job manager startup failed", exc_info=e)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
+    shutdown_job_manager()
     logger.info("=" * 60)
     logger.info("🛑 Bus Demand Prediction API Shutting Down...")
     logger.info("=" * 60)
+    stop_logging()
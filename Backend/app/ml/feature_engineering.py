@@ -19,7 +19,8 @@ def validate_dataframe(df, required_columns):
     if missing_cols:
         raise ValueError(f"Missing required columns: {missing_cols}")
     
-    logger.info(f"✓ DataFrame validated: {len(df)} rows, columns: {list(df.columns)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("✓ DataFrame validated: %s rows, columns: %s", len(df), list(df.columns))
 
 
 def clean_timestamps(df, timestamp_col="timestamp"):
@@ -30,24 +31,29 @@ def clean_timestamps(df, timestamp_col="timestamp"):
         # Remove invalid timestamps
         invalid_count = df[timestamp_col].isna().sum()
         if invalid_count > 0:
-            logger.warning(f"⚠ Removed {invalid_count} invalid timestamps")
+            logger.warning("⚠ Removed %s invalid timestamps", invalid_count)
             df = df.dropna(subset=[timestamp_col])
         
         if df.empty:
             raise ValueError("No valid timestamps found in data")
         
-        logger.info(f"✓ Timestamps cleaned: {df[timestamp_col].min()} to {df[timestamp_col].max()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "✓ Timestamps cleaned: %s to %s",
+                df[timestamp_col].min(),
+                df[timestamp_col].max(),
+            )
         return df
     
     except Exception as e:
-        logger.error(f"✗ Timestamp parsing failed: {e}")
+        logger.error("✗ Timestamp parsing failed: %s", e)
         raise ValueError(f"Invalid timestamp format: {e}")
 
 
 def sort_by_time(df, timestamp_col="timestamp"):
     """Sort DataFrame by timestamp"""
     df = df.sort_values(timestamp_col).reset_index(drop=True)
-    logger.info("✓ Data sorted by timestamp")
+    logger.debug("✓ Data sorted by timestamp")
     return df
 
 
@@ -58,7 +64,7 @@ def remove_duplicates(df, timestamp_col="timestamp"):
     removed = initial_count - len(df)
     
     if removed > 0:
-        logger.warning(f"⚠ Removed {removed} duplicate timestamps")
+        logger.warning("⚠ Removed %s duplicate timestamps", removed)
     
     return df
 
@@ -92,16 +98,16 @@ def fill_missing_hours(df, timestamp_col="timestamp", demand_col="demand"):
         df_complete[demand_col] = df_complete[demand_col].interpolate(method='linear', limit_direction='both')
         
         # Fill any remaining NaNs with forward/backward fill
-        df_complete[demand_col] = df_complete[demand_col].fillna(method='ffill').fillna(method='bfill')
+        df_complete[demand_col] = df_complete[demand_col].ffill().bfill()
         
         # If still NaN, fill with median
         if df_complete[demand_col].isna().any():
             median_val = df_complete[demand_col].median()
             df_complete[demand_col] = df_complete[demand_col].fillna(median_val)
         
-        logger.info(f"✓ Filled {missing_count} missing hours with interpolation")
+        logger.debug("✓ Filled %s missing hours with interpolation", missing_count)
     
-    logger.info(f"✓ Complete hourly series: {len(df_complete)} rows")
+    logger.debug("✓ Complete hourly series: %s rows", len(df_complete))
     return df_complete
 
 
@@ -114,7 +120,7 @@ def create_time_features(df, timestamp_col="timestamp"):
     df['month'] = df[timestamp_col].dt.month
     df['is_weekend'] = (df['dayofweek'] >= 5).astype(int)
     
-    logger.info("✓ Time features created: hour, minute, dayofweek, day, month, is_weekend")
+    logger.debug("✓ Time features created: hour, minute, dayofweek, day, month, is_weekend")
     return df
 
 
@@ -123,7 +129,7 @@ def create_lag_features(df, target_col="demand", lags=[1, 2, 3, 7, 14, 21, 30]):
     for lag in lags:
         df[f'lag_{lag}'] = df[target_col].shift(lag)
     
-    logger.info(f"✓ Lag features created: {lags}")
+    logger.debug("✓ Lag features created: %s", lags)
     return df
 
 
@@ -133,7 +139,7 @@ def create_rolling_features(df, target_col="demand", windows=[3, 7, 14, 21, 30])
         df[f'rolling_mean_{window}'] = df[target_col].rolling(window=window, min_periods=1).mean()
         df[f'rolling_std_{window}'] = df[target_col].rolling(window=window, min_periods=1).std()
     
-    logger.info(f"✓ Rolling features created: windows={windows}")
+    logger.debug("✓ Rolling features created: windows=%s", windows)
     return df
 
 
@@ -154,7 +160,7 @@ def create_domain_features(df, timestamp_col="timestamp", target_col="demand"):
     df['days_since_last_pilgrimage'] = (df[timestamp_col].dt.dayofyear % 365)
     df['days_until_next_pilgrimage'] = 365 - (df[timestamp_col].dt.dayofyear % 365)
     
-    logger.info("✓ Domain features created: capacity, peak season, pilgrimage indicators")
+    logger.debug("✓ Domain features created: capacity, peak season, pilgrimage indicators")
     return df
 
 
@@ -166,10 +172,10 @@ def handle_missing_values(df, strategy='drop'):
         df = df.dropna()
         removed = initial_count - len(df)
         if removed > 0:
-            logger.info(f"✓ Removed {removed} rows with NaN values")
+            logger.debug("✓ Removed %s rows with NaN values", removed)
     elif strategy == 'fill':
-        df = df.fillna(method='ffill').fillna(method='bfill').fillna(0)
-        logger.info("✓ Filled NaN values")
+        df = df.ffill().bfill().fillna(0)
+        logger.debug("✓ Filled NaN values")
     
     return df
 
@@ -185,9 +191,9 @@ def build_features(df, config=None):
     Returns:
         DataFrame with all engineered features
     """
-    logger.info("=" * 60)
-    logger.info("Starting feature engineering pipeline")
-    logger.info("=" * 60)
+    logger.debug("=" * 60)
+    logger.debug("Starting feature engineering pipeline")
+    logger.debug("=" * 60)
     
     if config is None:
         from app.ml.loader import feature_config
@@ -225,8 +231,9 @@ def build_features(df, config=None):
     if df.empty:
         raise ValueError("No data remaining after feature engineering")
     
-    logger.info(f"✓ Feature engineering complete: {len(df)} rows, {len(df.columns)} columns")
-    logger.info(f"  Columns: {list(df.columns)}")
-    logger.info("=" * 60)
+    logger.debug("✓ Feature engineering complete: %s rows, %s columns", len(df), len(df.columns))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("  Columns: %s", list(df.columns))
+    logger.debug("=" * 60)
     
     return df
@@ -0,0 +1,189 @@
+"""
+Mixed-fleet assignment module
+Precomputed dynamic-programming tables for cheapest bus-type combinations.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+import logging
+import threading
+
+import numpy as np
+
+from app.utils.logging import log_event
+
+logger = logging.getLogger(__name__)
+
+MIN_TABLE_SIZE = 256
+MAX_TABLE_SIZE = 1 << 17
+MAX_CACHED_FLEETS = 32
+
+
+@dataclass(frozen=True)
+class BusType:
+    """A bus type available at the depot."""
+    name: str
+    capacity: int
+    cost: float = 1.0
+
+
+@dataclass(frozen=True)
+class FleetTable:
+    """
+    Cheapest covering combination for every seated-capacity requirement.
+
+    Row `c` of `counts` holds the number of buses of each type (in `fleet`
+    order) whose combined seated capacity is at least `c` at minimum cost;
+    `costs[c]` is that cost, `buses[c]` the bus count and `seats[c]` the
+    combined seated capacity. Row 0 is the cheapest single bus, since a trip
+    is never cancelled.
+    """
+    fleet: Tuple[BusType, ...]
+    costs: np.ndarray
+    counts: np.ndarray
+    buses: np.ndarray
+    seats: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.costs) - 1
+
+
+
+def required_units(demands: Sequence[float], standing_ratio: float) -> np.ndarray:
+    """Seated capacity needed so each demand fits within standing limits."""
+    # Bus capacities are integral, so work in seats: seats * (1 + r) >= demand
+    seated = np.asarray(demands, dtype=np.float64) / (1.0 + standing_ratio)
+    return np.ceil(np.clip(seated, 0.0, None) - 1e-9).astype(np.int64)
+
+
+def _validate_fleet(fleet: Sequence[BusType]) -> Tuple[BusType, ...]:
+    fleet = tuple(fleet)
+    if not fleet:
+        raise ValueError("fleet must contain at least one bus type")
+    names = [bus.name for bus in fleet]
+    if len(set(names)) != len(names):
+        raise ValueError("fleet bus type names must be unique")
+    for bus in fleet:
+        if int(bus.capacity) != bus.capacity or bus.capacity <= 0:
+            raise ValueError(f"Bus type '{bus.name}' capacity must be a positive integer")
+        if bus.cost < 0:
+            raise ValueError(f"Bus type '{bus.name}' cost must be >= 0")
+    return fleet
+
+
+def _build_table(fleet: Tuple[BusType, ...], size: int) -> FleetTable:
+    """Unbounded min-cost covering DP over seated capacity 0..size."""
+    capacities = [int(bus.capacity) for bus in fleet]
+    costs = [float(bus.cost) for bus in fleet]
+    num_types = len(fleet)
+
+    best_cost = [0.0] * (size + 1)
+    best_buses = [0] * (size + 1)
+    choice = [-1] * (size + 1)
+    previous = [0] * (size + 1)
+
+    # Cheapest single bus (ties: larger capacity) serves zero demand
+    single = min(range(num_types), key=lambda i: (costs[i], -capacities[i]))
+    best_cost[0] = costs[single]
+    best_buses[0] = 1
+    choice[0] = single
+
+    for units in range(1, size + 1):
+        best = None
+        for i in range(num_types):
+            remaining = units - capacities[i]
+            if remaining <= 0:
+                candidate = (costs[i], 1, -capacities[i])
+                prev = -1
+            else:
+                candidate = (
+                    costs[i] + best_cost[remaining],
+                    1 + best_buses[remaining],
+                    -capacities[i],
+                )
+                prev = remaining
+            if best is None or candidate < best[0]:
+                best = (candidate, i, prev)
+        (cost, buses, _), i, prev = best
+        best_cost[units] = cost
+        best_buses[units] = buses
+        choice[units] = i
+        previous[units] = prev
+
+    counts = np.zeros((size + 1, num_types), dtype=np.int32)
+    counts[0, single] = 1
+    for units in range(1, size + 1):
+        prev = previous[units]
+        if prev > 0:
+            counts[units] = counts[prev]
+        counts[units, choice[units]] += 1
+
+    return FleetTable(
+        fleet=fleet,
+        costs=np.asarray(best_cost, dtype=np.float64),
+        counts=counts,
+        buses=counts.sum(axis=1),
+        seats=counts @ np.asarray(capacities, dtype=np.int64),
+    )
+
+
+_table_cache: "OrderedDict[Tuple[BusType, ...], FleetTable]" = OrderedDict()
+_table_lock = threading.Lock()
+
+
+def get_fleet_table(fleet: Sequence[BusType], max_units: int) -> FleetTable:
+    """
+    Return a cached table covering at least `max_units` seated capacity.
+
+    Tables are keyed by fleet definition and reused across hours and
+    requests; a table is only rebuilt (at double size) when a larger
+    requirement shows up.
+    """
+    key = _validate_fleet(fleet)
+    if max_units > MAX_TABLE_SIZE:
+        raise ValueError(
+            f"Demand requires {max_units} seats, above the fleet table limit of {MAX_TABLE_SIZE}"
+        )
+    with _table_lock:
+        table = _table_cache.get(key)
+        if table is not None and table.size >= max_units:
+            _table_cache.move_to_end(key)
+            return table
+
+        size = max(MIN_TABLE_SIZE, table.size if table is not None else 0)
+        while size < max_units:
+            size *= 2
+        table = _build_table(key, size)
+        _table_cache[key] = table
+        _table_cache.move_to_end(key)
+        while len(_table_cache) > MAX_CACHED_FLEETS:
+            _table_cache.popitem(last=False)
+
+    log_event(
+        logger,
+        "info",
+        "fleet_table_built",
+        bus_types=len(key),
+        size=size,
+    )
+    return table
+
+
+def describe_mix(fleet: Sequence[BusType], counts: Sequence[int]) -> Dict[str, int]:
+    """Map bus type name -> count, omitting unused types."""
+    return {
+        bus.name: int(count)
+        for bus, count in zip(fleet, counts)
+        if count
+    }
+
+
+def fleet_parameters(fleet: Sequence[BusType]) -> List[Dict[str, object]]:
+    return [
+        {"name": bus.name, "capacity": int(bus.capacity), "cost": float(bus.cost)}
+        for bus in fleet
+    ]
+
@@ -0,0 +1,185 @@
+"""
+Disk-backed cache of prepared model inputs.
+Stores `preprocess_input` outputs as .npy files addressed by a hash of the
+input data, feature config and scaler, and serves hits through mmap.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.utils.logging import log_event
+from app.utils.timing import METRIC_PREFIX, registry
+
+logger = logging.getLogger(__name__)
+
+INPUT_CACHE_ENABLED = os.getenv("INPUT_CACHE_ENABLED", "0").lower() in ("1", "true", "yes")
+INPUT_CACHE_DIR = os.getenv("INPUT_CACHE_DIR", "cache/inputs")
+INPUT_CACHE_MAX_MB = float(os.getenv("INPUT_CACHE_MAX_MB", "1024"))
+
+# Bump when preprocessing changes in a way the key does not capture
+CACHE_FORMAT_VERSION = 2
+# Eviction trims the cache to this fraction of its limit
+LOW_WATER_FRACTION = 0.9
+
+LOOKUPS_TOTAL = f"{METRIC_PREFIX}_input_cache_lookups_total"
+EVICTIONS_TOTAL = f"{METRIC_PREFIX}_input_cache_evictions_total"
+
+registry.describe(LOOKUPS_TOTAL, "counter", "Prepared-input cache lookups, by result")
+registry.describe(EVICTIONS_TOTAL, "counter", "Prepared-input cache entries evicted")
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame: column names, dtypes and values (not the index)."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(name), str(dtype)] for name, dtype in df.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def config_digest(config: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class InputCache:
+    """
+    Content-addressed store of model input dicts.
+
+    Each entry is a directory `<key[:2]>/<key>/` with one `<input name>.npy`
+    per array, written to a temporary directory and renamed into place, so
+    readers never see partial entries and several processes can share the
+    cache. Hits are memory-mapped read-only and refresh the entry's mtime;
+    when the cache grows past `max_bytes`, least recently used entries are
+    removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max(0, int(max_bytes))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def key(self, df: pd.DataFrame, config: Dict[str, Any], scaler_version: str, **params: Any) -> str:
+        """Cache key for `df` preprocessed with `config`, the scaler and `params`."""
+        parts = {
+            "format": CACHE_FORMAT_VERSION,
+            "data": frame_digest(df),
+            "config": config_digest(config),
+            "scaler": scaler_version,
+            "params": params,
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        entry = self._entry_dir(key)
+        try:
+            arrays = {path.stem: np.load(path, mmap_mode="r") for path in entry.glob("*.npy")}
+            if arrays:
+                os.utime(entry)
+        except (OSError, ValueError) as e:
+            # Evicted by another process mid-read, or a damaged file
+            log_event(logger, "warning", "input_cache_read_failed", key=key, error=str(e))
+            arrays = {}
+        registry.inc(LOOKUPS_TOTAL, {"result": "hit" if arrays else "miss"})
+        return arrays or None
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray]) -> None:
+        entry = self._entry_dir(key)
+        if entry.exists() or sum(array.nbytes for array in arrays.values()) > self.max_bytes:
+            return
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{key[:8]}-", dir=entry.parent))
+        try:
+            for name, array in arrays.items():
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(array), allow_pickle=False)
+            size = _dir_size(tmp)
+            os.rename(tmp, entry)
+        except OSError:
+            # Another process stored the same key first, or the disk is full
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+        self._maybe_evict()
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+        for entry in self.directory.glob("??/*"):
+            if entry.name.startswith("."):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, _dir_size(entry), entry))
+            except OSError:
+                continue
+        return entries
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _maybe_evict(self) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = self.size_bytes()
+            if self._size <= self.max_bytes:
+                return
+            # Other processes write to the same directory: rescan before evicting
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * LOW_WATER_FRACTION
+            evicted = 0
+            for _, size, entry in entries:
+                if total <= target:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+                evicted += 1
+            self._size = total
+        if evicted:
+            registry.inc(EVICTIONS_TOTAL, {}, evicted)
+            log_event(logger, "info", "input_cache_evicted", entries=evicted, size_bytes=total)
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, entry in self._entries():
+                shutil.rmtree(entry, ignore_errors=True)
+            self._size = 0
+
+
+def _dir_size(path: Path) -> int:
+    return sum(child.stat().st_size for child in path.iterdir())
+
+
+_cache: Optional[InputCache] = None
+_configured = False
+_cache_lock = threading.Lock()
+
+
+def configure_input_cache(directory: Optional[str], max_mb: float = INPUT_CACHE_MAX_MB) -> Optional[InputCache]:
+    """Use a cache in `directory` (None disables it), overriding the environment."""
+    global _cache, _configured
+    with _cache_lock:
+        _cache = InputCache(directory, int(max_mb * 1024 * 1024)) if directory else None
+        _configured = True
+    return _cache
+
+
+def get_input_cache() -> Optional[InputCache]:
+    """The process-wide cache, or None when disabled (INPUT_CACHE_ENABLED)."""
+    if not _configured:
+        configure_input_cache(INPUT_CACHE_DIR if INPUT_CACHE_ENABLED else None)
+    return _cache
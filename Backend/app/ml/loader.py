@@ -4,6 +4,7 @@ Handles loading of TensorFlow model, scalers, and configuration
 """
 import os
 import json
+import hashlib
 import pickle
 import logging
 import threading
@@ -11,8 +12,6 @@ import tempfile
 import zipfile
 from pathlib import Path
 
-import keras
-
 logger = logging.getLogger(__name__)
 
 # Paths
@@ -23,11 +22,17 @@ SCALER_PATH = ASSETS_DIR / "minmax_scaler.pkl"
 LABEL_ENCODER_PATH = ASSETS_DIR / "label_encoders.pkl"
 CONFIG_PATH = ASSETS_DIR / "feature_config.json"
 
+# Model output heads, in output order
+QUANTILE_NAMES = ["mean", "p10", "p50", "p90", "p99"]
+
 # Global variables for lazy loading
 _model = None
 _scaler = None
 _label_encoders = None
 _feature_config = None
+_scaler_version = None
+_model_version = None
+_head_models = {}
 _load_lock = threading.Lock()
 
 
@@ -83,11 +88,13 @@ def load_label_encoders():
 
 def load_model():
     """Load TensorFlow/Keras model"""
-    global _model
+    global _model, _model_version
     if _model is None:
         with _load_lock:
             if _model is None:
                 try:
+                    import keras
+
                     def _select_last_timestep(z):
                         return z[:, -1, :]
 
@@ -124,6 +131,8 @@ def load_model():
                         if temp_path and os.path.exists(temp_path):
                             os.unlink(temp_path)
 
+                    _model_version = get_model_asset_version()
+
                     logger.info(f"✓ Loaded model: {MODEL_PATH}")
                     logger.info(f"  - Input shape: {_model.input_shape}")
                     logger.info(f"  - Output shape: {_model.output_shape}")
@@ -138,11 +147,78 @@ def get_model():
     return load_model()
 
 
+def set_model(model, version=None):
+    """Use `model` instead of the .keras asset (stub models for benchmarks/tests); None resets."""
+    global _model, _model_version
+    with _load_lock:
+        _model = model
+        _model_version = None if model is None else (version or type(model).__name__)
+        _head_models.clear()
+
+
+def get_head_model(quantiles=None):
+    """
+    Model evaluating only the `quantiles` output heads, in QUANTILE_NAMES order.
+
+    Sub-models share the loaded model's layers and weights, so the LSTM trunk
+    runs once and unused dense heads are skipped. They are built once per head
+    selection; None (or every head) returns the full model.
+    """
+    model = load_model()
+    if quantiles is None:
+        return model
+    unknown = sorted(set(quantiles) - set(QUANTILE_NAMES))
+    if unknown or not quantiles:
+        raise ValueError(f"Unknown quantiles {unknown}; choose from {QUANTILE_NAMES}")
+    indices = tuple(i for i, name in enumerate(QUANTILE_NAMES) if name in quantiles)
+    if len(indices) == len(QUANTILE_NAMES):
+        return model
+
+    head_model = _head_models.get(indices)
+    if head_model is None:
+        with _load_lock:
+            head_model = _head_models.get(indices)
+            if head_model is None:
+                if hasattr(model, "select_outputs"):
+                    head_model = model.select_outputs(indices)
+                else:
+                    import keras
+
+                    head_model = keras.Model(
+                        inputs=model.inputs,
+                        outputs=[model.outputs[i] for i in indices],
+                    )
+                _head_models[indices] = head_model
+                logger.info(f"✓ Built sub-model for heads: {[QUANTILE_NAMES[i] for i in indices]}")
+    return head_model
+
+
+def get_model_asset_version():
+    """Short content hash of the .keras asset, without loading it"""
+    with open(MODEL_PATH, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def get_model_version():
+    """Identifier of the loaded model: content hash of the .keras asset, or the set_model version"""
+    load_model()
+    return _model_version
+
+
 def get_scaler():
     """Get loaded scaler (lazy loading)"""
     return load_scaler()
 
 
+def get_scaler_version():
+    """Short content hash of the scaler asset (identifies cached preprocessing output)"""
+    global _scaler_version
+    if _scaler_version is None:
+        with open(SCALER_PATH, 'rb') as f:
+            _scaler_version = hashlib.sha256(f.read()).hexdigest()[:16]
+    return _scaler_version
+
+
 def get_label_encoders():
     """Get loaded label encoders (lazy loading)"""
     return load_label_encoders()
@@ -157,5 +233,10 @@ logger.info("=" * 60)
 logger.info("ML Assets ready (lazy loading enabled)")
 logger.info("=" * 60)
 
-# Backwards-compatible alias for test scripts
-model = get_model()
+
+def __getattr__(name):
+    # Backwards-compatible `loader.model` alias for test scripts, resolved on
+    # first access so importing this module never loads keras or the model
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
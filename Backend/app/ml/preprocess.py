@@ -2,15 +2,20 @@
 Preprocessing Module
 Handles data validation, feature scaling, and sequence generation for LSTM model
 """
-print("STEP 2: PREPROCESS START", flush=True)
 import numpy as np
 import logging
 from app.ml.validators import validate_raw_input
 from app.ml.feature_engineering import build_features
-from app.ml.loader import get_scaler, get_feature_config
+from app.ml.input_cache import get_input_cache
+from app.ml.loader import get_scaler, get_feature_config, get_scaler_version
+from app.utils.timing import stage_timer
 
 logger = logging.getLogger(__name__)
 
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Cache-only entry holding the window-end timestamps next to the model inputs
+WINDOW_END_KEY = "window_end"
+
 
 def validate_input_shape(df, config):
     """Validate that DataFrame has enough rows for sequence generation"""
@@ -22,7 +27,7 @@ def validate_input_shape(df, config):
             f"but {min_rows} rows required (sequence_length={config['sequence_length']} + lag/rolling windows)"
         )
     
-    logger.info(f"✓ Input validation passed: {len(df)} rows (minimum: {min_rows})")
+    logger.debug("✓ Input validation passed: %s rows (minimum: %s)", len(df), min_rows)
 
 
 def validate_features(df, expected_features):
@@ -32,17 +37,17 @@ def validate_features(df, expected_features):
     if missing_features:
         raise ValueError(f"Missing required features: {missing_features}")
     
-    logger.info(f"✓ All {len(expected_features)} required features present")
+    logger.debug("✓ All %s required features present", len(expected_features))
 
 
 def scale_features(X, scaler):
     """Apply MinMaxScaler to features"""
     try:
         X_scaled = scaler.transform(X)
-        logger.info(f"✓ Features scaled: shape={X_scaled.shape}")
+        logger.debug("✓ Features scaled: shape=%s", X_scaled.shape)
         return X_scaled
     except Exception as e:
-        logger.error(f"✗ Scaling failed: {e}")
+        logger.error("✗ Scaling failed: %s", e)
         raise ValueError(f"Feature scaling failed: {e}")
 
 
@@ -65,24 +70,40 @@ def create_sequences(X_scaled, sequence_length):
         sequences.append(seq)
     
     sequences = np.array(sequences)
-    logger.info(f"✓ Created {len(sequences)} sequences: shape={sequences.shape}")
+    logger.debug("✓ Created %s sequences: shape=%s", len(sequences), sequences.shape)
     
     return sequences
 
 
-def preprocess_input(df):
+def tail_rows(total_rows, sequence_length, last_n=None):
+    """Rows needed for the last `last_n` sequences (all rows when last_n is None)"""
+    if last_n is None:
+        return total_rows
+    if last_n < 1:
+        raise ValueError(f"last_n must be at least 1, got {last_n}")
+    return min(total_rows, last_n + sequence_length - 1)
+
+
+def preprocess_input(df, last_n=None, return_timestamps=False):
     """
     Main preprocessing pipeline
     
     Args:
         df: Input DataFrame with 'timestamp' and 'demand' columns
+        last_n: Only build the most recent `last_n` sequences (one per hour).
+            Lag and rolling features are still computed over the full history;
+            only the rows the last windows need are scaled and sequenced.
+        return_timestamps: Also return the hour each sequence ends at
+            ("%Y-%m-%d %H:%M:%S"), i.e. the hour its prediction belongs to.
     
     Returns:
-        3D numpy array ready for LSTM model (samples, timesteps, features)
+        Dict of model inputs; numeric_input is (samples, timesteps, features).
+        With the input cache enabled, repeat inputs are loaded read-only via mmap.
+        With return_timestamps, a (model inputs, timestamps list) tuple.
     """
-    logger.info("=" * 60)
-    logger.info("Starting preprocessing pipeline")
-    logger.info("=" * 60)
+    logger.debug("=" * 60)
+    logger.debug("Starting preprocessing pipeline")
+    logger.debug("=" * 60)
     
     # Load configuration and scaler
     config = get_feature_config()
@@ -90,6 +111,15 @@ def preprocess_input(df):
     
     sequence_length = config["sequence_length"]
     feature_columns = config["feature_columns"]
+
+    cache = get_input_cache()
+    if cache is not None:
+        cache_key = cache.key(df, config, get_scaler_version(), last_n=last_n)
+        cached = cache.get(cache_key)
+        if cached is not None and WINDOW_END_KEY in cached:
+            logger.debug("✓ Model inputs loaded from cache: %s", cache_key[:12])
+            timestamps = cached.pop(WINDOW_END_KEY)
+            return (cached, timestamps.tolist()) if return_timestamps else cached
     
     # Strict raw input validation (before feature engineering)
     validate_raw_input(df, config)
@@ -98,14 +128,21 @@ def preprocess_input(df):
     validate_input_shape(df, config)
     
     # Build features
-    features_df = build_features(df, config)
+    with stage_timer("features"):
+        features_df = build_features(df, config)
     
     # Validate features
     validate_features(features_df, feature_columns)
     
+    # Keep only the rows the requested windows cover (features already use the full history)
+    rows = tail_rows(len(features_df), sequence_length, last_n)
+    if rows < len(features_df):
+        features_df = features_df.iloc[-rows:]
+        logger.debug("✓ Kept last %s rows for %s sequences", rows, last_n)
+
     # Extract feature columns in correct order
     X = features_df[feature_columns].values
-    logger.info(f"✓ Extracted features: shape={X.shape}")
+    logger.debug("✓ Extracted features: shape=%s", X.shape)
 
     # Prepare categorical sequence input (day of week)
     day_of_week_values = features_df["dayofweek"].astype(int).values
@@ -122,14 +159,15 @@ def preprocess_input(df):
     # Append unscaled categorical numeric features expected by the model
     extra_numeric = features_df[["dayofweek", "is_weekend"]].values
     X_scaled = np.concatenate([X_scaled, extra_numeric], axis=1)
-    logger.info(f"✓ Appended categorical numeric features: shape={X_scaled.shape}")
+    logger.debug("✓ Appended categorical numeric features: shape=%s", X_scaled.shape)
     
     # Create sequences
-    sequences = create_sequences(X_scaled, sequence_length)
-    day_of_week_sequences = create_sequences(
-        day_of_week_values.reshape(-1, 1),
-        sequence_length,
-    ).squeeze(-1)
+    with stage_timer("sequences"):
+        sequences = create_sequences(X_scaled, sequence_length)
+        day_of_week_sequences = create_sequences(
+            day_of_week_values.reshape(-1, 1),
+            sequence_length,
+        ).squeeze(-1)
     
     if len(sequences) == 0:
         raise ValueError(
@@ -145,11 +183,20 @@ def preprocess_input(df):
         "numeric_input": sequences,
     }
 
-    logger.info("✓ Preprocessing complete: model inputs prepared")
-    logger.info(f"  - Samples: {sequences.shape[0]}")
-    logger.info(f"  - Timesteps: {sequences.shape[1]}")
-    logger.info(f"  - Numeric features: {sequences.shape[2]}")
-    logger.info(f"  - Day-of-week input shape: {day_of_week_sequences.shape}")
-    logger.info("=" * 60)
+    logger.debug("✓ Preprocessing complete: model inputs prepared")
+    logger.debug("  - Samples: %s", sequences.shape[0])
+    logger.debug("  - Timesteps: %s", sequences.shape[1])
+    logger.debug("  - Numeric features: %s", sequences.shape[2])
+    logger.debug("  - Day-of-week input shape: %s", day_of_week_sequences.shape)
+    logger.debug("=" * 60)
+
+    timestamps = None
+    if return_timestamps or cache is not None:
+        timestamps = (
+            features_df["timestamp"].iloc[sequence_length - 1:].dt.strftime(TIMESTAMP_FORMAT).to_numpy(dtype=str)
+        )
+
+    if cache is not None:
+        cache.put(cache_key, {**model_inputs, WINDOW_END_KEY: timestamps})
 
-    return model_inputs
+    return (model_inputs, timestamps.tolist()) if return_timestamps else model_inputs
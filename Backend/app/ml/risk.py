@@ -0,0 +1,206 @@
+"""
+Probabilistic overload risk module
+Monte Carlo simulation over the quantile forecasts produced by the model.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+
+from app.utils.logging import log_event
+
+logger = logging.getLogger(__name__)
+
+# Cumulative probability of each quantile head emitted by the model
+QUANTILE_LEVELS: Dict[str, float] = {
+    "p10": 0.10,
+    "p50": 0.50,
+    "p90": 0.90,
+    "p99": 0.99,
+}
+
+
+@dataclass(frozen=True)
+class RiskConfig:
+    """Configuration for the overload risk simulation."""
+    draws: int = 10000
+    seed: Optional[int] = 0
+    target_service_level: float = 0.95
+    standing_ratio: float = 0.20
+    # Upper bound on draws x hours simulated at once (bounds peak memory)
+    max_block_elements: int = 2_000_000
+
+
+def build_quantile_table(prediction_payload: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build a per-hour piecewise-linear inverse CDF from the quantile series.
+
+    Returns:
+        levels: (K,) cumulative probabilities, starting at 0.0 and ending at 1.0
+        values: (hours, K) demand at each level, non-negative and non-decreasing
+    """
+    available = {
+        item.get("quantile"): item.get("values", [])
+        for item in prediction_payload.get("predictions", [])
+        if item.get("quantile") in QUANTILE_LEVELS
+    }
+    if not available:
+        raise ValueError(
+            f"No usable quantiles in predictions (expected any of {list(QUANTILE_LEVELS)})"
+        )
+
+    names = sorted(available, key=QUANTILE_LEVELS.get)
+    lengths = {len(available[name]) for name in names}
+    if len(lengths) != 1:
+        raise ValueError("Quantile series have different lengths")
+
+    knots = np.array([QUANTILE_LEVELS[name] for name in names], dtype=np.float64)
+    knot_values = np.column_stack(
+        [np.asarray(available[name], dtype=np.float64) for name in names]
+    )
+    knot_values = np.nan_to_num(knot_values, nan=0.0, posinf=0.0, neginf=0.0)
+    # Quantile heads are trained independently and can cross
+    knot_values = np.maximum.accumulate(np.clip(knot_values, 0.0, None), axis=1)
+
+    # Extend both tails linearly using the slope of the adjacent segment
+    if len(knots) > 1:
+        first_slope = (knot_values[:, 1] - knot_values[:, 0]) / (knots[1] - knots[0])
+        last_slope = (knot_values[:, -1] - knot_values[:, -2]) / (knots[-1] - knots[-2])
+    else:
+        first_slope = last_slope = np.zeros(len(knot_values))
+    lower_tail = np.clip(knot_values[:, 0] - first_slope * knots[0], 0.0, None)
+    upper_tail = knot_values[:, -1] + last_slope * (1.0 - knots[-1])
+
+    levels = np.concatenate([[0.0], knots, [1.0]])
+    values = np.column_stack([lower_tail, knot_values, upper_tail])
+    return levels, values
+
+
+def _sample_block(
+    levels: np.ndarray,
+    values: np.ndarray,
+    draws: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Inverse-transform sample `draws` demands for every hour in `values`."""
+    u = rng.random((draws, values.shape[0]))
+    segment = np.clip(np.searchsorted(levels, u, side="right") - 1, 0, len(levels) - 2)
+    lo_p = levels[segment]
+    hi_p = levels[segment + 1]
+    columns = np.arange(values.shape[0])[None, :]
+    lo_v = values[columns, segment]
+    hi_v = values[columns, segment + 1]
+    return lo_v + (u - lo_p) / (hi_p - lo_p) * (hi_v - lo_v)
+
+
+def assess_overload_risk(
+    prediction_payload: Dict[str, Any],
+    capacity: int,
+    buses: Optional[Sequence[int]] = None,
+    config: Optional[RiskConfig] = None,
+) -> Dict[str, Any]:
+    """
+    Estimate per-hour overload risk by simulating demand from all quantiles.
+
+    An hour is overloaded when simulated demand exceeds what its buses can
+    carry within standing limits: buses * capacity * (1 + standing_ratio).
+    `buses` defaults to one bus per hour. Hours are simulated in blocks so
+    peak memory stays bounded by `max_block_elements`.
+    """
+    if capacity <= 0:
+        raise ValueError("capacity must be a positive integer")
+
+    cfg = config or RiskConfig()
+    if cfg.draws <= 0:
+        raise ValueError("draws must be a positive integer")
+    if not 0.0 < cfg.target_service_level < 1.0:
+        raise ValueError("target_service_level must be between 0 and 1")
+
+    levels, values = build_quantile_table(prediction_payload)
+    num_hours = values.shape[0]
+
+    if buses is None:
+        bus_counts = np.ones(num_hours, dtype=np.int64)
+    else:
+        if len(buses) != num_hours:
+            raise ValueError("buses length does not match predictions length")
+        bus_counts = np.clip(np.asarray(buses, dtype=np.int64), 0, None)
+
+    log_event(
+        logger,
+        "info",
+        "risk_simulation_start",
+        hours=num_hours,
+        draws=cfg.draws,
+        seed=cfg.seed,
+    )
+
+    per_bus_limit = capacity * (1.0 + cfg.standing_ratio)
+    hour_limits = bus_counts * per_bus_limit
+    rng = np.random.default_rng(cfg.seed)
+    block_hours = max(1, cfg.max_block_elements // cfg.draws)
+
+    overload_probability = np.empty(num_hours, dtype=np.float64)
+    service_level_demand = np.empty(num_hours, dtype=np.float64)
+    overloaded_hours = np.zeros(cfg.draws, dtype=np.int64)
+
+    for start in range(0, num_hours, block_hours):
+        end = min(start + block_hours, num_hours)
+        samples = _sample_block(levels, values[start:end], cfg.draws, rng)
+        overloaded = samples > hour_limits[start:end]
+        overload_probability[start:end] = overloaded.mean(axis=0)
+        service_level_demand[start:end] = np.quantile(
+            samples, cfg.target_service_level, axis=0
+        )
+        overloaded_hours += overloaded.sum(axis=1)
+
+    buses_for_service_level = np.maximum(
+        1, np.ceil(service_level_demand / per_bus_limit)
+    ).astype(np.int64)
+
+    risk: List[Dict[str, Any]] = [
+        {
+            "trip_index": idx,
+            "buses_assigned": int(bus_counts[idx]),
+            "overload_probability": round(float(overload_probability[idx]), 4),
+            "service_level_demand": round(float(service_level_demand[idx]), 4),
+            "buses_for_service_level": int(buses_for_service_level[idx]),
+        }
+        for idx in range(num_hours)
+    ]
+
+    result = {
+        "risk": risk,
+        "summary": {
+            "total_hours": num_hours,
+            "expected_overloaded_hours": round(float(overloaded_hours.mean()), 4),
+            "max_overload_probability": (
+                round(float(overload_probability.max()), 4) if num_hours else 0.0
+            ),
+            "probability_any_overload": round(float((overloaded_hours > 0).mean()), 4),
+            "total_buses_assigned": int(bus_counts.sum()),
+            "total_buses_for_service_level": int(buses_for_service_level.sum()),
+        },
+        "parameters": {
+            "capacity": capacity,
+            "draws": cfg.draws,
+            "seed": cfg.seed,
+            "target_service_level": cfg.target_service_level,
+            "standing_ratio": cfg.standing_ratio,
+            "quantile_levels": dict(QUANTILE_LEVELS),
+        },
+    }
+
+    log_event(
+        logger,
+        "info",
+        "risk_simulation_complete",
+        hours=num_hours,
+        expected_overloaded_hours=result["summary"]["expected_overloaded_hours"],
+    )
+
+    return result
+
@@ -0,0 +1,130 @@
+"""
+Current-vs-optimized schedule comparison
+Joins an uploaded schedule with the optimized one by hour using column operations.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DIFF_COLUMNS = [
+    "hour",
+    "current_buses",
+    "buses_assigned",
+    "extra_buses",
+    "load_factor",
+    "delta",
+]
+
+HOUR_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def schedule_columns(schedule: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Extract the columns needed for comparison from scheduler output in one pass.
+
+    `hour` is parsed from each item's timestamp and floored to the hour.
+    """
+    frame = pd.DataFrame(
+        {
+            "hour": [item.get("timestamp") for item in schedule],
+            "buses_assigned": np.fromiter(
+                (item.get("buses_assigned") or 0 for item in schedule),
+                dtype=np.int64,
+                count=len(schedule),
+            ),
+            "extra_buses": np.fromiter(
+                (item.get("extra_buses") or 0 for item in schedule),
+                dtype=np.int64,
+                count=len(schedule),
+            ),
+            "load_factor": np.fromiter(
+                (item.get("load_factor") or 0.0 for item in schedule),
+                dtype=np.float64,
+                count=len(schedule),
+            ),
+        }
+    )
+    frame["hour"] = pd.to_datetime(frame["hour"], errors="coerce").dt.floor("h")
+    return frame
+
+
+def align_current_buses(
+    current: pd.DataFrame,
+    hours: Sequence[Any],
+) -> Optional[List[int]]:
+    """
+    Look up current bus counts for each predicted hour.
+
+    Returns None unless every hour has a matching row in `current`.
+    """
+    index = pd.to_datetime(pd.Series(hours), errors="coerce").dt.floor("h")
+    aligned = current.set_index("hour")["current_buses"].reindex(index)
+    if aligned.isna().any():
+        return None
+    return aligned.astype(np.int64).tolist()
+
+
+@dataclass(frozen=True)
+class ScheduleDiff:
+    """Hour-joined comparison of current and optimized bus counts."""
+    frame: pd.DataFrame
+    summary: Dict[str, int]
+
+    def _refined_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "hour": self.frame["hour"].dt.strftime(HOUR_FORMAT),
+                "current_buses": self.frame["current_buses"],
+                "optimized_buses": self.frame["buses_assigned"],
+                "delta": self.frame["delta"],
+            }
+        )
+
+    def refined_schedule(self) -> List[Dict[str, Any]]:
+        """Rows for the JSON response."""
+        return self._refined_frame().to_dict(orient="records")
+
+    def refined_columns(self) -> Dict[str, List[Any]]:
+        """Column arrays for the columnar JSON response."""
+        return self._refined_frame().to_dict(orient="list")
+
+    def iter_rows(self, chunk_rows: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Export rows (`DIFF_COLUMNS`), converted `chunk_rows` at a time."""
+        frame = self.frame[DIFF_COLUMNS]
+        for start in range(0, len(frame), chunk_rows):
+            chunk = frame.iloc[start : start + chunk_rows]
+            chunk = chunk.assign(hour=chunk["hour"].dt.strftime(HOUR_FORMAT))
+            yield from chunk.to_dict(orient="records")
+
+
+def diff_schedules(current: pd.DataFrame, optimized: pd.DataFrame) -> ScheduleDiff:
+    """
+    Inner-join `current` (hour, current_buses) with `optimized` (output of
+    `schedule_columns`) on hour and compute per-hour deltas and totals.
+    """
+    if current["hour"].duplicated().any():
+        raise ValueError("schedule CSV contains duplicate hours")
+    if optimized["hour"].isna().any():
+        raise ValueError("optimized schedule has no timestamps to join on")
+
+    current = current.assign(current_buses=current["current_buses"].astype(np.int64))
+    joined = current.merge(optimized, on="hour", how="inner", sort=True)
+    if joined.empty:
+        raise ValueError("schedule CSV hours do not overlap predicted hours")
+
+    delta = joined["buses_assigned"].to_numpy() - joined["current_buses"].to_numpy()
+    joined["delta"] = delta
+
+    summary = {
+        "total_hours": int(len(joined)),
+        "total_added_buses": int(np.clip(delta, 0, None).sum()),
+        "total_removed_buses": int(np.clip(-delta, 0, None).sum()),
+        "peak_overload_hours": int((joined["load_factor"].to_numpy() > 1.0).sum()),
+        "unmatched_current_hours": int(len(current) - len(joined)),
+        "unmatched_predicted_hours": int(len(optimized) - len(joined)),
+    }
+    return ScheduleDiff(frame=joined, summary=summary)
@@ -6,9 +6,18 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from math import ceil
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Sequence, Tuple
 import logging
 
+import numpy as np
+
+from app.ml.fleet import (
+    BusType,
+    describe_mix,
+    fleet_parameters,
+    get_fleet_table,
+    required_units,
+)
 from app.utils.logging import log_event
 
 logger = logging.getLogger(__name__)
@@ -51,13 +60,441 @@ def _safe_float(value: Any) -> float:
     return max(v, 0.0)
 
 
-def generate_schedule(
-    prediction_payload: Dict[str, Any],
+def _build_schedule_item(
+    idx: int,
+    raw_value: Any,
     capacity: int,
+    cfg: SchedulerConfig,
+    trip_id: Optional[str],
+    timestamp: Optional[str],
+    current_value: Optional[int],
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Apply the scheduling rules to one trip; returns the item and its summary contribution."""
+    demand = _safe_float(raw_value)
+    load_factor = demand / capacity
+    max_capacity_per_bus = capacity * (1.0 + cfg.standing_ratio)
+
+    headway_multiplier = 1.0
+    low_demand = load_factor < cfg.low_load_threshold
+    if low_demand:
+        headway_multiplier = cfg.low_headway_multiplier
+
+    standing_allowed = False
+    buses_required = 1
+    rationale: List[str] = [
+        f"Load factor (p50/capacity) = {load_factor:.3f}",
+        f"Capacity={capacity}, p50={demand:.2f}",
+    ]
+
+    if load_factor <= 1.0:
+        rationale.append("Load within seated capacity: no extra buses")
+    elif load_factor <= (1.0 + cfg.standing_ratio):
+        standing_allowed = True
+        rationale.append(
+            "Moderate overload: standing passengers allowed within policy"
+        )
+    else:
+        buses_required = max(1, ceil(demand / max_capacity_per_bus))
+        standing_allowed = True
+        rationale.append(
+            "Severe overload: adding extra buses to meet p90 demand"
+        )
+
+    expected_load_per_bus = demand / buses_required if buses_required else 0.0
+    expected_seated_load_factor = expected_load_per_bus / capacity
+    expected_standing = max(0.0, expected_load_per_bus - capacity)
+
+    schedule_item = {
+        "trip_index": idx,
+        "trip_id": trip_id,
+        "timestamp": timestamp,
+        "p90_demand": round(demand, 4),
+        "load_factor": round(load_factor, 4),
+        "buses_assigned": buses_required,
+        "extra_buses": max(0, buses_required - 1),
+        "current_buses": None,
+        "delta_buses": None,
+        "current_load_factor": None,
+        "standing_allowed": standing_allowed,
+        "expected_standing_per_bus": round(expected_standing, 4),
+        "expected_load_per_bus": round(expected_load_per_bus, 4),
+        "expected_seated_load_factor": round(expected_seated_load_factor, 4),
+        "base_headway_minutes": cfg.base_headway_minutes,
+        "headway_multiplier": round(headway_multiplier, 2),
+        "adjusted_headway_minutes": round(
+            cfg.base_headway_minutes * headway_multiplier, 2
+        ),
+        "bus_mix": None,
+        "operating_cost": None,
+        "rationale": rationale,
+    }
+
+    contribution = {
+        "total_buses": buses_required,
+        "extra_buses_added": buses_required - 1,
+        "trips_with_standing": int(standing_allowed),
+        "trips_low_demand": int(low_demand),
+        "optimized_overload_trips": int(load_factor > 1.0),
+        "load_factor_sum": load_factor,
+        "operating_cost": 0.0,
+        "current_total_buses": 0,
+        "current_load_factor_sum": 0.0,
+        "current_overload_trips": 0,
+    }
+
+    if current_value is not None:
+        current_value = max(0, int(current_value))
+        current_lf = demand / (capacity * current_value) if current_value > 0 else 0.0
+        schedule_item["current_buses"] = current_value
+        schedule_item["delta_buses"] = buses_required - current_value
+        schedule_item["current_load_factor"] = round(current_lf, 4)
+        contribution["current_total_buses"] = current_value
+        contribution["current_load_factor_sum"] = current_lf
+        contribution["current_overload_trips"] = int(current_lf > 1.0)
+
+    return schedule_item, contribution
+
+
+def _build_fleet_item(
+    idx: int,
+    raw_value: Any,
+    fleet: Sequence[BusType],
+    assignment: Tuple[List[int], float, int, int],
+    capacity: Optional[int],
+    cfg: SchedulerConfig,
+    trip_id: Optional[str],
+    timestamp: Optional[str],
+    current_value: Optional[int],
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Mixed-fleet variant of `_build_schedule_item`.
+
+    `assignment` is a precomputed fleet table row: (counts per bus type,
+    operating cost, bus count, seated capacity).
+    """
+    demand = _safe_float(raw_value)
+    counts, operating_cost, buses_required, seated = assignment
+    bus_mix = describe_mix(fleet, counts)
+    load_factor = demand / seated
+
+    headway_multiplier = 1.0
+    low_demand = load_factor < cfg.low_load_threshold
+    if low_demand:
+        headway_multiplier = cfg.low_headway_multiplier
+
+    standing_allowed = load_factor > 1.0
+    mix_text = ", ".join(f"{count}x {name}" for name, count in bus_mix.items())
+    rationale: List[str] = [
+        f"Cheapest fleet mix covering p50 within standing limits: {mix_text}",
+        f"Seated capacity={seated}, p50={demand:.2f}, cost={operating_cost:.2f}",
+        f"Load factor (p50/seated capacity) = {load_factor:.3f}",
+    ]
+    if standing_allowed:
+        rationale.append("Standing passengers allowed within policy")
+
+    expected_load_per_bus = demand / buses_required
+    expected_standing = max(0.0, demand - seated) / buses_required
+
+    schedule_item = {
+        "trip_index": idx,
+        "trip_id": trip_id,
+        "timestamp": timestamp,
+        "p90_demand": round(demand, 4),
+        "load_factor": round(load_factor, 4),
+        "buses_assigned": buses_required,
+        "extra_buses": max(0, buses_required - 1),
+        "current_buses": None,
+        "delta_buses": None,
+        "current_load_factor": None,
+        "standing_allowed": standing_allowed,
+        "expected_standing_per_bus": round(expected_standing, 4),
+        "expected_load_per_bus": round(expected_load_per_bus, 4),
+        "expected_seated_load_factor": round(load_factor, 4),
+        "base_headway_minutes": cfg.base_headway_minutes,
+        "headway_multiplier": round(headway_multiplier, 2),
+        "adjusted_headway_minutes": round(
+            cfg.base_headway_minutes * headway_multiplier, 2
+        ),
+        "bus_mix": bus_mix,
+        "operating_cost": round(operating_cost, 4),
+        "rationale": rationale,
+    }
+
+    contribution = {
+        "total_buses": buses_required,
+        "extra_buses_added": buses_required - 1,
+        "trips_with_standing": int(standing_allowed),
+        "trips_low_demand": int(low_demand),
+        "optimized_overload_trips": int(standing_allowed),
+        "load_factor_sum": load_factor,
+        "operating_cost": operating_cost,
+        "current_total_buses": 0,
+        "current_load_factor_sum": 0.0,
+        "current_overload_trips": 0,
+    }
+
+    if current_value is not None:
+        if not capacity:
+            raise ValueError("capacity is required to compare current_buses with a mixed fleet")
+        current_value = max(0, int(current_value))
+        current_lf = demand / (capacity * current_value) if current_value > 0 else 0.0
+        schedule_item["current_buses"] = current_value
+        schedule_item["delta_buses"] = buses_required - current_value
+        schedule_item["current_load_factor"] = round(current_lf, 4)
+        contribution["current_total_buses"] = current_value
+        contribution["current_load_factor_sum"] = current_lf
+        contribution["current_overload_trips"] = int(current_lf > 1.0)
+
+    return schedule_item, contribution
+
+
+def _empty_aggregates() -> Dict[str, float]:
+    return {
+        "total_buses": 0,
+        "extra_buses_added": 0,
+        "trips_with_standing": 0,
+        "trips_low_demand": 0,
+        "optimized_overload_trips": 0,
+        "load_factor_sum": 0.0,
+        "operating_cost": 0.0,
+        "current_total_buses": 0,
+        "current_load_factor_sum": 0.0,
+        "current_overload_trips": 0,
+    }
+
+
+AGGREGATE_KEYS = tuple(_empty_aggregates())
+
+
+def _accumulate(aggregates: Dict[str, float], contribution: Dict[str, float], sign: int = 1) -> None:
+    for key, value in contribution.items():
+        aggregates[key] += sign * value
+
+
+def _pack_contribution(contribution: Dict[str, float]) -> Tuple[float, ...]:
+    # Exact per-trip values, stored compactly in AGGREGATE_KEYS order
+    return tuple(contribution[key] for key in AGGREGATE_KEYS)
+
+
+def _build_summary(
+    aggregates: Dict[str, float],
+    total_trips: int,
+    has_current: bool,
+    has_fleet: bool = False,
+) -> Dict[str, Any]:
+    total_buses = int(aggregates["total_buses"])
+    current_total_buses = int(aggregates["current_total_buses"])
+    avg_load_factor = aggregates["load_factor_sum"] / total_trips if total_trips else 0.0
+    current_avg_load_factor = (
+        aggregates["current_load_factor_sum"] / total_trips
+        if has_current and total_trips
+        else None
+    )
+    return {
+        "total_trips": total_trips,
+        "total_buses": total_buses,
+        "extra_buses_added": int(aggregates["extra_buses_added"]),
+        "trips_with_standing": int(aggregates["trips_with_standing"]),
+        "trips_low_demand": int(aggregates["trips_low_demand"]),
+        "avg_load_factor": round(avg_load_factor, 4),
+        "current_total_buses": current_total_buses if has_current else None,
+        "delta_total_buses": (
+            total_buses - current_total_buses
+            if has_current
+            else None
+        ),
+        "current_avg_load_factor": (
+            round(current_avg_load_factor, 4)
+            if current_avg_load_factor is not None
+            else None
+        ),
+        "current_overload_trips": (
+            int(aggregates["current_overload_trips"]) if has_current else None
+        ),
+        "optimized_overload_trips": (
+            int(aggregates["optimized_overload_trips"]) if has_current else None
+        ),
+        "total_operating_cost": (
+            round(aggregates["operating_cost"], 4) if has_fleet else None
+        ),
+    }
+
+
+def _build_parameters(
+    capacity: Optional[int],
+    cfg: SchedulerConfig,
+    fleet: Optional[Sequence[BusType]] = None,
+) -> Dict[str, Any]:
+    return {
+        "capacity": capacity,
+        "base_headway_minutes": cfg.base_headway_minutes,
+        "standing_ratio": cfg.standing_ratio,
+        "low_load_threshold": cfg.low_load_threshold,
+        "low_headway_multiplier": cfg.low_headway_multiplier,
+        "fleet": fleet_parameters(fleet) if fleet else None,
+    }
+
+
+SCHEDULE_RULES = [
+    "Load factor = p50 / capacity",
+    "Moderate overload: allow standing up to standing_ratio * capacity",
+    "Severe overload: add buses until p50 fits within standing limits",
+    "Low demand: increase headway, never cancel trips",
+]
+
+FLEET_RULES = [
+    "Buses per trip = cheapest mix of bus types whose capacity covers p50 within standing limits",
+    "Load factor = p50 / seated capacity of the assigned mix",
+    "Low demand: increase headway, never cancel trips",
+]
+
+
+def _item_builder(
+    capacity: Optional[int],
+    cfg: SchedulerConfig,
+    fleet: Optional[Sequence[BusType]],
+    demands: Sequence[Any],
+) -> Callable[..., Tuple[Dict[str, Any], Dict[str, float]]]:
+    """
+    Return a per-trip builder for the requested mode.
+
+    For a mixed fleet the DP table is fetched once for the largest demand in
+    `demands`, so each trip is a constant-time table lookup.
+    """
+    if not fleet:
+        def build(idx, raw_value, trip_id, timestamp, current_value):
+            return _build_schedule_item(
+                idx, raw_value, capacity, cfg, trip_id, timestamp, current_value
+            )
+        return build
+
+    units = required_units([_safe_float(v) for v in demands], cfg.standing_ratio)
+    table = get_fleet_table(fleet, int(units.max()) if len(units) else 0)
+    assignments = iter(
+        zip(
+            table.counts[units].tolist(),
+            table.costs[units].tolist(),
+            table.buses[units].tolist(),
+            table.seats[units].tolist(),
+        )
+    )
+
+    def build_fleet(idx, raw_value, trip_id, timestamp, current_value):
+        return _build_fleet_item(
+            idx,
+            raw_value,
+            table.fleet,
+            next(assignments),
+            capacity,
+            cfg,
+            trip_id,
+            timestamp,
+            current_value,
+        )
+    return build_fleet
+
+
+def _update_schedule(
+    previous_result: Dict[str, Any],
+    capacity: Optional[int],
+    cfg: SchedulerConfig,
+    fleet: Optional[Sequence[BusType]],
+    changed_indices: Sequence[int],
+    changed_p50: Sequence[float],
+) -> Dict[str, Any]:
+    """
+    Recompute only the changed trips of a previous result and patch its summary.
+
+    The previous result's schedule and per-trip contributions are updated in
+    place and shared with the returned result, so the cost is O(changed).
+    """
+    if len(changed_indices) != len(changed_p50):
+        raise ValueError("changed_indices length does not match changed_p50 length")
+
+    parameters = _build_parameters(capacity, cfg, fleet)
+    previous_parameters = previous_result.get("parameters") or {}
+    if any(
+        previous_parameters[key] != value
+        for key, value in parameters.items()
+        if key in previous_parameters
+    ):
+        raise ValueError(
+            "capacity/config differ from previous result; generate a full schedule instead"
+        )
+
+    schedule = previous_result.get("schedule")
+    contributions = previous_result.get("contributions")
+    previous_aggregates = previous_result.get("aggregates")
+    if schedule is None or contributions is None or previous_aggregates is None:
+        raise ValueError(
+            "previous result has no per-trip aggregates; generate a full schedule instead"
+        )
+    if len(contributions) != len(schedule):
+        raise ValueError("previous result aggregates do not match its schedule")
+    aggregates = dict(previous_aggregates)
+    has_current = any(item.get("current_buses") is not None for item in schedule[:1])
+    out_of_range = [idx for idx in changed_indices if idx < 0 or idx >= len(schedule)]
+    if out_of_range:
+        raise ValueError(f"changed index {out_of_range[0]} out of range for {len(schedule)} trips")
+    build = _item_builder(capacity, cfg, fleet, changed_p50)
+
+    # Build every changed trip before touching the previous result, so a
+    # failing update leaves it as it was
+    staged: Dict[int, Tuple[Dict[str, Any], Tuple[float, ...]]] = {}
+    changes: List[Dict[str, Any]] = []
+    for idx, raw_value in zip(changed_indices, changed_p50):
+        old_item, old_contribution = staged.get(idx, (schedule[idx], contributions[idx]))
+        new_item, contribution = build(
+            idx,
+            raw_value,
+            old_item.get("trip_id"),
+            old_item.get("timestamp"),
+            old_item.get("current_buses"),
+        )
+        _accumulate(aggregates, dict(zip(AGGREGATE_KEYS, old_contribution)), sign=-1)
+        _accumulate(aggregates, contribution)
+        staged[idx] = (new_item, _pack_contribution(contribution))
+
+        changes.append(
+            {
+                "trip_index": idx,
+                "trip_id": new_item["trip_id"],
+                "timestamp": new_item["timestamp"],
+                "previous_p90_demand": old_item.get("p90_demand"),
+                "p90_demand": new_item["p90_demand"],
+                "previous_buses_assigned": old_item.get("buses_assigned"),
+                "buses_assigned": new_item["buses_assigned"],
+                "previous_adjusted_headway_minutes": old_item.get("adjusted_headway_minutes"),
+                "adjusted_headway_minutes": new_item["adjusted_headway_minutes"],
+            }
+        )
+
+    for idx, (new_item, contribution) in staged.items():
+        schedule[idx] = new_item
+        contributions[idx] = contribution
+
+    return {
+        "schedule": schedule,
+        "summary": _build_summary(aggregates, len(schedule), has_current, bool(fleet)),
+        "parameters": parameters,
+        "rules": list(FLEET_RULES if fleet else SCHEDULE_RULES),
+        "aggregates": aggregates,
+        "contributions": contributions,
+        "changes": changes,
+    }
+
+
+def generate_schedule(
+    prediction_payload: Optional[Dict[str, Any]],
+    capacity: Optional[int],
     config: Optional[SchedulerConfig] = None,
     trip_ids: Optional[List[str]] = None,
     timestamps: Optional[List[str]] = None,
     current_buses: Optional[List[int]] = None,
+    previous_result: Optional[Dict[str, Any]] = None,
+    changed_indices: Optional[Sequence[int]] = None,
+    changed_p50: Optional[Sequence[float]] = None,
+    fleet: Optional[Sequence[BusType]] = None,
 ) -> Dict[str, Any]:
     """
     Generate a deterministic operational schedule from quantile predictions.
@@ -67,155 +504,90 @@ def generate_schedule(
     - Moderate overload: allow standing up to (standing_ratio * capacity)
     - Severe overload: add extra buses to satisfy p50 within standing limits
     - Low demand: increase headway (never cancel a trip)
-    """
-    log_event(logger, "info", "schedule_engine_start", capacity=capacity)
 
-    if capacity <= 0:
+    Mixed-fleet mode: pass `fleet` (bus types with capacity and cost) to pick
+    the cheapest combination of types per trip instead of identical buses of
+    `capacity`. `capacity` is then optional and only used for current_buses
+    comparisons.
+
+    Incremental mode: pass `previous_result` (an earlier return value) together
+    with `changed_indices` and their new `changed_p50` values. Only those trips
+    are recomputed, summary aggregates are patched in O(changed) from the
+    exact per-trip `contributions` of the previous result (whose schedule is
+    updated in place), and the result carries a `changes` list describing each
+    affected trip. `prediction_payload` is ignored in this mode.
+    """
+    if not fleet and (capacity is None or capacity <= 0):
         raise ValueError("capacity must be a positive integer")
 
     cfg = config or SchedulerConfig()
-    p50_values = _extract_quantile_values(prediction_payload, "p50")
+
+    if previous_result is not None:
+        # Callers often pass numpy arrays, whose truth value is ambiguous
+        changed_indices = [] if changed_indices is None else [int(i) for i in np.asarray(changed_indices).ravel()]
+        changed_p50 = [] if changed_p50 is None else np.asarray(changed_p50).ravel().tolist()
+        log_event(
+            logger,
+            "info",
+            "schedule_engine_incremental_start",
+            capacity=capacity,
+            changed=len(changed_indices),
+        )
+        result = _update_schedule(
+            previous_result,
+            capacity,
+            cfg,
+            fleet,
+            changed_indices,
+            changed_p50,
+        )
+        log_event(
+            logger,
+            "info",
+            "schedule_engine_incremental_complete",
+            changed=len(result["changes"]),
+            total_buses=result["summary"]["total_buses"],
+        )
+        return result
+
+    log_event(
+        logger,
+        "info",
+        "schedule_engine_start",
+        capacity=capacity,
+        bus_types=len(fleet) if fleet else None,
+    )
+
+    p50_values = _extract_quantile_values(prediction_payload or {}, "p50")
     _validate_lengths(p50_values, trip_ids, timestamps)
     _validate_current_buses(p50_values, current_buses)
 
     schedule: List[Dict[str, Any]] = []
-    total_buses = 0
-    extra_buses = 0
-    trips_with_standing = 0
-    trips_low_demand = 0
-    load_factors: List[float] = []
-    current_load_factors: List[float] = []
-    current_total_buses = 0
-    current_overload_trips = 0
-    optimized_overload_trips = 0
-
-    max_capacity_per_bus = capacity * (1.0 + cfg.standing_ratio)
+    contributions: List[Tuple[float, ...]] = []
+    aggregates = _empty_aggregates()
+    build = _item_builder(capacity, cfg, fleet, p50_values)
 
     for idx, raw_value in enumerate(p50_values):
-        demand = _safe_float(raw_value)
-        load_factor = demand / capacity
-        load_factors.append(load_factor)
-
-        if load_factor > 1.0:
-            optimized_overload_trips += 1
-
-        headway_multiplier = 1.0
-        if load_factor < cfg.low_load_threshold:
-            headway_multiplier = cfg.low_headway_multiplier
-            trips_low_demand += 1
-
-        standing_allowed = False
-        buses_required = 1
-        rationale: List[str] = [
-            f"Load factor (p50/capacity) = {load_factor:.3f}",
-            f"Capacity={capacity}, p50={demand:.2f}",
-        ]
-
-        if load_factor <= 1.0:
-            rationale.append("Load within seated capacity: no extra buses")
-        elif load_factor <= (1.0 + cfg.standing_ratio):
-            standing_allowed = True
-            trips_with_standing += 1
-            rationale.append(
-                "Moderate overload: standing passengers allowed within policy"
-            )
-        else:
-            buses_required = max(1, ceil(demand / max_capacity_per_bus))
-            standing_allowed = True
-            extra_buses += (buses_required - 1)
-            trips_with_standing += 1
-            rationale.append(
-                "Severe overload: adding extra buses to meet p90 demand"
-            )
-
-        expected_load_per_bus = demand / buses_required if buses_required else 0.0
-        expected_seated_load_factor = expected_load_per_bus / capacity
-        expected_standing = max(0.0, expected_load_per_bus - capacity)
-
-        schedule_item = {
-            "trip_index": idx,
-            "trip_id": trip_ids[idx] if trip_ids is not None else None,
-            "timestamp": timestamps[idx] if timestamps is not None else None,
-            "p90_demand": round(demand, 4),
-            "load_factor": round(load_factor, 4),
-            "buses_assigned": buses_required,
-            "extra_buses": max(0, buses_required - 1),
-            "current_buses": None,
-            "delta_buses": None,
-            "current_load_factor": None,
-            "standing_allowed": standing_allowed,
-            "expected_standing_per_bus": round(expected_standing, 4),
-            "expected_load_per_bus": round(expected_load_per_bus, 4),
-            "expected_seated_load_factor": round(expected_seated_load_factor, 4),
-            "base_headway_minutes": cfg.base_headway_minutes,
-            "headway_multiplier": round(headway_multiplier, 2),
-            "adjusted_headway_minutes": round(
-                cfg.base_headway_minutes * headway_multiplier, 2
-            ),
-            "rationale": rationale,
-        }
-
-        if current_buses is not None:
-            current_value = max(0, int(current_buses[idx]))
-            current_total_buses += current_value
-            current_lf = demand / (capacity * current_value) if current_value > 0 else 0.0
-            current_load_factors.append(current_lf)
-            if current_lf > 1.0:
-                current_overload_trips += 1
-            schedule_item["current_buses"] = current_value
-            schedule_item["delta_buses"] = buses_required - current_value
-            schedule_item["current_load_factor"] = round(current_lf, 4)
-
-        total_buses += buses_required
+        schedule_item, contribution = build(
+            idx,
+            raw_value,
+            trip_ids[idx] if trip_ids is not None else None,
+            timestamps[idx] if timestamps is not None else None,
+            current_buses[idx] if current_buses is not None else None,
+        )
+        _accumulate(aggregates, contribution)
         schedule.append(schedule_item)
-
-    avg_load_factor = sum(load_factors) / len(load_factors) if load_factors else 0.0
-    current_avg_load_factor = (
-        sum(current_load_factors) / len(current_load_factors)
-        if current_load_factors
-        else None
-    )
+        contributions.append(_pack_contribution(contribution))
 
     result = {
         "schedule": schedule,
-        "summary": {
-            "total_trips": len(schedule),
-            "total_buses": total_buses,
-            "extra_buses_added": extra_buses,
-            "trips_with_standing": trips_with_standing,
-            "trips_low_demand": trips_low_demand,
-            "avg_load_factor": round(avg_load_factor, 4),
-            "current_total_buses": current_total_buses if current_buses is not None else None,
-            "delta_total_buses": (
-                total_buses - current_total_buses
-                if current_buses is not None
-                else None
-            ),
-            "current_avg_load_factor": (
-                round(current_avg_load_factor, 4)
-                if current_avg_load_factor is not None
-                else None
-            ),
-            "current_overload_trips": (
-                current_overload_trips if current_buses is not None else None
-            ),
-            "optimized_overload_trips": (
-                optimized_overload_trips if current_buses is not None else None
-            ),
-        },
-        "parameters": {
-            "capacity": capacity,
-            "base_headway_minutes": cfg.base_headway_minutes,
-            "standing_ratio": cfg.standing_ratio,
-            "low_load_threshold": cfg.low_load_threshold,
-            "low_headway_multiplier": cfg.low_headway_multiplier,
-        },
-        "rules": [
-            "Load factor = p50 / capacity",
-            "Moderate overload: allow standing up to standing_ratio * capacity",
-            "Severe overload: add buses until p50 fits within standing limits",
-            "Low demand: increase headway, never cancel trips",
-        ],
+        "summary": _build_summary(
+            aggregates, len(schedule), current_buses is not None, bool(fleet)
+        ),
+        "parameters": _build_parameters(capacity, cfg, fleet),
+        "rules": list(FLEET_RULES if fleet else SCHEDULE_RULES),
+        "aggregates": aggregates,
+        "contributions": contributions,
     }
 
     log_event(
@@ -0,0 +1,81 @@
+"""
+Stand-in for the LSTM quantile model.
+Same input names, shapes and output structure as the .keras asset, with a
+cheap deterministic computation, so the pipeline runs without keras.
+"""
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.ml.loader import get_feature_config
+
+INPUT_NAMES = ("destination_input", "bus_type_input", "day_of_week_input", "numeric_input")
+NUM_OUTPUTS = 5  # mean, p10, p50, p90, p99
+
+# Multipliers applied to the central estimate for each output head
+QUANTILE_SCALES = np.array([1.0, 0.6, 1.0, 1.4, 1.8], dtype=np.float32)
+
+# Extra unscaled columns preprocess_input appends (dayofweek, is_weekend)
+EXTRA_NUMERIC_FEATURES = 2
+
+
+class StubQuantileModel:
+    """
+    `predict(inputs, verbose=0)` returns five `(samples, 1)` float32 arrays,
+    like the real model. The central estimate is a fixed projection of the
+    numeric sequence, so cost scales with samples x timesteps x features.
+    `select_outputs` returns a copy producing only some heads, as
+    `loader.get_head_model` does for the keras model.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, seed: int = 0):
+        cfg = config or get_feature_config()
+        self.sequence_length = cfg["sequence_length"]
+        self.num_numeric = len(cfg["feature_columns"]) + EXTRA_NUMERIC_FEATURES
+        rng = np.random.default_rng(seed)
+        self._weights = rng.uniform(0.0, 1.0, size=self.num_numeric).astype(np.float32)
+        self._time_weights = np.linspace(0.5, 1.5, self.sequence_length, dtype=np.float32)
+        self._time_weights /= self._time_weights.sum()
+        self._outputs = tuple(range(NUM_OUTPUTS))
+
+    def select_outputs(self, indices) -> "StubQuantileModel":
+        """Copy that shares the weights but returns only the heads at `indices`."""
+        head_model = copy.copy(self)
+        head_model._outputs = tuple(indices)
+        return head_model
+
+    @property
+    def input_shape(self) -> List[tuple]:
+        steps = self.sequence_length
+        return [(None, steps), (None, steps), (None, steps), (None, steps, self.num_numeric)]
+
+    @property
+    def output_shape(self) -> List[tuple]:
+        return [(None, 1)] * len(self._outputs)
+
+    def _validate(self, inputs: Dict[str, np.ndarray]) -> int:
+        missing = [name for name in INPUT_NAMES if name not in inputs]
+        if missing:
+            raise ValueError(f"Missing model inputs: {missing}")
+        numeric = inputs["numeric_input"]
+        expected = (self.sequence_length, self.num_numeric)
+        if numeric.ndim != 3 or numeric.shape[1:] != expected:
+            raise ValueError(
+                f"numeric_input must have shape (samples, {expected[0]}, {expected[1]}), got {numeric.shape}"
+            )
+        samples = numeric.shape[0]
+        for name in INPUT_NAMES[:3]:
+            if inputs[name].shape != (samples, self.sequence_length):
+                raise ValueError(f"{name} must have shape ({samples}, {self.sequence_length})")
+        return samples
+
+    def predict(self, inputs: Dict[str, np.ndarray], verbose: int = 0, batch_size: Optional[int] = None):
+        self._validate(inputs)
+        numeric = np.asarray(inputs["numeric_input"], dtype=np.float32)
+        per_step = numeric @ self._weights
+        central = 10.0 + 40.0 * (per_step @ self._time_weights)
+        central = np.maximum(central, 0.0).astype(np.float32).reshape(-1, 1)
+        return [central * QUANTILE_SCALES[index] for index in self._outputs]
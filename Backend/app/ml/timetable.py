@@ -0,0 +1,111 @@
+"""
+Timetable generation module
+Expands an hourly schedule into individual departures.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+import logging
+
+import pandas as pd
+
+from app.utils.logging import log_event
+
+logger = logging.getLogger(__name__)
+
+TIMETABLE_COLUMNS = [
+    "departure_id",
+    "trip_index",
+    "trip_id",
+    "departure_time",
+    "bus_index",
+    "buses_assigned",
+    "headway_minutes",
+]
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _parse_time(value: Union[str, datetime, None]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    parsed = pd.to_datetime(value, errors="coerce")
+    if pd.isna(parsed):
+        raise ValueError(f"Invalid timestamp in schedule: {value!r}")
+    return parsed.to_pydatetime()
+
+
+def iter_departures(
+    schedule: Iterable[Dict[str, Any]],
+    service_start: Union[str, datetime, None] = None,
+    service_day: Union[str, date, None] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily expand schedule items into departures.
+
+    Each item covers one hour starting at its `timestamp` (or, when items
+    carry no timestamp, `service_start` + trip_index hours). Departure slots
+    repeat every `adjusted_headway_minutes` and carry over into the next
+    hour, so a 22.5 minute headway does not restart at each hour boundary.
+    Every slot dispatches `buses_assigned` buses, staggered evenly across
+    the slot, each emitted as its own row with a `bus_index`.
+
+    When `service_day` is given, only departures on that date are emitted;
+    slot alignment is the same as for the unfiltered timetable. Rows are
+    produced one at a time; nothing beyond the current item is held.
+    """
+    start = _parse_time(service_start)
+    day = (
+        pd.to_datetime(service_day).date()
+        if isinstance(service_day, str)
+        else service_day
+    )
+
+    departure_id = 0
+    cursor: Optional[datetime] = None
+
+    for item in schedule:
+        trip_index = int(item.get("trip_index", 0))
+        hour_start = _parse_time(item.get("timestamp"))
+        if hour_start is None:
+            if start is None:
+                raise ValueError("service_start is required when schedule items have no timestamp")
+            hour_start = start + timedelta(hours=trip_index)
+        hour_end = hour_start + timedelta(hours=1)
+
+        headway = float(item.get("adjusted_headway_minutes") or 0.0)
+        if headway <= 0:
+            raise ValueError(f"Trip {trip_index} has a non-positive headway")
+        slot = timedelta(minutes=headway)
+        buses = max(1, int(item.get("buses_assigned") or 1))
+        stagger = slot / buses
+
+        if cursor is None or cursor < hour_start or cursor >= hour_end:
+            cursor = hour_start
+
+        if day is not None and hour_start.date() != day and hour_end.date() != day:
+            # Advance past this hour without emitting, keeping slot alignment
+            cursor += slot * -(-(hour_end - cursor) // slot)
+            continue
+
+        while cursor < hour_end:
+            for bus_index in range(buses):
+                departure = cursor + stagger * bus_index
+                if day is not None and departure.date() != day:
+                    continue
+                yield {
+                    "departure_id": departure_id,
+                    "trip_index": trip_index,
+                    "trip_id": item.get("trip_id"),
+                    "departure_time": departure.strftime(TIME_FORMAT),
+                    "bus_index": bus_index,
+                    "buses_assigned": buses,
+                    "headway_minutes": headway,
+                }
+                departure_id += 1
+            cursor += slot
+
+    log_event(logger, "info", "timetable_generated", departures=departure_id)
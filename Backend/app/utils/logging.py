@@ -3,9 +3,44 @@ Structured logging helpers.
 """
 from __future__ import annotations
 
+import atexit
 import json
 import logging
-from typing import Any, Dict
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "exception": logging.ERROR,
+}
+
+
+def _parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse "event=rate,event=rate" into a mapping."""
+    rates: Dict[str, float] = {}
+    for item in value.split(","):
+        event, _, rate = item.partition("=")
+        if event.strip() and rate.strip():
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+# Fraction of debug/info events kept per event name, e.g. LOG_SAMPLE_RATES="file_read=0.1"
+_sample_rates: Dict[str, float] = _parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+
+
+def set_sample_rate(event: str, rate: Optional[float]) -> None:
+    """Keep roughly `rate` of debug/info `event` logs; None removes sampling."""
+    if rate is None:
+        _sample_rates.pop(event, None)
+    else:
+        _sample_rates[event] = min(1.0, max(0.0, rate))
 
 
 def log_event(
@@ -16,18 +51,88 @@ def log_event(
 ) -> None:
     """
     Emit structured JSON logs with a consistent schema.
+
+    Nothing is serialized when `level` is disabled for `logger` or the event
+    is sampled out; sampled events carry their `sample_rate`.
     """
+    level_lower = level.lower()
+    levelno = _LEVELS.get(level_lower, logging.INFO)
+    if not logger.isEnabledFor(levelno):
+        return
+
     payload = {"event": event, **fields}
+    if levelno < logging.WARNING:
+        rate = _sample_rates.get(event)
+        if rate is not None and rate < 1.0:
+            if random.random() >= rate:
+                return
+            payload["sample_rate"] = rate
+
     message = json.dumps(payload, default=str, ensure_ascii=False)
-    level_lower = level.lower()
 
-    if level_lower == "debug":
-        logger.debug(message)
-    elif level_lower == "warning":
-        logger.warning(message)
-    elif level_lower == "error":
-        logger.error(message)
-    elif level_lower == "exception":
+    if level_lower == "exception":
         logger.exception(message)
     else:
-        logger.info(message)
+        logger.log(levelno, message)
+
+
+class JsonLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class _BackgroundQueueHandler(QueueHandler):
+    """Hands records to the listener thread unformatted (same process, no pickling)."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    background: Optional[bool] = None,
+) -> None:
+    """
+    Install the JSON formatter on the root logger.
+
+    With `background` (LOG_QUEUE, default on) request threads only enqueue
+    records; formatting and stream writes happen on a listener thread.
+    """
+    global _listener
+    level = level or os.getenv("LOG_LEVEL", "INFO")
+    if background is None:
+        background = os.getenv("LOG_QUEUE", "1").lower() not in ("0", "false", "no")
+
+    stop_logging()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonLogFormatter())
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level.upper())
+    if background:
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        root_logger.handlers = [_BackgroundQueueHandler(records)]
+        _listener = QueueListener(records, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    else:
+        root_logger.handlers = [stream_handler]
+
+
+def stop_logging() -> None:
+    """Flush and stop the background listener, if any."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,169 @@
+"""
+On-demand request profiling.
+Runs selected requests under cProfile and writes the results to disk.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import threading
+import uuid
+
+from app.utils.logging import log_event
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0").lower() in ("1", "true", "yes")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+PROFILE_HEADER = b"x-profile"
+REQUEST_ID_HEADER = b"x-request-id"
+
+# Pipeline functions listed first in the text report
+PIPELINE_FUNCTIONS = (
+    "parse_csv|aggregate_hourly_demand|build_features|preprocess_input"
+    "|predict|generate_schedule|diff_schedules"
+)
+
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+_TRUTHY = {"1", "true", "yes", "on"}
+
+# cProfile installs one process-wide hook: a second enable() would take it
+# over (or raise on 3.12+), so only one request is profiled at a time
+_profiling = threading.Lock()
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def profile_requested(scope) -> bool:
+    """True when the request carries `X-Profile: 1` or `?profile=1`."""
+    header = _header(scope, PROFILE_HEADER)
+    if header is not None and header.strip().lower() in _TRUTHY:
+        return True
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return any(value.lower() in _TRUTHY for value in query.get("profile", []))
+
+
+def request_id(scope) -> str:
+    """Caller's `X-Request-ID` when it is a safe file name, else a new id."""
+    value = _header(scope, REQUEST_ID_HEADER)
+    if value and _REQUEST_ID.match(value):
+        return value
+    return uuid.uuid4().hex
+
+
+def profile_id(scope) -> str:
+    """Unique profile file name: the request id plus a random suffix."""
+    return f"{request_id(scope)}-{uuid.uuid4().hex[:8]}"
+
+
+def write_profile(profiler: cProfile.Profile, directory: Path, profile_id: str, path: str) -> Path:
+    """Write `<id>.prof` (pstats) and `<id>.txt` (pipeline and top functions)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    stats_path = directory / f"{profile_id}.prof"
+    profiler.dump_stats(str(stats_path))
+
+    report = io.StringIO()
+    report.write(f"request: {path}\nprofile: {stats_path.name}\n\n")
+    stats = pstats.Stats(profiler, stream=report).strip_dirs()
+    stats.sort_stats("cumulative")
+    report.write("== pipeline functions ==\n")
+    stats.print_stats(PIPELINE_FUNCTIONS)
+    report.write("== top 40 by cumulative time ==\n")
+    stats.print_stats(40)
+    (directory / f"{profile_id}.txt").write_text(report.getvalue(), encoding="utf-8")
+    return stats_path
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests that ask for it (`X-Profile: 1` or `?profile=1`).
+
+    Only installed when PROFILING_ENABLED is set, so it costs nothing
+    otherwise. The profile covers the work done on the event loop thread
+    while the request runs, including async streamed bodies; sync endpoints
+    and sync streaming bodies run in Starlette's threadpool and are not
+    profiled. Other requests' coroutines running on the loop meanwhile show
+    up in the same profile. One request is profiled at a time; a second one
+    gets 409 until the first finishes. Responses carry `X-Profile-Id` naming
+    the files in PROFILE_DIR.
+    """
+
+    def __init__(self, app, directory: str = PROFILE_DIR):
+        self.app = app
+        self.directory = Path(directory)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not _profiling.acquire(blocking=False):
+            log_event(logger, "warning", "profile_rejected", path=scope["path"])
+            await self._reject(send)
+            return
+
+        current_id = profile_id(scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", current_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+                try:
+                    stats_path = write_profile(profiler, self.directory, current_id, scope["path"])
+                    log_event(
+                        logger,
+                        "info",
+                        "request_profiled",
+                        profile_id=current_id,
+                        path=scope["path"],
+                        file=str(stats_path),
+                    )
+                except OSError as e:
+                    log_event(logger, "warning", "profile_write_failed", error=str(e))
+        finally:
+            _profiling.release()
+
+    async def _reject(self, send) -> None:
+        body = json.dumps(
+            {
+                "detail": {
+                    "stage": "profiling",
+                    "message": "Another request is being profiled; retry later",
+                }
+            }
+        ).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 409,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,295 @@
+"""
+Request timing and metrics helpers.
+Per-stage durations for Server-Timing headers and Prometheus-format aggregates.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import threading
+import time
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+METRIC_PREFIX = "bus_api"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+
+    def describe(self, name: str, kind: str, text: str) -> None:
+        self._help[name] = (kind, text)
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1.0) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, labels: Dict[str, str], value: float) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(
+        self,
+        name: str,
+        labels: Dict[str, str],
+        value: float,
+        buckets: Sequence[float] = DURATION_BUCKETS,
+    ) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                self._header(lines, name, "counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for name, series in sorted(self._gauges.items()):
+                self._header(lines, name, "gauge")
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for labels, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        bucket_labels = labels + (("le", _format_value(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+                    inf_labels = labels + (("le", "+Inf"),)
+                    lines.append(f"{name}_bucket{_format_labels(inf_labels)} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str) -> None:
+        _, text = self._help.get(name, (kind, name))
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+registry = MetricsRegistry()
+
+REQUESTS_TOTAL = f"{METRIC_PREFIX}_requests_total"
+REQUEST_SECONDS = f"{METRIC_PREFIX}_request_duration_seconds"
+STAGE_SECONDS = f"{METRIC_PREFIX}_stage_duration_seconds"
+REQUEST_BYTES = f"{METRIC_PREFIX}_request_size_bytes"
+RESPONSE_BYTES = f"{METRIC_PREFIX}_response_size_bytes"
+
+registry.describe(REQUESTS_TOTAL, "counter", "HTTP requests by endpoint, method and status")
+registry.describe(REQUEST_SECONDS, "histogram", "Time from request start to response start")
+registry.describe(STAGE_SECONDS, "histogram", "Pipeline stage durations by endpoint")
+registry.describe(REQUEST_BYTES, "histogram", "Request body size")
+registry.describe(RESPONSE_BYTES, "histogram", "Response body size")
+
+
+class RequestTimings:
+    """
+    Stage durations for one request.
+
+    `mark(name)` closes the running stage and opens `name`; `add` records a
+    duration measured elsewhere. Blocks timed with `stage_timer` inside a
+    running stage are recorded as sub-stages (`preprocess.features`), so the
+    top-level stages never overlap and add up to the request time.
+    """
+    __slots__ = ("stages", "_open", "_opened_at", "_nested")
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+        self._open: Optional[str] = None
+        self._opened_at = 0.0
+        self._nested: List[str] = []
+
+    def mark(self, name: Optional[str]) -> None:
+        now = time.perf_counter()
+        if self._open is not None:
+            self.stages.append((self._open, now - self._opened_at))
+        self._open = name
+        self._opened_at = now
+
+    def close(self) -> None:
+        self.mark(None)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages.append((name, seconds))
+
+    def push(self, name: str) -> str:
+        """Enter a timed block; returns its name qualified by the enclosing stages."""
+        parents = ([self._open] if self._open is not None else []) + self._nested
+        self._nested.append(name)
+        return ".".join(parents + [name])
+
+    def pop(self) -> None:
+        self._nested.pop()
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages]
+        if total is not None:
+            entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def mark_stage(name: str) -> None:
+    """Start stage `name` for the current request (ends the previous one)."""
+    timings = _current.get()
+    if timings is not None:
+        timings.mark(name)
+
+
+@contextmanager
+def stage_timer(name: str) -> Iterator[None]:
+    """
+    Time a block as stage `name` of the current request.
+
+    Inside a running stage the block is recorded as a sub-stage named
+    `<stage>.<name>` rather than a second top-level stage.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    qualified = timings.push(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.pop()
+        timings.add(qualified, time.perf_counter() - started)
+
+
+def observe_stage(endpoint: str, stage: str, seconds: float) -> None:
+    """Record a stage duration measured outside a request (e.g. jobs)."""
+    registry.observe(STAGE_SECONDS, {"endpoint": endpoint, "stage": stage}, seconds)
+
+
+def _endpoint_label(scope: Dict[str, Any]) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    # Unmatched paths share one label to keep cardinality bounded
+    return path or "unmatched"
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware that times each HTTP request.
+
+    Adds a `Server-Timing` header with the stages recorded while handling
+    the request and feeds request counts, latencies, stage durations and
+    body sizes into `registry`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        request_bytes = 0
+        response_bytes = 0
+        status_code = 500
+        elapsed: Optional[float] = None
+
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_bytes, status_code, elapsed
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                timings.close()
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                header = timings.server_timing(elapsed)
+                headers.append((b"server-timing", header.encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            _current.reset(token)
+            endpoint = _endpoint_label(scope)
+            if elapsed is None:
+                elapsed = time.perf_counter() - started
+                timings.close()
+            registry.inc(
+                REQUESTS_TOTAL,
+                {"endpoint": endpoint, "method": scope["method"], "status": str(status_code)},
+            )
+            registry.observe(REQUEST_SECONDS, {"endpoint": endpoint}, elapsed)
+            registry.observe(REQUEST_BYTES, {"endpoint": endpoint}, request_bytes, SIZE_BUCKETS)
+            registry.observe(RESPONSE_BYTES, {"endpoint": endpoint}, response_bytes, SIZE_BUCKETS)
+            for stage, seconds in timings.stages:
+                registry.observe(STAGE_SECONDS, {"endpoint": endpoint, "stage": stage}, seconds)
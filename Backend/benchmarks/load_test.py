@@ -0,0 +1,242 @@
+"""
+In-process load test for the FastAPI app.
+
+Drives `app.main:app` through httpx's ASGI transport (no sockets, no server)
+with a fixed number of concurrent clients and a weighted mix of
+/v1/predict, /v1/schedule and /v1/predict-schedule requests, then reports
+throughput, status counts and latency percentiles per endpoint. Inference
+uses the stub model, so no .keras asset is needed.
+
+Usage (from Backend/):
+    python -m benchmarks.load_test --concurrency 8 --requests 400 \
+        --mix predict=2,schedule=1,predict-schedule=1 --output load.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ENDPOINTS = ("predict", "schedule", "predict-schedule")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}; choose from {ENDPOINTS}")
+        mix[name] = float(weight) if weight.strip() else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("mix needs at least one positive weight")
+    return mix
+
+
+def build_payloads(hours: int, routes: int) -> Dict[str, Any]:
+    """Upload body for the prediction routes and a matching /v1/schedule request."""
+    from benchmarks.pipeline import ticket_export
+    from app.api.predict import parse_csv
+    from app.api.responses import quantile_arrays
+    from app.ml import loader
+    from app.ml.adapters.mongo_csv_adapter import aggregate_hourly_demand
+    from app.ml.preprocess import preprocess_input
+
+    content = ticket_export(hours, routes)
+    inputs = preprocess_input(aggregate_hourly_demand(parse_csv(content)))
+    p50 = dict(quantile_arrays(loader.get_model().predict(inputs, verbose=0)))["p50"]
+    return {
+        "csv": content,
+        "schedule": {
+            "prediction_output": {"predictions": [{"quantile": "p50", "values": p50.tolist()}]},
+            "capacity": 50,
+        },
+    }
+
+
+async def _request(client, endpoint: str, payloads: Dict[str, Any]):
+    if endpoint == "schedule":
+        return await client.post("/v1/schedule", json=payloads["schedule"])
+    files = {"file": ("tickets.csv", payloads["csv"], "text/csv")}
+    return await client.post(f"/v1/{endpoint}", files=files)
+
+
+class _AppLoop:
+    """
+    Event loop thread that runs the app. The endpoints do CPU-bound work on
+    their loop, so clients live on a separate loop and their latencies
+    include the time requests wait behind the busy app loop.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="app-loop", daemon=True)
+        self.thread.start()
+
+    async def call(self, coro):
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+async def drive(
+    app,
+    payloads: Dict[str, Any],
+    mix: Dict[str, float],
+    concurrency: int,
+    total_requests: Optional[int],
+    duration: Optional[float],
+    seed: int = 0,
+) -> Tuple[List[Tuple[str, int, float]], float]:
+    """Run `concurrency` clients until `total_requests` or `duration` is reached."""
+    import httpx
+
+    names = list(mix)
+    weights = np.array([mix[name] for name in names], dtype=float)
+    rng = np.random.default_rng(seed)
+    plan = iter(rng.choice(names, size=total_requests or 10**7, p=weights / weights.sum()))
+    deadline = time.perf_counter() + duration if duration else None
+    records: List[Tuple[str, int, float]] = []
+
+    app_loop = _AppLoop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest")
+
+    async def worker() -> None:
+        for endpoint in plan:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            started = time.perf_counter()
+            try:
+                response = await app_loop.call(_request(client, str(endpoint), payloads))
+                status = response.status_code
+            except Exception:
+                status = 0  # transport/app crash
+            records.append((str(endpoint), status, time.perf_counter() - started))
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        await app_loop.call(client.aclose())
+    finally:
+        app_loop.close()
+    return records, elapsed
+
+
+def summarize(records: List[Tuple[str, int, float]], elapsed: float) -> Dict[str, Any]:
+    def stats(rows: List[Tuple[str, int, float]]) -> Dict[str, Any]:
+        latencies = np.array([row[2] for row in rows]) * 1000.0
+        ok = sum(1 for row in rows if 200 <= row[1] < 300)
+        summary: Dict[str, Any] = {
+            "requests": len(rows),
+            "ok": ok,
+            "statuses": dict(sorted(Counter(str(row[1]) for row in rows).items())),
+            "throughput_rps": len(rows) / elapsed if elapsed > 0 else 0.0,
+        }
+        if len(rows):
+            for q in PERCENTILES:
+                summary[f"p{q}_ms"] = float(np.percentile(latencies, q))
+            summary["mean_ms"] = float(latencies.mean())
+            summary["max_ms"] = float(latencies.max())
+        return summary
+
+    by_endpoint = {
+        name: stats([row for row in records if row[0] == name])
+        for name in ENDPOINTS
+        if any(row[0] == name for row in records)
+    }
+    return {"elapsed_s": elapsed, "overall": stats(records), "endpoints": by_endpoint}
+
+
+def run(
+    concurrency: int,
+    total_requests: Optional[int],
+    duration: Optional[float],
+    mix: Dict[str, float],
+    hours: int,
+    routes: int,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    from app.ml import loader
+    from app.ml.stub_model import StubQuantileModel
+
+    loader.set_model(StubQuantileModel())
+    from app.main import app
+
+    payloads = build_payloads(hours, routes)
+    records, elapsed = asyncio.run(
+        drive(app, payloads, mix, concurrency, total_requests, duration, seed)
+    )
+    return {
+        "suite": "load_test",
+        "concurrency": concurrency,
+        "mix": mix,
+        "hours": hours,
+        "routes": routes,
+        **summarize(records, elapsed),
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(
+        f"{report['overall']['requests']} requests in {report['elapsed_s']:.2f}s "
+        f"({report['overall']['throughput_rps']:.1f} req/s), concurrency {report['concurrency']}"
+    )
+    header = f"{'endpoint':<18}{'count':>7}{'ok':>6}{'rps':>8}" + "".join(
+        f"{f'p{q} ms':>10}" for q in PERCENTILES
+    ) + f"{'max ms':>10}  statuses"
+    print(header)
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, stats in rows:
+        line = f"{name:<18}{stats['requests']:>7}{stats['ok']:>6}{stats['throughput_rps']:>8.1f}"
+        line += "".join(f"{stats.get(f'p{q}_ms', 0.0):>10.1f}" for q in PERCENTILES)
+        line += f"{stats.get('max_ms', 0.0):>10.1f}  {stats['statuses']}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="total requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("predict=1,schedule=1,predict-schedule=1"))
+    parser.add_argument("--hours", type=int, default=720, help="hours covered by each upload")
+    parser.add_argument("--routes", type=int, default=1, help="routes in each upload")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="ERROR", help="app LOG_LEVEL during the run")
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    args = parser.parse_args()
+
+    # Read by app.main at import time
+    os.environ["LOG_LEVEL"] = args.log_level
+    report = run(
+        concurrency=args.concurrency,
+        total_requests=None if args.duration else args.requests,
+        duration=args.duration,
+        mix=args.mix,
+        hours=args.hours,
+        routes=args.routes,
+        seed=args.seed,
+    )
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
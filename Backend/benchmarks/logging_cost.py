@@ -0,0 +1,182 @@
+"""
+Per-request logging cost benchmark.
+
+Replays the log statements of one predict-schedule request (handler events
+plus the feature engineering / preprocessing messages) in their previous
+form (eager f-strings at INFO, `log_event` always serializing) and their
+current form (level-checked, lazy DEBUG messages), under a synchronous
+stream handler and the background queue handler.
+
+Usage (from Backend/):
+    python -m benchmarks.logging_cost --input test_input_large.csv --repeat 2000
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import logging
+import statistics
+import time
+from typing import Any, Callable, Dict
+
+import pandas as pd
+
+from app.utils import logging as app_logging
+from app.utils.logging import JsonLogFormatter, configure_logging, log_event, stop_logging
+
+handler_logger = logging.getLogger("app.api.v1.predict_schedule")
+feature_logger = logging.getLogger("app.ml.feature_engineering")
+
+
+class SlowSink(io.StringIO):
+    """Stream whose writes block briefly, like a busy stdout pipe."""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay)
+        return len(text)
+
+
+class NullSink(io.StringIO):
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def _previous_log_event(logger: logging.Logger, level: str, event: str, **fields: Any) -> None:
+    message = json.dumps({"event": event, **fields}, default=str, ensure_ascii=False)
+    getattr(logger, "exception" if level == "exception" else level)(message)
+
+
+def _previous_request(df: pd.DataFrame) -> None:
+    logger = feature_logger
+    _previous_log_event(handler_logger, "info", "predict_schedule_v1_request_received", filename="input.csv")
+    _previous_log_event(handler_logger, "info", "file_read", bytes=123456)
+    _previous_log_event(handler_logger, "info", "csv_parsed", rows=len(df), columns=list(df.columns))
+    logger.info("=" * 60)
+    logger.info("Starting preprocessing pipeline")
+    logger.info("=" * 60)
+    logger.info(f"✓ Input validation passed: {len(df)} rows (minimum: 31)")
+    logger.info("=" * 60)
+    logger.info("Starting feature engineering pipeline")
+    logger.info("=" * 60)
+    logger.info(f"✓ DataFrame validated: {len(df)} rows, columns: {list(df.columns)}")
+    logger.info(f"✓ Timestamps cleaned: {df['timestamp'].min()} to {df['timestamp'].max()}")
+    logger.info("✓ Data sorted by timestamp")
+    logger.info(f"✓ Complete hourly series: {len(df)} rows")
+    logger.info("✓ Time features created: hour, minute, dayofweek, day, month, is_weekend")
+    logger.info(f"✓ Lag features created: {[1, 2, 3, 7, 14, 21, 30]}")
+    logger.info(f"✓ Rolling features created: windows={[3, 7, 14, 21, 30]}")
+    logger.info("✓ Domain features created: capacity, peak season, pilgrimage indicators")
+    logger.info(f"✓ Removed {30} rows with NaN values")
+    logger.info(f"✓ Feature engineering complete: {len(df)} rows, {len(df.columns)} columns")
+    logger.info(f"  Columns: {list(df.columns)}")
+    logger.info("=" * 60)
+    for message in ("Extracted features", "Features scaled", "Appended categorical", "Created sequences", "Created sequences"):
+        logger.info(f"✓ {message}: shape={(len(df), 20)}")
+    logger.info("✓ Preprocessing complete: model inputs prepared")
+    for _ in range(4):
+        logger.info(f"  - Samples: {len(df)}")
+    logger.info("=" * 60)
+    _previous_log_event(handler_logger, "info", "preprocess_complete", samples=len(df))
+    _previous_log_event(handler_logger, "info", "predict_schedule_v1_request_completed")
+
+
+def _current_request(df: pd.DataFrame) -> None:
+    logger = feature_logger
+    log_event(handler_logger, "info", "predict_schedule_v1_request_received", filename="input.csv")
+    log_event(handler_logger, "info", "file_read", bytes=123456)
+    log_event(handler_logger, "info", "csv_parsed", rows=len(df), columns=list(df.columns))
+    logger.debug("=" * 60)
+    logger.debug("Starting preprocessing pipeline")
+    logger.debug("=" * 60)
+    logger.debug("✓ Input validation passed: %s rows (minimum: %s)", len(df), 31)
+    logger.debug("=" * 60)
+    logger.debug("Starting feature engineering pipeline")
+    logger.debug("=" * 60)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("✓ DataFrame validated: %s rows, columns: %s", len(df), list(df.columns))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("✓ Timestamps cleaned: %s to %s", df["timestamp"].min(), df["timestamp"].max())
+    logger.debug("✓ Data sorted by timestamp")
+    logger.debug("✓ Complete hourly series: %s rows", len(df))
+    logger.debug("✓ Time features created: hour, minute, dayofweek, day, month, is_weekend")
+    logger.debug("✓ Lag features created: %s", [1, 2, 3, 7, 14, 21, 30])
+    logger.debug("✓ Rolling features created: windows=%s", [3, 7, 14, 21, 30])
+    logger.debug("✓ Domain features created: capacity, peak season, pilgrimage indicators")
+    logger.debug("✓ Removed %s rows with NaN values", 30)
+    logger.debug("✓ Feature engineering complete: %s rows, %s columns", len(df), len(df.columns))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("  Columns: %s", list(df.columns))
+    logger.debug("=" * 60)
+    for message in ("Extracted features", "Features scaled", "Appended categorical", "Created sequences", "Created sequences"):
+        logger.debug("✓ %s: shape=%s", message, (len(df), 20))
+    logger.debug("✓ Preprocessing complete: model inputs prepared")
+    for _ in range(4):
+        logger.debug("  - Samples: %s", len(df))
+    logger.debug("=" * 60)
+    log_event(handler_logger, "info", "preprocess_complete", samples=len(df))
+    log_event(handler_logger, "info", "predict_schedule_v1_request_completed")
+
+
+def _setup(background: bool, sink: io.StringIO) -> None:
+    stop_logging()
+    if background:
+        configure_logging(level="INFO", background=True)
+        app_logging._listener.handlers[0].setStream(sink)
+        return
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(JsonLogFormatter())
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+
+
+def _time(func: Callable[[], None], repeat: int) -> float:
+    func()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def run(input_path: str, repeat: int, slow_write_us: float) -> Dict[str, float]:
+    df = pd.read_csv(input_path)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    cases = {
+        "previous_sync": (_previous_request, False),
+        "current_sync": (_current_request, False),
+        "current_queue": (_current_request, True),
+    }
+    results: Dict[str, float] = {}
+    for sink_name, make_sink in (
+        ("fast", NullSink),
+        ("slow", lambda: SlowSink(slow_write_us / 1e6)),
+    ):
+        for name, (request, background) in cases.items():
+            _setup(background, make_sink())
+            results[f"{name}/{sink_name}_sink"] = _time(lambda: request(df), repeat)
+            stop_logging()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--input", default="test_input_large.csv")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--slow-write-us", type=float, default=50.0, help="per-write delay of the slow sink")
+    args = parser.parse_args()
+
+    results = run(args.input, args.repeat, args.slow_write_us)
+    print(f"{'case':<30}{'us/request':>12}")
+    for name, micros in results.items():
+        print(f"{name:<30}{micros:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
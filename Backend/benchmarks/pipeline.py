@@ -0,0 +1,242 @@
+"""
+End-to-end prediction pipeline benchmark.
+
+Times parse_csv, aggregate_hourly_demand, build_features, preprocess_input,
+inference and generate_schedule separately on synthetic ticket exports of
+`hours` x `routes` (samples interleaved across cases, plus a reference
+workload for cross-run normalization), and records each stage's peak
+traced memory. Inference uses the stub model (same inputs/outputs as the
+.keras asset) unless --real-model is given.
+
+Usage (from Backend/):
+    python -m benchmarks.pipeline --hours 168,720,2160 --routes 1,8 --output results.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.api.predict import parse_csv
+from app.api.responses import quantile_arrays
+from app.ml import loader
+from app.ml.adapters.mongo_csv_adapter import aggregate_hourly_demand
+from app.ml.feature_engineering import build_features
+from app.ml.preprocess import preprocess_input
+from app.ml.scheduler import generate_schedule
+from app.ml.stub_model import StubQuantileModel
+from benchmarks.synthetic import ticket_frame
+
+STAGES = (
+    "parse_csv",
+    "aggregate_hourly_demand",
+    "build_features",
+    "preprocess_input",
+    "inference",
+    "generate_schedule",
+)
+
+def ticket_export(hours: int, routes: int, seed: int = 0) -> bytes:
+    """Synthetic Mongo-style ticket CSV covering `hours` hours on `routes` routes."""
+    # At least one booking per route-hour keeps the hourly series gap-free
+    frame = ticket_frame(hours, routes, peak_rate=4.5, min_bookings=1, seed=seed)
+    return frame.to_csv(index=False).encode("utf-8")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(model_name: str) -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "git_commit": _git_commit(),
+        "model": model_name,
+    }
+
+
+def peak_bytes(func: Callable[[], Any]) -> int:
+    """Peak memory traced by tracemalloc while `func` runs (numpy buffers included)."""
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - baseline)
+
+
+def median_abs_deviation(samples: Sequence[float]) -> float:
+    center = statistics.median(samples)
+    return statistics.median(abs(value - center) for value in samples)
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    quartiles = statistics.quantiles(samples, n=4) if len(samples) > 1 else [samples[0]] * 3
+    return {
+        "samples_ms": [round(value, 4) for value in samples],
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "iqr_ms": quartiles[2] - quartiles[0],
+        "mad_ms": median_abs_deviation(samples),
+    }
+
+
+def _reference_workload() -> None:
+    # Fixed mix of interpreter, numpy and pandas work resembling the pipeline;
+    # its timing is the machine speed factor used to compare runs
+    frame = pd.DataFrame({"key": np.arange(20_000) % 24, "value": np.linspace(0.0, 1.0, 20_000)})
+    frame.groupby("key")["value"].sum()
+    frame["value"].rolling(7).mean()
+    sum(i * i for i in range(50_000))
+
+
+def sample_interleaved(
+    funcs: List[Callable[[], Any]],
+    repeat: int,
+    warmup: int = 1,
+) -> List[List[float]]:
+    """
+    `repeat` wall-clock samples (ms) per function, taken round-robin after
+    `warmup` untimed rounds, so slow periods on a noisy machine hit every
+    case alike.
+    """
+    for _ in range(max(1, warmup)):
+        for func in funcs:
+            func()
+    samples: List[List[float]] = [[] for _ in funcs]
+    for _ in range(repeat):
+        for index, func in enumerate(funcs):
+            start = time.perf_counter()
+            func()
+            samples[index].append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def stage_inputs(
+    hours: int,
+    routes: int,
+    model,
+) -> Tuple[Dict[str, Callable[[], Any]], Dict[str, int]]:
+    """One zero-argument callable per stage, each fed the previous stage's real output."""
+    content = ticket_export(hours, routes)
+    tickets = parse_csv(content)
+    hourly = aggregate_hourly_demand(tickets)
+    config = loader.get_feature_config()
+    inputs = preprocess_input(hourly)
+    predictions = model.predict(inputs, verbose=0)
+    p50 = dict(quantile_arrays(predictions))["p50"]
+    payload = {"predictions": [{"quantile": "p50", "values": p50.tolist()}]}
+
+    return {
+        "parse_csv": lambda: parse_csv(content),
+        "aggregate_hourly_demand": lambda: aggregate_hourly_demand(tickets),
+        "build_features": lambda: build_features(hourly, config),
+        "preprocess_input": lambda: preprocess_input(hourly),
+        "inference": lambda: model.predict(inputs, verbose=0),
+        "generate_schedule": lambda: generate_schedule(prediction_payload=payload, capacity=50),
+    }, {
+        "ticket_rows": len(tickets),
+        "hourly_rows": len(hourly),
+        "samples": len(p50),
+        "csv_bytes": len(content),
+    }
+
+
+def run(
+    hours: Sequence[int],
+    routes: Sequence[int],
+    repeat: int,
+    stages: Sequence[str] = STAGES,
+    real_model: bool = False,
+    warmup: int = 1,
+) -> Dict[str, Any]:
+    if real_model:
+        model, model_name = loader.get_model(), "keras"
+    else:
+        model, model_name = StubQuantileModel(), "stub"
+        loader.set_model(model)
+
+    cases = []
+    for route_count in routes:
+        for hour_count in hours:
+            funcs, sizes = stage_inputs(hour_count, route_count, model)
+            for stage in stages:
+                cases.append(({"stage": stage, "hours": hour_count, "routes": route_count, **sizes}, funcs[stage]))
+
+    funcs = [func for _, func in cases] + [_reference_workload]
+    *case_samples, reference = sample_interleaved(funcs, repeat, warmup)
+    results: List[Dict[str, Any]] = [
+        {**info, **summarize(samples), "peak_bytes": peak_bytes(func)}
+        for (info, func), samples in zip(cases, case_samples)
+    ]
+    return {
+        "suite": "pipeline",
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "repeat": repeat,
+        "warmup": warmup,
+        # Reference workload sampled alongside the cases, for cross-run normalization
+        "calibration_ms": statistics.median(reference),
+        "environment": environment(model_name),
+        "results": results,
+    }
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=_int_list, default=[168, 720, 2160], help="comma-separated hour counts")
+    parser.add_argument("--routes", type=_int_list, default=[1, 8], help="comma-separated route counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of stages")
+    parser.add_argument("--real-model", action="store_true", help="load the .keras asset instead of the stub")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    stages = [stage for stage in args.stages.split(",") if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {sorted(unknown)}")
+
+    report = run(args.hours, args.routes, args.repeat, stages, args.real_model)
+    print(f"model: {report['environment']['model']}  commit: {report['environment']['git_commit']}")
+    print(f"{'stage':<26}{'hours':>7}{'routes':>7}{'median ms':>12}{'iqr ms':>10}{'peak MiB':>10}")
+    for row in report["results"]:
+        print(
+            f"{row['stage']:<26}{row['hours']:>7}{row['routes']:>7}"
+            f"{row['median_ms']:>12.2f}{row['iqr_ms']:>10.2f}{row['peak_bytes'] / 2**20:>10.2f}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
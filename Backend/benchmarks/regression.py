@@ -0,0 +1,251 @@
+"""
+Performance regression gate.
+
+Runs the pipeline benchmark with the configuration stored in a committed
+baseline file and compares each (stage, hours, routes) case against it.
+A case regresses when its median is slower than the baseline's by more
+than `--threshold` and by more than `--noise` standard errors of the
+difference of the two medians (and at least `--min-ms`). The standard
+errors come from each run's median absolute deviation, so a few outlier
+samples do not widen the margin the way an IQR does. Peak memory is
+checked against `--memory-threshold`. With `--normalize`, timings are first
+scaled by the ratio of the runs' calibration workloads, for comparing runs
+from machines of different speed. Exits 1 on any regression.
+
+Usage (from Backend/):
+    python -m benchmarks.regression                     # compare with benchmarks/baseline.json
+    python -m benchmarks.regression --update-baseline   # re-record after an intended change
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import statistics
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from benchmarks import pipeline
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+DEFAULT_HOURS = [720, 2160]
+DEFAULT_ROUTES = [1, 4]
+DEFAULT_REPEAT = 25
+DEFAULT_WARMUP = 3
+
+# MAD -> standard deviation for normal data, and the median's asymptotic
+# efficiency (its standard error is 1.2533 * sigma / sqrt(n))
+MAD_TO_SIGMA = 1.4826
+MEDIAN_SE_FACTOR = 1.2533
+
+Key = Tuple[str, int, int]
+
+
+def _index(report: Dict[str, Any]) -> Dict[Key, Dict[str, Any]]:
+    return {(row["stage"], row["hours"], row["routes"]): row for row in report["results"]}
+
+
+def median_standard_error(row: Dict[str, Any], scale: float = 1.0) -> float:
+    """Standard error of a case's median estimated from its samples' MAD."""
+    samples = [value / scale for value in row.get("samples_ms") or []]
+    if len(samples) < 2:
+        return 0.0
+    center = statistics.median(samples)
+    mad = statistics.median(abs(value - center) for value in samples)
+    return MEDIAN_SE_FACTOR * MAD_TO_SIGMA * mad / math.sqrt(len(samples))
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float,
+    noise: float,
+    min_ms: float,
+    memory_threshold: float,
+    normalize: bool = False,
+) -> List[Dict[str, Any]]:
+    """One verdict per case: ok, improved, regression, new or missing."""
+    base_rows = _index(baseline)
+    speed = speed_factor(baseline, current) if normalize else 1.0
+    verdicts: List[Dict[str, Any]] = []
+    for key, row in _index(current).items():
+        base = base_rows.get(key)
+        if base is None:
+            verdicts.append({"case": key, "status": "new", "median_ms": row["median_ms"]})
+            continue
+
+        median = row["median_ms"] / speed
+        delta = median - base["median_ms"]
+        change = delta / base["median_ms"] if base["median_ms"] else 0.0
+        standard_error = math.hypot(median_standard_error(row, speed), median_standard_error(base))
+        margin = max(min_ms, noise * standard_error)
+        if change > threshold and delta > margin:
+            status = "regression"
+        elif change < -threshold and -delta > margin:
+            status = "improved"
+        else:
+            status = "ok"
+
+        memory_change = (
+            (row["peak_bytes"] - base["peak_bytes"]) / base["peak_bytes"] if base["peak_bytes"] else 0.0
+        )
+        memory_status = "regression" if memory_change > memory_threshold else "ok"
+
+        verdicts.append(
+            {
+                "case": key,
+                "status": status,
+                "baseline_ms": base["median_ms"],
+                "median_ms": median,
+                "raw_median_ms": row["median_ms"],
+                "change": change,
+                "margin_ms": margin,
+                # Too noisy to resolve a `threshold` change either way
+                "noisy": noise * standard_error > threshold * base["median_ms"],
+                "memory_status": memory_status,
+                "memory_change": memory_change,
+            }
+        )
+    for key in base_rows.keys() - _index(current).keys():
+        verdicts.append({"case": key, "status": "missing"})
+    return verdicts
+
+
+def speed_factor(baseline: Dict[str, Any], current: Dict[str, Any]) -> float:
+    """How much slower (>1) the current run's machine was than the baseline's."""
+    before = baseline.get("calibration_ms")
+    after = current.get("calibration_ms")
+    if not before or not after:
+        return 1.0
+    return after / before
+
+
+def _environment_warnings(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    warnings = []
+    for field in ("machine", "python", "numpy", "pandas", "model"):
+        before = baseline["environment"].get(field)
+        after = current["environment"].get(field)
+        if before != after:
+            warnings.append(f"{field} differs from baseline ({before} -> {after})")
+    return warnings
+
+
+def print_report(verdicts: List[Dict[str, Any]], warnings: List[str]) -> None:
+    for warning in warnings:
+        print(f"warning: {warning}")
+    print(
+        f"{'stage':<26}{'hours':>7}{'routes':>7}{'base ms':>10}{'now ms':>10}"
+        f"{'change':>9}{'mem':>8}  status"
+    )
+    for verdict in sorted(verdicts, key=lambda v: v["case"]):
+        stage, hours, routes = verdict["case"]
+        if verdict["status"] in ("new", "missing"):
+            print(f"{stage:<26}{hours:>7}{routes:>7}{'':>44}  {verdict['status']}")
+            continue
+        labels = []
+        if verdict["status"] != "ok":
+            labels.append(verdict["status"].upper() if verdict["status"] == "regression" else verdict["status"])
+        if verdict["memory_status"] == "regression":
+            labels.append("MEMORY REGRESSION")
+        if verdict["noisy"]:
+            labels.append("noisy, rerun")
+        print(
+            f"{stage:<26}{hours:>7}{routes:>7}{verdict['baseline_ms']:>10.2f}{verdict['median_ms']:>10.2f}"
+            f"{verdict['change']:>+9.1%}{verdict['memory_change']:>+8.0%}  {', '.join(labels) or 'ok'}"
+        )
+
+
+def has_regression(verdicts: List[Dict[str, Any]]) -> bool:
+    return any(
+        verdict["status"] == "regression" or verdict.get("memory_status") == "regression"
+        for verdict in verdicts
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--update-baseline", action="store_true", help="run the suite and overwrite the baseline")
+    parser.add_argument("--repeat", type=int, help="samples per case (default: the baseline's)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    parser.add_argument("--warmup", type=int, help="untimed rounds before sampling (default: the baseline's)")
+    parser.add_argument(
+        "--noise",
+        type=float,
+        default=3.0,
+        help="required slowdown in standard errors of the median difference",
+    )
+    parser.add_argument("--min-ms", type=float, default=0.5, help="ignore differences smaller than this")
+    parser.add_argument("--memory-threshold", type=float, default=0.20)
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="scale timings by the calibration workload (baseline recorded on another machine)",
+    )
+    parser.add_argument("--output", help="write the current run and verdicts as JSON")
+    args = parser.parse_args()
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        report = pipeline.run(
+            DEFAULT_HOURS,
+            DEFAULT_ROUTES,
+            args.repeat or DEFAULT_REPEAT,
+            warmup=args.warmup or DEFAULT_WARMUP,
+        )
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"wrote {baseline_path} ({len(report['results'])} cases)")
+        return
+
+    if not baseline_path.exists():
+        sys.exit(f"no baseline at {baseline_path}; run with --update-baseline first")
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    hours = sorted({row["hours"] for row in baseline["results"]})
+    routes = sorted({row["routes"] for row in baseline["results"]})
+    stages = [stage for stage in pipeline.STAGES if any(row["stage"] == stage for row in baseline["results"])]
+    current = pipeline.run(
+        hours,
+        routes,
+        args.repeat or baseline["repeat"],
+        stages,
+        warmup=args.warmup or baseline.get("warmup", DEFAULT_WARMUP),
+    )
+
+    verdicts = compare(
+        baseline,
+        current,
+        threshold=args.threshold,
+        noise=args.noise,
+        min_ms=args.min_ms,
+        memory_threshold=args.memory_threshold,
+        normalize=args.normalize,
+    )
+    speed = speed_factor(baseline, current)
+    print(
+        f"baseline {baseline['environment'].get('git_commit')} vs "
+        f"current {current['environment'].get('git_commit')}, speed factor {speed:.2f}"
+        + (" (now ms are normalized to the baseline machine)" if args.normalize else "")
+    )
+    warnings = _environment_warnings(baseline, current)
+    if not args.normalize and abs(speed - 1.0) > 0.25:
+        warnings.append(f"calibration workload {speed:.2f}x the baseline's; different machine? (see --normalize)")
+    print_report(verdicts, warnings)
+
+    if args.output:
+        serializable = [{**verdict, "case": list(verdict["case"])} for verdict in verdicts]
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"current": current, "verdicts": serializable}, f, indent=2)
+
+    regressed = has_regression(verdicts)
+    print("FAIL: performance regression" if regressed else "PASS")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
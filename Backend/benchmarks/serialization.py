@@ -0,0 +1,135 @@
+"""
+Serialization benchmark for prediction and schedule responses.
+
+Compares the previous response path (Python lists -> pydantic model ->
+model_dump -> stdlib json) with the single-pass numpy encoder.
+
+Usage (from Backend/):
+    python -m benchmarks.serialization --values 10000 --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from app.api.responses import (
+    FastJSONResponse,
+    build_predict_response,
+    build_schedule_response,
+    model_to_dict,
+    orjson,
+)
+from app.api.schemas import (
+    ApiMetadata,
+    ConfidenceBounds,
+    PredictResponseV1,
+    ScheduleResponseV1,
+)
+from app.ml.scheduler import generate_schedule
+
+
+def _fake_predictions(num_values: int, seed: int = 0) -> List[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    p50 = rng.uniform(5.0, 120.0, size=(num_values, 1)).astype(np.float32)
+    return [p50, p50 * 0.6, p50, p50 * 1.4, p50 * 1.8]
+
+
+def _previous_predict_body(predictions: List[np.ndarray], num_samples: int) -> bytes:
+    names = ["mean", "p10", "p50", "p90", "p99"]
+    series = [
+        {"quantile": name, "values": output.flatten().tolist()}
+        for name, output in zip(names, predictions)
+    ]
+    values = {item["quantile"]: item["values"] for item in series}
+    response = PredictResponseV1(
+        predictions=series,
+        confidence_bounds=[
+            ConfidenceBounds(
+                lower_quantile="p10",
+                upper_quantile="p90",
+                lower=values["p10"],
+                upper=values["p90"],
+            )
+        ],
+        metadata=ApiMetadata(api_version="v1", num_predictions=num_samples, quantiles=names),
+        warnings=[],
+    )
+    return JSONResponse(content=model_to_dict(response)).body
+
+
+def _previous_schedule_body(result: Dict[str, Any]) -> bytes:
+    response = ScheduleResponseV1(
+        schedule=result["schedule"],
+        summary=result["summary"],
+        parameters=result["parameters"],
+        rules=result["rules"],
+        metadata=ApiMetadata(api_version="v1"),
+        warnings=[],
+    )
+    return JSONResponse(content=model_to_dict(response)).body
+
+
+def _time(func: Callable[[], bytes], repeat: int) -> Dict[str, float]:
+    func()  # warm-up
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+        size = len(body)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "bytes": size,
+    }
+
+
+def run(num_values: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    predictions = _fake_predictions(num_values)
+    schedule_result = generate_schedule(
+        prediction_payload={
+            "predictions": [{"quantile": "p50", "values": predictions[2].ravel().tolist()}]
+        },
+        capacity=50,
+    )
+    return {
+        "predict_before": _time(
+            lambda: _previous_predict_body(predictions, num_values), repeat
+        ),
+        "predict_after": _time(
+            lambda: FastJSONResponse(
+                content=build_predict_response(predictions, num_values)
+            ).body,
+            repeat,
+        ),
+        "schedule_before": _time(lambda: _previous_schedule_body(schedule_result), repeat),
+        "schedule_after": _time(
+            lambda: FastJSONResponse(content=build_schedule_response(schedule_result)).body,
+            repeat,
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--values", type=int, default=10000, help="values per quantile series")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = run(args.values, args.repeat)
+    print(f"encoder: {'orjson' if orjson is not None else 'stdlib json'}")
+    print(f"{'case':<18}{'median ms':>12}{'min ms':>12}{'bytes':>12}")
+    for name, stats in results.items():
+        print(
+            f"{name:<18}{stats['median_ms']:>12.2f}{stats['min_ms']:>12.2f}{stats['bytes']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Vectorized synthetic data generator.
+
+Produces multi-route ticket exports in the Mongo schema
+(from,to,adult_count,child_count,adult_price,child_price,total,payment_method,created_at)
+and hourly `timestamp,demand` series with daily, weekly and annual
+seasonality. Everything is generated with numpy in week-sized blocks
+(in parallel with --workers) and streamed to CSV (optionally .gz) or
+Parquet, so output size is bounded only by disk. The same arguments and
+seed always produce the same file, whatever the worker count.
+
+Usage (from Backend/):
+    python -m benchmarks.synthetic tickets --routes 20 --days 90 --output tickets.parquet
+    python -m benchmarks.synthetic hourly --routes 1 --days 365 --output demand.csv
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Callable, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+PAYMENT_METHODS = np.array(["CASH", "CARD", "MOBILE"])
+PAYMENT_WEIGHTS = np.array([0.45, 0.40, 0.15])
+
+# Relative demand by hour of day (peaks 07-09 and 16-18)
+WEEKDAY_PROFILE = np.array(
+    [0.05, 0.03, 0.03, 0.03, 0.08, 0.25, 0.65, 1.00, 1.00, 0.70, 0.50, 0.50,
+     0.55, 0.50, 0.50, 0.60, 0.85, 1.00, 0.90, 0.60, 0.40, 0.25, 0.15, 0.10]
+)
+# Flatter, later-starting profile for Saturday/Sunday
+WEEKEND_PROFILE = np.array(
+    [0.08, 0.05, 0.03, 0.03, 0.03, 0.08, 0.20, 0.35, 0.50, 0.65, 0.75, 0.80,
+     0.80, 0.80, 0.75, 0.70, 0.70, 0.65, 0.55, 0.45, 0.35, 0.25, 0.18, 0.12]
+)
+WEEKEND_LEVEL = 0.7
+# Relative demand by month (January = 0); summer and December peaks
+MONTH_PROFILE = np.array([0.90, 0.85, 0.95, 1.00, 1.05, 1.15, 1.30, 1.30, 1.05, 1.00, 0.95, 1.20])
+
+BLOCK_HOURS = 24 * 7
+
+
+def _route_levels(routes: int, peak_rate: float, rng: np.random.Generator) -> np.ndarray:
+    # Route popularity follows a long-tailed distribution, busiest route = peak_rate
+    levels = rng.pareto(2.0, size=routes) + 1.0
+    return peak_rate * levels / levels.max()
+
+
+def _hourly_rates(hours: np.ndarray, route_levels: np.ndarray) -> np.ndarray:
+    """Expected bookings per (route, hour), shape (routes, len(hours))."""
+    stamps = pd.DatetimeIndex(hours)
+    hour_of_day = stamps.hour.to_numpy()
+    weekend = stamps.dayofweek.to_numpy() >= 5
+    daily = np.where(
+        weekend,
+        WEEKEND_PROFILE[hour_of_day] * WEEKEND_LEVEL,
+        WEEKDAY_PROFILE[hour_of_day],
+    )
+    seasonal = MONTH_PROFILE[stamps.month.to_numpy() - 1]
+    return route_levels[:, None] * (daily * seasonal)[None, :]
+
+
+def _hour_blocks(start: str, hours: int, block_hours: int) -> List[np.ndarray]:
+    origin = np.datetime64(pd.Timestamp(start).floor("h").to_datetime64(), "h")
+    return [
+        origin + np.arange(offset, min(offset + block_hours, hours)).astype("timedelta64[h]")
+        for offset in range(0, hours, block_hours)
+    ]
+
+
+def _map_blocks(
+    func: Callable[[int, np.ndarray], pd.DataFrame],
+    blocks: List[np.ndarray],
+    workers: int,
+) -> Iterator[pd.DataFrame]:
+    # numpy and pyarrow release the GIL, so blocks generate in parallel with
+    # the writer; each block has its own seed, so output is worker-independent
+    if workers <= 1:
+        for index, block in enumerate(blocks):
+            yield func(index, block)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for index, block in enumerate(blocks):
+            pending.append(pool.submit(func, index, block))
+            if len(pending) > workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def iter_ticket_frames(
+    start: str = "2026-01-01",
+    hours: int = 24 * 30,
+    routes: int = 10,
+    peak_rate: float = 40.0,
+    min_bookings: int = 0,
+    seed: int = 0,
+    block_hours: int = BLOCK_HOURS,
+    workers: int = 1,
+) -> Iterator[pd.DataFrame]:
+    """
+    Ticket records in blocks of `block_hours` hours. Bookings per route-hour
+    are Poisson around the seasonal rate (at least `min_bookings`); each
+    booking carries 1-4 adults, 0-2 children and a route-specific fare.
+    """
+    rng = np.random.default_rng([seed])
+    levels = _route_levels(routes, peak_rate, rng)
+    adult_fares = rng.choice(np.arange(20, 65, 5), size=routes)
+    child_fares = adult_fares // 2
+    stops = np.array([f"Stop_{i}" for i in range(routes + 1)])
+
+    def block_frame(index: int, block: np.ndarray) -> pd.DataFrame:
+        rng = np.random.default_rng([seed, index + 1])
+        bookings = rng.poisson(_hourly_rates(block, levels)).ravel()
+        if min_bookings:
+            bookings = np.maximum(bookings, min_bookings)
+        slot = np.repeat(np.arange(bookings.size), bookings)
+        count = slot.size
+        route = slot // len(block)
+        hour = block[slot % len(block)].astype("datetime64[s]")
+        adults = rng.integers(1, 5, size=count)
+        children = rng.binomial(2, 0.2, size=count)
+        adult_price = adult_fares[route]
+        child_price = child_fares[route]
+        return pd.DataFrame(
+            {
+                "from": pd.Categorical.from_codes(route, stops),
+                "to": pd.Categorical.from_codes(route + 1, stops),
+                "adult_count": adults,
+                "child_count": children,
+                "adult_price": adult_price,
+                "child_price": child_price,
+                "total": adults * adult_price + children * child_price,
+                "payment_method": pd.Categorical.from_codes(
+                    rng.choice(len(PAYMENT_METHODS), size=count, p=PAYMENT_WEIGHTS),
+                    PAYMENT_METHODS,
+                ),
+                "created_at": hour + rng.integers(0, 3600, size=count).astype("timedelta64[s]"),
+            }
+        )
+
+    return _map_blocks(block_frame, _hour_blocks(start, hours, block_hours), workers)
+
+
+def iter_hourly_frames(
+    start: str = "2026-01-01",
+    hours: int = 24 * 30,
+    routes: int = 1,
+    peak_rate: float = 120.0,
+    noise: float = 0.15,
+    seed: int = 0,
+    block_hours: int = BLOCK_HOURS,
+    workers: int = 1,
+) -> Iterator[pd.DataFrame]:
+    """
+    Hourly `timestamp,demand` rows (plus `route` when routes > 1): seasonal
+    rate times log-normal noise, rounded to whole passengers.
+    """
+    levels = _route_levels(routes, peak_rate, np.random.default_rng([seed]))
+
+    def block_frame(index: int, block: np.ndarray) -> pd.DataFrame:
+        rng = np.random.default_rng([seed, index + 1])
+        rates = _hourly_rates(block, levels)
+        demand = np.rint(rates * rng.lognormal(0.0, noise, size=rates.shape)).ravel()
+        frame = {"timestamp": np.tile(block.astype("datetime64[s]"), routes), "demand": demand}
+        if routes > 1:
+            frame = {"route": np.repeat(np.arange(routes), len(block)), **frame}
+        return pd.DataFrame(frame)
+
+    return _map_blocks(block_frame, _hour_blocks(start, hours, block_hours), workers)
+
+
+def ticket_frame(hours: int, routes: int, **kwargs) -> pd.DataFrame:
+    """All ticket records in one DataFrame (small sizes, tests and benchmarks)."""
+    return pd.concat(list(iter_ticket_frames(hours=hours, routes=routes, **kwargs)), ignore_index=True)
+
+
+def hourly_frame(hours: int, routes: int = 1, **kwargs) -> pd.DataFrame:
+    return pd.concat(list(iter_hourly_frames(hours=hours, routes=routes, **kwargs)), ignore_index=True)
+
+
+def _csv_header(frame: pd.DataFrame) -> bytes:
+    return (",".join(frame.columns) + "\n").encode("utf-8")
+
+
+def _open_output(path: str) -> IO[bytes]:
+    if path.endswith(".gz"):
+        return gzip.open(path, "wb", compresslevel=5)
+    return open(path, "wb")
+
+
+def write_frames(frames: Iterator[pd.DataFrame], path: str) -> int:
+    """
+    Stream `frames` to `path` (.csv, .csv.gz or .parquet). Uses pyarrow
+    writers when installed; Parquet requires pyarrow. Returns rows written.
+    """
+    rows = 0
+    if path.endswith(".parquet"):
+        if pa is None:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+        writer = None
+        try:
+            for frame in frames:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pa_parquet.ParquetWriter(path, table.schema, compression="zstd")
+                writer.write_table(table)
+                rows += len(frame)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    with _open_output(path) as out:
+        header_written = False
+        for frame in frames:
+            if not header_written:
+                out.write(_csv_header(frame))
+                header_written = True
+            if pa is not None:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                pa_csv.write_csv(table, out, pa_csv.WriteOptions(include_header=False, quoting_style="none"))
+            else:
+                frame.to_csv(out, header=False, index=False, date_format="%Y-%m-%d %H:%M:%S")
+            rows += len(frame)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("kind", choices=["tickets", "hourly"])
+    parser.add_argument("--output", required=True, help=".csv, .csv.gz or .parquet")
+    parser.add_argument("--start", default="2026-01-01")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--routes", type=int, default=10)
+    parser.add_argument("--peak-rate", type=float, help="busiest route's peak bookings (tickets) or passengers (hourly) per hour")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="generator threads")
+    args = parser.parse_args()
+
+    hours = int(args.days * 24)
+    options = {
+        "start": args.start,
+        "hours": hours,
+        "routes": args.routes,
+        "seed": args.seed,
+        "workers": args.workers,
+    }
+    if args.peak_rate is not None:
+        options["peak_rate"] = args.peak_rate
+    frames = iter_ticket_frames(**options) if args.kind == "tickets" else iter_hourly_frames(**options)
+
+    started = time.perf_counter()
+    rows = write_frames(frames, args.output)
+    elapsed = time.perf_counter() - started
+    print(f"wrote {rows:,} rows to {args.output} in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+Shared pytest fixtures.
+"""
+import logging
+
+import pytest
+
+from app.ml import loader
+from app.ml.stub_model import StubQuantileModel
+
+
+@pytest.fixture(scope="session", autouse=True)
+def stub_model():
+    """Run every test against the stub model instead of the .keras asset."""
+    model = StubQuantileModel()
+    loader.set_model(model)
+    logging.disable(logging.INFO)
+    yield model
+    logging.disable(logging.NOTSET)
+    loader.set_model(None)
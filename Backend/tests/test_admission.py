@@ -0,0 +1,154 @@
+"""
+Admission control: size-ordered queueing, eviction, timeouts and shedding.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+
+import httpx
+import pytest
+
+from app.api.admission import (
+    ADMISSION_ROUTES,
+    AdmissionController,
+    AdmissionMiddleware,
+    AdmissionRejected,
+)
+from app.api.predict import predict
+from app.api.v1.forecasts import get_forecasts
+from app.api.v1.predict import predict_v1
+from app.api.v1.predict_schedule import predict_schedule_v1
+from app.api.v1.risk import risk_v1
+from app.main import app
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_waiters_admitted_smallest_first():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=3, queue_timeout=5)
+        await controller.acquire(0)
+        admitted = []
+
+        async def wait(size):
+            await controller.acquire(size)
+            admitted.append(size)
+
+        tasks = [asyncio.create_task(wait(size)) for size in (300, 100, 200)]
+        await _settle()
+        assert controller.in_flight == 1 and len(controller._waiting) == 3
+        for _ in range(3):
+            controller.release()
+            await _settle()
+        await asyncio.gather(*tasks)
+        return admitted, controller
+
+    admitted, controller = asyncio.run(scenario())
+    assert admitted == [100, 200, 300]
+    assert controller.in_flight == 1 and not controller._waiting
+
+
+def test_small_request_evicts_largest_waiter():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5)
+        await controller.acquire(0)
+        large = asyncio.create_task(controller.acquire(500))
+        await _settle()
+        small = asyncio.create_task(controller.acquire(10))
+        await _settle()
+        with pytest.raises(AdmissionRejected) as evicted:
+            await large
+        # Queue is full with a smaller waiter: a bigger request is rejected outright
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(1000)
+        controller.release()
+        await small
+        return evicted.value.reason, rejected.value.reason, controller
+
+    evicted, rejected, controller = asyncio.run(scenario())
+    assert (evicted, rejected) == ("evicted", "queue_full")
+    assert controller.in_flight == 1 and not controller._waiting
+
+
+def test_waiter_times_out():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=0.05)
+        await controller.acquire(0)
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await controller.acquire(10)
+        return timed_out.value.reason, controller
+
+    reason, controller = asyncio.run(scenario())
+    assert reason == "timeout"
+    assert controller.in_flight == 1 and not controller._waiting
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=5)
+        await controller.acquire(0)
+        waiter = asyncio.create_task(controller.acquire(10))
+        await _settle()
+        waiter.cancel()
+        await _settle()
+        controller.release()
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.in_flight == 0 and not controller._waiting
+
+
+class _BlockingApp:
+    """ASGI app whose responses wait until `release` is set."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = 0
+
+    async def __call__(self, scope, receive, send):
+        self.started += 1
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_middleware_sheds_with_503_and_passes_other_routes():
+    async def scenario():
+        inner = _BlockingApp()
+        middleware = AdmissionMiddleware(inner, max_in_flight=1, max_queue=1, queue_timeout=5, retry_after=7)
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            running = asyncio.create_task(client.get("/v1/forecasts/R1"))
+            await _settle()
+            queued = asyncio.create_task(client.post("/v1/risk", content=b"{}"))
+            await _settle()
+            shed = await client.post("/v1/predict", content=b"x" * 100)
+            # Unguarded routes are never queued behind inference
+            unguarded = asyncio.create_task(client.get("/v1/jobs/abc"))
+            await _settle()
+            started_while_full = inner.started
+            inner.release.set()
+            responses = await asyncio.gather(running, queued, unguarded)
+        return shed, responses, started_while_full, middleware.controller
+
+    shed, responses, started_while_full, controller = asyncio.run(scenario())
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "7"
+    assert json.loads(shed.content)["detail"]["stage"] == "admission"
+    assert started_while_full == 2  # forecasts + unguarded jobs route
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert controller.in_flight == 0
+
+
+def test_admission_routes_exist_and_run_on_threadpool():
+    paths = app.openapi()["paths"]
+    for method, template in ADMISSION_ROUTES:
+        assert method.lower() in paths.get(template, {}), f"{method} {template} matches no route"
+    # Sync handlers run on the threadpool instead of blocking the event loop
+    for handler in (predict, predict_v1, predict_schedule_v1, risk_v1, get_forecasts):
+        assert not inspect.iscoroutinefunction(handler), handler.__name__
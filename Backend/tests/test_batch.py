@@ -0,0 +1,116 @@
+"""
+Offline batch forecasting: outputs, manifest and resume.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+from app import batch
+from app.batch import BatchOptions, MANIFEST_FILE, discover_inputs, load_manifest, run
+from benchmarks.synthetic import hourly_frame
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    directory = tmp_path / "exports"
+    (directory / "north").mkdir(parents=True)
+    hourly_frame(72, seed=1).to_csv(directory / "a.csv", index=False)
+    hourly_frame(72, seed=2).to_csv(directory / "north" / "b.csv", index=False)
+    return directory
+
+
+@pytest.fixture
+def options(tmp_path):
+    return BatchOptions(output_dir=str(tmp_path / "out"), output_format="csv", schedule=True, last_n=6)
+
+
+def _run(inputs, options, **kwargs):
+    kwargs.setdefault("stub_model", True)
+    return run(discover_inputs([f"{inputs}/**/*.csv"]), options, workers=1, **kwargs)
+
+
+def test_writes_outputs_and_manifest(inputs, options):
+    counts = _run(inputs, options)
+    assert counts == {"total": 2, "skipped": 0, "ok": 2, "failed": 0}
+
+    output = inputs.parent / "out"
+    forecast = pd.read_csv(output / "a.forecast.csv")
+    assert len(forecast) == 6
+    assert (output / "north__b.forecast.csv").exists()
+    assert (output / "north__b.schedule.csv").exists()
+    entries = load_manifest(output)
+    assert {entry["status"] for entry in entries.values()} == {"ok"}
+    assert all(entry["options"]["model_version"] == "StubQuantileModel" for entry in entries.values())
+
+
+def test_resume_skips_finished_inputs(inputs, options):
+    _run(inputs, options)
+    output = inputs.parent / "out"
+    written = (output / "a.forecast.csv").stat().st_mtime_ns
+
+    assert _run(inputs, options) == {"total": 2, "skipped": 2, "ok": 0, "failed": 0}
+    assert (output / "a.forecast.csv").stat().st_mtime_ns == written
+    assert len((output / MANIFEST_FILE).read_text().splitlines()) == 2
+
+
+def test_changed_or_missing_inputs_rerun(inputs, options):
+    _run(inputs, options)
+    output = inputs.parent / "out"
+
+    changed = inputs / "a.csv"
+    os.utime(changed, ns=(changed.stat().st_atime_ns, changed.stat().st_mtime_ns + 10**9))
+    (output / "north__b.schedule.csv").unlink()
+    assert _run(inputs, options) == {"total": 2, "skipped": 0, "ok": 2, "failed": 0}
+
+
+def test_changed_options_rerun(inputs, options):
+    _run(inputs, options)
+    assert _run(inputs, replace(options, capacity=80))["ok"] == 2
+    assert _run(inputs, replace(options, capacity=80))["skipped"] == 2
+
+
+def test_changed_model_version_reruns(inputs, options, monkeypatch):
+    monkeypatch.setattr(batch.loader, "get_model_asset_version", lambda: "v1")
+    assert _run(inputs, options, stub_model=False)["ok"] == 2
+    assert _run(inputs, options, stub_model=False)["skipped"] == 2
+
+    monkeypatch.setattr(batch.loader, "get_model_asset_version", lambda: "v2")
+    assert _run(inputs, options, stub_model=False)["ok"] == 2
+    # Switching to the stub model is a model change too
+    assert _run(inputs, options)["ok"] == 2
+
+
+def test_failed_inputs_retried_and_force_redoes_all(inputs, options):
+    hourly_frame(5, seed=3).to_csv(inputs / "short.csv", index=False)
+    assert _run(inputs, options) == {"total": 3, "skipped": 0, "ok": 2, "failed": 1}
+    entry = load_manifest(inputs.parent / "out")[str((inputs / "short.csv").resolve())]
+    assert entry["status"] == "failed" and entry["error"]
+
+    assert _run(inputs, options) == {"total": 3, "skipped": 2, "ok": 0, "failed": 1}
+    assert _run(inputs, options, force=True) == {"total": 3, "skipped": 0, "ok": 2, "failed": 1}
+
+
+def _cli(monkeypatch, capsys, *args):
+    monkeypatch.setattr("sys.argv", ["app.batch", *args])
+    with pytest.raises(SystemExit) as exited:
+        batch.main()
+    return exited.value.code, capsys.readouterr()
+
+
+def test_cli_resume(inputs, tmp_path, monkeypatch, capsys):
+    args = [str(inputs), "--output", str(tmp_path / "cli"), "--format", "csv", "--workers", "1", "--stub-model"]
+    code, captured = _cli(monkeypatch, capsys, *args)
+    assert code == 0
+    assert "1 done, 0 failed, 0 already done of 1 input(s)" in captured.out
+
+    code, captured = _cli(monkeypatch, capsys, *args)
+    assert code == 0
+    assert "resuming: 1 of 1 input(s) already done" in captured.err
+    assert "0 done, 0 failed, 1 already done" in captured.out
+
+    code, captured = _cli(monkeypatch, capsys, *args, "--last-n", "3")
+    assert "1 done" in captured.out
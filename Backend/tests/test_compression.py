@@ -0,0 +1,187 @@
+"""
+Compressed uploads and Accept-Encoding response compression.
+"""
+from __future__ import annotations
+
+import functools
+import gzip
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import compression, predict
+from app.api.compression import (
+    CompressionMiddleware,
+    DecompressedSizeError,
+    UnsupportedCompressionError,
+    csv_source,
+    detect_compression,
+    negotiate_content_coding,
+    open_compressed,
+)
+from app.main import app
+from benchmarks.synthetic import hourly_frame
+
+CSV = hourly_frame(200, seed=0).to_csv(index=False).encode("utf-8")
+
+
+def _zstd(data: bytes) -> bytes:
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+
+@pytest.fixture
+def no_zstd(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", None)
+
+
+def test_detect_compression_uses_magic_bytes():
+    assert detect_compression(gzip.compress(CSV)) == "gzip"
+    assert detect_compression(_zstd(CSV)) == "zstd"
+    assert detect_compression(CSV) is None
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, _zstd])
+def test_csv_source_round_trip(compress):
+    source, detected = csv_source(compress(CSV))
+    assert detected in ("gzip", "zstd")
+    assert source.read() == CSV
+
+
+def test_plain_csv_source_is_untouched():
+    source, detected = csv_source(CSV)
+    assert detected is None and source.read() == CSV
+
+
+@pytest.mark.parametrize("compress", [gzip.compress, _zstd])
+def test_decompressed_size_limit(compress):
+    payload = compress(b"0" * 10_000)
+    kind = detect_compression(payload)
+    assert len(open_compressed(payload, kind, limit=10_000).read()) == 10_000
+    with pytest.raises(DecompressedSizeError):
+        open_compressed(payload, kind, limit=9_999).read()
+
+
+def test_zstd_upload_without_library_rejected(no_zstd):
+    with pytest.raises(UnsupportedCompressionError, match="zstandard"):
+        open_compressed(b"\x28\xb5\x2f\xfd", "zstd")
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def _predict(client, content: bytes, filename: str):
+    return client.post("/v1/predict?last_n=4", files={"file": (filename, content, "text/csv")})
+
+
+def test_compressed_uploads_match_plain(client):
+    plain = _predict(client, CSV, "d.csv")
+    assert plain.status_code == 200
+    assert _predict(client, gzip.compress(CSV), "d.csv.gz").json() == plain.json()
+    assert _predict(client, _zstd(CSV), "d.csv.zst").json() == plain.json()
+
+
+def test_upload_over_decompressed_limit_rejected(client, monkeypatch):
+    monkeypatch.setattr(predict, "open_compressed", functools.partial(open_compressed, limit=1024))
+    response = _predict(client, gzip.compress(CSV), "d.csv.gz")
+    assert response.status_code == 400
+    assert "exceeds" in response.json()["detail"]
+
+
+def test_zstd_upload_returns_415_without_library(client, no_zstd):
+    response = _predict(client, _zstd(CSV), "d.csv.zst")
+    assert response.status_code == 415
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("", None),
+        ("br", None),
+        ("gzip", "gzip"),
+        ("gzip, zstd", "zstd"),
+        ("gzip;q=1.0, zstd;q=0.5", "gzip"),
+        ("zstd;q=0, gzip;q=0.1", "gzip"),
+        ("*", "zstd"),
+        ("*;q=0.5, gzip", "gzip"),
+        ("gzip;q=bad", None),
+        ("GZIP", "gzip"),
+    ],
+)
+def test_negotiate_content_coding(accept_encoding, expected):
+    if expected == "zstd":
+        pytest.importorskip("zstandard")
+    assert negotiate_content_coding(accept_encoding) == expected
+
+
+def test_zstd_not_offered_without_library(no_zstd):
+    assert negotiate_content_coding("zstd") is None
+    assert negotiate_content_coding("zstd, gzip;q=0.1") == "gzip"
+
+
+def _body_app(chunks, content_type=b"application/json"):
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", content_type)],
+            }
+        )
+        for index, chunk in enumerate(chunks):
+            await send(
+                {"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1}
+            )
+
+    return app
+
+
+def _get(asgi_app, accept_encoding="gzip", min_bytes=100):
+    client = TestClient(CompressionMiddleware(asgi_app, min_bytes=min_bytes))
+    return client.get("/", headers={"Accept-Encoding": accept_encoding})
+
+
+def test_small_body_sent_uncompressed():
+    response = _get(_body_app([b"x" * 99]))
+    assert "content-encoding" not in response.headers
+    assert response.content == b"x" * 99
+
+
+def test_body_at_threshold_compressed():
+    response = _get(_body_app([b"x" * 100]))
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == b"x" * 100
+
+
+def test_zstd_response():
+    zstandard = pytest.importorskip("zstandard")
+    client = TestClient(CompressionMiddleware(_body_app([b"y" * 5000]), min_bytes=100))
+    with client.stream("GET", "/", headers={"Accept-Encoding": "zstd"}) as response:
+        assert response.headers["content-encoding"] == "zstd"
+        raw = b"".join(response.iter_raw())
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(raw) == b"y" * 5000
+
+
+def test_binary_types_not_compressed():
+    response = _get(_body_app([b"\x00" * 5000], content_type=b"application/msgpack"))
+    assert "content-encoding" not in response.headers
+
+
+def test_streamed_chunks_compressed_even_when_small():
+    chunks = [b"a,b\n", b"1,2\n", b"3,4\n"]
+    client = TestClient(CompressionMiddleware(_body_app(chunks, b"text/csv"), min_bytes=100))
+    with client.stream("GET", "/", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        raw = b"".join(response.iter_raw())
+    assert zlib.decompress(raw, 31) == b"".join(chunks)
+
+
+def test_no_accept_encoding_passes_through():
+    client = TestClient(CompressionMiddleware(_body_app([b"x" * 5000]), min_bytes=100))
+    response = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
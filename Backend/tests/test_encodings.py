@@ -0,0 +1,136 @@
+"""
+Accept negotiation and the MessagePack / Arrow response encodings.
+"""
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import encodings
+from app.api.encodings import (
+    ARROW_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    UnsupportedEncodingError,
+    arrow_response,
+    msgpack_response,
+    negotiate_encoding,
+)
+from app.main import app
+from benchmarks.synthetic import hourly_frame
+
+
+@pytest.fixture
+def no_binary(monkeypatch):
+    monkeypatch.setattr(encodings, "msgpack", None)
+    monkeypatch.setattr(encodings, "pa", None)
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, "json"),
+        ("", "json"),
+        ("text/html", "json"),
+        ("*/*", "json"),
+        ("application/*", "json"),
+        ("application/json, application/msgpack", "json"),
+        ("application/json;q=0.5, application/msgpack", "msgpack"),
+        ("application/x-msgpack", "msgpack"),
+        ("application/vnd.msgpack;q=0.8, application/vnd.apache.arrow.stream;q=0.9", "arrow"),
+        ("application/msgpack;q=0, */*", "json"),
+        ("application/msgpack;q=oops, application/json;q=0.1", "json"),
+        ("APPLICATION/MSGPACK", "msgpack"),
+    ],
+)
+def test_negotiate_encoding(accept, expected):
+    if expected != "json":
+        pytest.importorskip("msgpack" if expected == "msgpack" else "pyarrow")
+    assert negotiate_encoding(accept) == expected
+
+
+def test_missing_library_falls_back_to_next_choice(no_binary):
+    assert negotiate_encoding("application/msgpack, application/json;q=0.5") == "json"
+    assert negotiate_encoding("application/msgpack, */*;q=0.1") == "json"
+
+
+def test_only_missing_library_accepted_raises(no_binary):
+    with pytest.raises(UnsupportedEncodingError, match="application/msgpack"):
+        negotiate_encoding("application/msgpack")
+    with pytest.raises(UnsupportedEncodingError, match="arrow"):
+        negotiate_encoding("application/vnd.apache.arrow.stream, text/html")
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    values = np.array([[1.5, 2.5], [3.5, 4.5]], dtype=np.float32)
+    response = msgpack_response({"values": values, "count": np.int64(2), "label": "x"})
+    assert response.media_type == MSGPACK_MEDIA_TYPE
+    decoded = msgpack.unpackb(response.body)
+    packed = decoded["values"]
+    restored = np.frombuffer(packed["data"], dtype=packed["dtype"]).reshape(packed["shape"])
+    np.testing.assert_array_equal(restored, values)
+    assert decoded["count"] == 2
+    assert decoded["label"] == "x"
+
+
+def test_arrow_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    columns = {"p50": np.array([1.0, 2.0, 3.0]), "hour": ["05", "06", "07"]}
+    response = arrow_response(columns, {"metadata": {"num_predictions": 3}})
+    assert response.media_type == ARROW_MEDIA_TYPE
+    table = pa.ipc.open_stream(response.body).read_all()
+    assert table.column_names == ["p50", "hour"]
+    assert table.column("p50").to_pylist() == [1.0, 2.0, 3.0]
+    assert table.column("hour").to_pylist() == ["05", "06", "07"]
+    assert json.loads(table.schema.metadata[b"payload"]) == {"metadata": {"num_predictions": 3}}
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def upload():
+    return hourly_frame(200, seed=0).to_csv(index=False).encode("utf-8")
+
+
+def _predict(client, upload, accept=None, query="last_n=4&format=columnar"):
+    headers = {"Accept": accept} if accept else {}
+    return client.post(
+        f"/v1/predict?{query}",
+        files={"file": ("d.csv", upload, "text/csv")},
+        headers=headers,
+    )
+
+
+def test_endpoint_encodings_agree(client, upload):
+    msgpack = pytest.importorskip("msgpack")
+    pa = pytest.importorskip("pyarrow")
+    as_json = _predict(client, upload).json()
+
+    packed = _predict(client, upload, MSGPACK_MEDIA_TYPE)
+    assert packed.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    body = msgpack.unpackb(packed.content)
+    for name, column in body["values"].items():
+        restored = np.frombuffer(column["data"], dtype=column["dtype"])
+        np.testing.assert_allclose(restored, as_json["values"][name], rtol=1e-6)
+    assert body["metadata"] == as_json["metadata"]
+
+    # Arrow is always columnar, even without format=columnar
+    arrow = _predict(client, upload, ARROW_MEDIA_TYPE, query="last_n=4")
+    assert arrow.headers["content-type"] == ARROW_MEDIA_TYPE
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert table.column_names == list(as_json["values"])
+    np.testing.assert_allclose(table.column("p50").to_numpy(), as_json["values"]["p50"], rtol=1e-6)
+    assert json.loads(table.schema.metadata[b"payload"])["metadata"] == as_json["metadata"]
+
+
+def test_endpoint_returns_406_when_library_missing(client, upload, no_binary):
+    response = _predict(client, upload, MSGPACK_MEDIA_TYPE)
+    assert response.status_code == 406
+    assert response.json()["detail"]["stage"] == "encoding"
+    assert _predict(client, upload, f"{MSGPACK_MEDIA_TYPE}, application/json;q=0.5").status_code == 200
@@ -0,0 +1,102 @@
+"""
+Mixed-fleet min-cost covering tables.
+"""
+from __future__ import annotations
+
+import itertools
+from typing import Sequence
+
+import pytest
+
+from app.ml import fleet as fleet_module
+from app.ml.fleet import (
+    MAX_TABLE_SIZE,
+    MIN_TABLE_SIZE,
+    BusType,
+    get_fleet_table,
+    required_units,
+)
+
+SMALL_FLEETS = [
+    (BusType("midi", 7, 1.0),),
+    (BusType("midi", 3, 1.0), BusType("standard", 5, 1.4)),
+    (BusType("midi", 4, 0.9), BusType("standard", 6, 1.0), BusType("articulated", 10, 1.9)),
+    # Free and duplicate-cost types
+    (BusType("spare", 2, 0.0), BusType("standard", 5, 1.0), BusType("long", 5, 1.0)),
+]
+MAX_UNITS = 40
+
+
+def _brute_force_cost(fleet: Sequence[BusType], units: int) -> float:
+    """Cheapest mix (at least one bus) whose seated capacity covers `units`."""
+    bounds = [units // bus.capacity + 1 for bus in fleet]
+    best = None
+    for counts in itertools.product(*(range(bound + 1) for bound in bounds)):
+        if not any(counts):
+            continue
+        if sum(count * bus.capacity for count, bus in zip(counts, fleet)) < units:
+            continue
+        cost = sum(count * bus.cost for count, bus in zip(counts, fleet))
+        best = cost if best is None else min(best, cost)
+    return best
+
+
+@pytest.mark.parametrize("fleet", SMALL_FLEETS, ids=lambda fleet: "-".join(bus.name for bus in fleet))
+def test_table_is_optimal_against_brute_force(fleet):
+    table = get_fleet_table(fleet, MAX_UNITS)
+    for units in range(MAX_UNITS + 1):
+        counts = table.counts[units]
+        seats = int(counts @ [bus.capacity for bus in fleet])
+        cost = float(counts @ [bus.cost for bus in fleet])
+        assert seats >= units and seats == table.seats[units]
+        assert table.buses[units] == counts.sum() >= 1
+        assert cost == pytest.approx(table.costs[units])
+        assert cost == pytest.approx(_brute_force_cost(fleet, units)), units
+
+
+def test_table_grows_by_doubling_and_is_reused():
+    fleet = (BusType("grow-small", 9, 1.0), BusType("grow-large", 23, 2.2))
+    table = get_fleet_table(fleet, 10)
+    assert table.size == MIN_TABLE_SIZE
+    assert get_fleet_table(fleet, MIN_TABLE_SIZE) is table
+
+    grown = get_fleet_table(fleet, 3 * MIN_TABLE_SIZE)
+    assert grown.size == 4 * MIN_TABLE_SIZE
+    # Rows shared with the smaller table are unchanged
+    assert (grown.costs[: table.size + 1] == table.costs).all()
+    assert get_fleet_table(fleet, 10) is grown
+
+
+def test_requirement_above_limit_rejected():
+    fleet = (BusType("limit", 50, 1.0),)
+    with pytest.raises(ValueError, match="fleet table limit"):
+        get_fleet_table(fleet, MAX_TABLE_SIZE + 1)
+
+
+def test_cache_keeps_most_recent_fleets(monkeypatch):
+    monkeypatch.setattr(fleet_module, "MAX_CACHED_FLEETS", 2)
+    fleets = [(BusType(f"lru-{i}", 10 + i, 1.0),) for i in range(3)]
+    first = get_fleet_table(fleets[0], 5)
+    get_fleet_table(fleets[1], 5)
+    get_fleet_table(fleets[2], 5)
+    assert fleets[0] not in fleet_module._table_cache
+    assert get_fleet_table(fleets[0], 5) is not first
+
+
+@pytest.mark.parametrize(
+    "fleet, message",
+    [
+        ((), "at least one"),
+        ((BusType("a", 10), BusType("a", 20)), "unique"),
+        ((BusType("a", 0),), "positive integer"),
+        ((BusType("a", 10, -1.0),), "cost"),
+    ],
+)
+def test_invalid_fleets_rejected(fleet, message):
+    with pytest.raises(ValueError, match=message):
+        get_fleet_table(fleet, 5)
+
+
+def test_required_units_rounds_up_to_whole_seats():
+    # 60 passengers with 20% standing fit in exactly 50 seats
+    assert required_units([60.0, 60.01, 0.0, -5.0], 0.2).tolist() == [50, 51, 0, 0]
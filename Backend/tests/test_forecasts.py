@@ -0,0 +1,170 @@
+"""
+Forecast store and the v1 forecast read API with its live-refresh fallback.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import forecasts
+from app.api.forecasts import ForecastStore, RouteForecast, history_path, stale_hours
+from app.api.responses import QUANTILE_NAMES
+from app.api.v1 import forecasts as forecasts_v1
+from app.main import app
+from benchmarks.synthetic import hourly_frame
+
+HOURS = ["2026-01-01 00:00:00", "2026-01-01 01:00:00", "2026-01-01 02:00:00"]
+
+
+def _forecast(route="north", hours=HOURS, offset=0.0, schedule=None):
+    quantiles = {
+        name: np.arange(len(hours), dtype=float) + index + offset for index, name in enumerate(QUANTILE_NAMES)
+    }
+    return RouteForecast(route=route, timestamps=list(hours), quantiles=quantiles, schedule=schedule)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ForecastStore(str(tmp_path / "forecasts.sqlite3"))
+
+
+def test_upsert_and_range(store):
+    assert store.upsert(_forecast(), "v1") == 3
+    store.upsert(_forecast(route="south"), "v1")
+
+    rows = store.range("north", HOURS[1], HOURS[2])
+    assert [row["target_hour"] for row in rows] == HOURS[1:]
+    assert rows[0][QUANTILE_NAMES[0]] == 1.0
+    assert rows[0]["schedule"] is None
+    assert store.range("north", "2026-02-01 00:00:00", "2026-02-02 00:00:00") == []
+    assert store.routes() == ["north", "south"]
+
+
+def test_upsert_overwrites_hours(store):
+    store.upsert(_forecast(), "v1")
+    store.upsert(_forecast(hours=HOURS[1:], offset=10.0, schedule=[{"hour": 1}, {"hour": 2}]), "v2")
+
+    rows = store.range("north", HOURS[0], HOURS[-1])
+    assert [row["model_version"] for row in rows] == ["v1", "v2", "v2"]
+    assert rows[1][QUANTILE_NAMES[0]] == 10.0
+    assert rows[1]["schedule"] is not None
+
+
+def test_stale_by_model_version(store):
+    store.upsert(_forecast(hours=HOURS[:1]), "v1")
+    store.upsert(_forecast(hours=HOURS[1:]), "v2")
+    rows = store.range("north", HOURS[0], HOURS[-1])
+
+    assert stale_hours(rows, "v2") == HOURS[:1]
+    assert stale_hours(rows, None) == []
+
+
+def test_stale_by_age(store, monkeypatch):
+    now = 1_800_000_000.0
+    monkeypatch.setattr(forecasts.time, "time", lambda: now - 7200)
+    store.upsert(_forecast(hours=HOURS[:1]), "v1")
+    monkeypatch.setattr(forecasts.time, "time", lambda: now)
+    store.upsert(_forecast(hours=HOURS[1:]), "v1")
+    rows = store.range("north", HOURS[0], HOURS[-1])
+
+    assert stale_hours(rows, "v1", max_age_hours=1) == HOURS[:1]
+    assert stale_hours(rows, "v1", max_age_hours=3) == []
+    # 0 disables the age check
+    assert stale_hours(rows, "v1", max_age_hours=0) == []
+
+
+def test_history_path(tmp_path):
+    (tmp_path / "north.csv.gz").write_bytes(b"")
+    assert history_path("north", str(tmp_path)) == tmp_path / "north.csv.gz"
+    assert history_path("south", str(tmp_path)) is None
+    assert history_path("north", "") is None
+    assert history_path("../north", str(tmp_path)) is None
+
+
+@pytest.fixture
+def live(tmp_path, monkeypatch, store):
+    """The API on a fresh store, with history files in tmp_path/history."""
+    directory = tmp_path / "history"
+    directory.mkdir()
+    monkeypatch.setattr(forecasts, "_store", store)
+    monkeypatch.setattr(forecasts_v1, "history_path", lambda route: history_path(route, str(directory)))
+    monkeypatch.setattr(forecasts_v1, "get_model_version", lambda: "v1")
+    monkeypatch.setattr(forecasts_v1, "_refreshed_history", OrderedDict())
+    hourly_frame(72, seed=0).to_csv(directory / "north.csv", index=False)
+    return TestClient(app)
+
+
+def _get(client, route="north", **params):
+    return client.get(f"/v1/forecasts/{route}", params={"start": "2026-01-03 02:00:00", **params})
+
+
+def test_missing_hours_forecast_live_then_served_from_store(live, monkeypatch):
+    refreshes = []
+    refresh = forecasts_v1.forecast_history
+    monkeypatch.setattr(
+        forecasts_v1, "forecast_history", lambda *args, **kwargs: refreshes.append(args[0]) or refresh(*args, **kwargs)
+    )
+
+    response = _get(live)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["source"] == "live"
+    assert body["coverage"]["returned_hours"] > 0
+    assert body["metadata"]["model_version"] == "v1"
+
+    assert _get(live).json()["source"] == "store"
+    assert refreshes == ["north"]
+
+
+def test_hours_outside_history_refreshed_once(live, monkeypatch):
+    refreshes = []
+    refresh = forecasts_v1.forecast_history
+    monkeypatch.setattr(
+        forecasts_v1, "forecast_history", lambda *args, **kwargs: refreshes.append(args[0]) or refresh(*args, **kwargs)
+    )
+
+    # The window runs past the end of the history, so hours stay missing
+    params = {"end": "2026-01-04 23:00:00"}
+    first = _get(live, **params).json()
+    second = _get(live, **params).json()
+    assert first["coverage"]["missing_hours"] > 0
+    assert second["source"] == "store"
+    assert refreshes == ["north"]
+    assert "forecast_missing" in {warning["code"] for warning in second["warnings"]}
+
+
+def test_new_model_version_refreshes_stale_hours(live, monkeypatch):
+    assert _get(live).json()["source"] == "live"
+    monkeypatch.setattr(forecasts_v1, "get_model_version", lambda: "v2")
+
+    body = _get(live).json()
+    assert body["source"] == "live"
+    assert body["coverage"]["stale_hours"] == 0
+
+
+def test_live_disabled_returns_stored_with_warnings(live, store):
+    store.upsert(_forecast(hours=["2026-01-03 02:00:00"]), "v0")
+    body = _get(live, live="false").json()
+    assert body["source"] == "store"
+    assert body["coverage"] == {"requested_hours": 24, "returned_hours": 1, "missing_hours": 23, "stale_hours": 1}
+    assert {warning["code"] for warning in body["warnings"]} == {"forecast_missing", "forecast_stale"}
+
+
+def test_no_store_rows_and_no_history_is_404(live):
+    response = _get(live, route="south")
+    assert response.status_code == 404
+    assert response.json()["detail"]["stage"] == "forecast_store"
+
+
+def test_refresh_history_is_bounded(live, monkeypatch):
+    monkeypatch.setattr(forecasts_v1, "MAX_REFRESHED_ROUTES", 2)
+    directory = forecasts_v1.history_path("north").parent
+    for route in ("east", "west"):
+        hourly_frame(72, seed=1).to_csv(directory / f"{route}.csv", index=False)
+
+    for route in ("north", "east", "west"):
+        assert _get(live, route=route).status_code == 200
+    assert list(forecasts_v1._refreshed_history) == ["east", "west"]
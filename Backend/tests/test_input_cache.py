@@ -0,0 +1,137 @@
+"""
+Disk-backed prepared-input cache.
+"""
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pytest
+
+from app.ml import input_cache
+from app.ml.input_cache import LOW_WATER_FRACTION, InputCache
+from app.ml.preprocess import preprocess_input
+from benchmarks.synthetic import hourly_frame
+
+CONFIG = {"sequence_length": 24, "features": ["demand", "hour"]}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return InputCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024)
+
+
+@pytest.fixture
+def frame():
+    return hourly_frame(60, seed=0)
+
+
+def _arrays(value: float, size: int = 1000):
+    return {"numeric": np.full(size, value, dtype=np.float64)}
+
+
+def test_key_is_stable_and_ignores_index(cache, frame):
+    key = cache.key(frame, CONFIG, "scaler-1", last_n=None)
+    assert cache.key(frame.copy(), dict(CONFIG), "scaler-1", last_n=None) == key
+    assert cache.key(frame.set_index(frame.index + 100), CONFIG, "scaler-1", last_n=None) == key
+
+
+def test_key_changes_with_every_input(cache, frame):
+    key = cache.key(frame, CONFIG, "scaler-1", last_n=None)
+    changed = frame.copy()
+    changed.loc[changed.index[-1], "demand"] += 1
+    others = {
+        cache.key(changed, CONFIG, "scaler-1", last_n=None),
+        cache.key(frame, {**CONFIG, "sequence_length": 12}, "scaler-1", last_n=None),
+        cache.key(frame, CONFIG, "scaler-2", last_n=None),
+        cache.key(frame, CONFIG, "scaler-1", last_n=24),
+        cache.key(frame.astype({"demand": "float32"}), CONFIG, "scaler-1", last_n=None),
+    }
+    assert key not in others and len(others) == 5
+
+
+def test_miss_then_hit_returns_read_only_mmap(cache):
+    assert cache.get("ab" * 32) is None
+    arrays = {"numeric": np.arange(12, dtype=np.float32).reshape(3, 4), "hour": np.arange(3)}
+    cache.put("ab" * 32, arrays)
+
+    cached = cache.get("ab" * 32)
+    assert set(cached) == {"numeric", "hour"}
+    for name, array in arrays.items():
+        assert isinstance(cached[name], np.memmap)
+        np.testing.assert_array_equal(cached[name], array)
+        assert cached[name].dtype == array.dtype
+        with pytest.raises(ValueError):
+            cached[name][0] = 1
+
+
+def test_put_keeps_entry_stored_first(cache):
+    key = "cd" * 32
+    cache.put(key, _arrays(1.0))
+    cache.put(key, _arrays(2.0))
+    assert cache.get(key)["numeric"][0] == 1.0
+
+
+def test_put_racing_another_writer(cache, monkeypatch):
+    key = "ef" * 32
+    other = InputCache(str(cache.directory), cache.max_bytes)
+    real_save = np.save
+
+    def save_after_other_writer(path, array, **kwargs):
+        # Another process finishes the same entry between our exists() check and rename
+        monkeypatch.setattr(np, "save", real_save)
+        other.put(key, _arrays(7.0))
+        real_save(path, array, **kwargs)
+
+    monkeypatch.setattr(np, "save", save_after_other_writer)
+    cache.put(key, _arrays(3.0))
+
+    assert cache.get(key)["numeric"][0] == 7.0
+    leftovers = [path.name for path in (cache.directory / key[:2]).iterdir()]
+    assert leftovers == [key]
+
+
+def test_oversized_entries_not_stored(tmp_path):
+    cache = InputCache(str(tmp_path), max_bytes=1000)
+    cache.put("aa" * 32, _arrays(1.0, size=1000))
+    assert cache.get("aa" * 32) is None
+
+
+def test_lru_eviction_to_low_water(tmp_path):
+    keys = [f"{index:02d}" * 32 for index in range(4)]
+    probe = InputCache(str(tmp_path / "probe"), max_bytes=1 << 30)
+    probe.put(keys[0], _arrays(0.0))
+    entry_bytes = probe.size_bytes()
+
+    cache = InputCache(str(tmp_path / "cache"), max_bytes=3 * entry_bytes + 100)
+    for index, key in enumerate(keys[:3]):
+        cache.put(key, _arrays(float(index)))
+        os.utime(cache._entry_dir(key), (1000 + index, 1000 + index))
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) is not None
+
+    cache.put(keys[3], _arrays(3.0))
+    remaining = {key for key in keys if cache.get(key) is not None}
+    assert remaining == {keys[0], keys[3]}
+    assert cache.size_bytes() <= LOW_WATER_FRACTION * cache.max_bytes
+
+
+def test_preprocess_input_uses_cache(tmp_path, monkeypatch):
+    cache = InputCache(str(tmp_path), max_bytes=1 << 30)
+    monkeypatch.setattr(input_cache, "_cache", cache)
+    monkeypatch.setattr(input_cache, "_configured", True)
+    frame = hourly_frame(80, seed=4)
+
+    missed, miss_hours = preprocess_input(frame, last_n=5, return_timestamps=True)
+    assert cache.size_bytes() > 0
+    hit, hit_hours = preprocess_input(frame, last_n=5, return_timestamps=True)
+
+    assert hit_hours == miss_hours
+    assert set(hit) == set(missed)
+    for name in missed:
+        assert isinstance(hit[name], np.memmap)
+        np.testing.assert_array_equal(hit[name], missed[name])
+
+    # A different window is a different entry
+    preprocess_input(frame, last_n=6)
+    assert len(cache._entries()) == 2
@@ -0,0 +1,104 @@
+"""
+Background job retention and pruning.
+"""
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api.jobs import STATUS_FILE, JobManager
+
+
+def _write_job(directory, status: str, finished_hours_ago: float = None) -> str:
+    job_id = uuid.uuid4().hex
+    finished_at = None
+    if finished_hours_ago is not None:
+        finished = datetime.now(timezone.utc) - timedelta(hours=finished_hours_ago)
+        finished_at = finished.isoformat(timespec="milliseconds")
+    job_dir = directory / job_id
+    job_dir.mkdir(parents=True)
+    (job_dir / STATUS_FILE).write_text(
+        json.dumps({"job_id": job_id, "status": status, "finished_at": finished_at}),
+        encoding="utf-8",
+    )
+    (job_dir / "result.csv").write_bytes(b"a,b\n")
+    return job_id
+
+
+def _wait(manager: JobManager, job_id: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = manager.get(job_id)
+        if status["status"] in ("succeeded", "failed"):
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.fixture
+def manager_factory(tmp_path):
+    managers = []
+
+    def make(**kwargs):
+        manager = JobManager(str(tmp_path), workers=1, max_queue=1, **kwargs)
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        manager.shutdown()
+
+
+def test_startup_prunes_only_expired_finished_jobs(tmp_path, manager_factory):
+    expired = _write_job(tmp_path, "succeeded", finished_hours_ago=30)
+    expired_failed = _write_job(tmp_path, "failed", finished_hours_ago=25)
+    recent = _write_job(tmp_path, "succeeded", finished_hours_ago=1)
+    interrupted = _write_job(tmp_path, "running")
+
+    manager = manager_factory(retention_seconds=24 * 3600)
+
+    assert not (tmp_path / expired).exists()
+    assert not (tmp_path / expired_failed).exists()
+    assert manager.get(recent)["status"] == "succeeded"
+    # Recovery stamps interrupted jobs as just finished, so they are kept
+    assert manager.get(interrupted)["status"] == "failed"
+
+
+def test_zero_retention_keeps_everything(tmp_path, manager_factory):
+    job_id = _write_job(tmp_path, "succeeded", finished_hours_ago=10_000)
+    manager = manager_factory(retention_seconds=0)
+    assert manager.prune(now=time.time() + 10**9) == 0
+    assert manager.get(job_id) is not None
+
+
+def test_prune_removes_finished_job_after_retention(manager_factory):
+    manager = manager_factory(retention_seconds=3600)
+    status = manager.submit("test", lambda on_stage: [b"x"], ["run"], "text/plain", "out.txt")
+    finished = _wait(manager, status["job_id"])
+    assert manager.result_path(finished).exists()
+
+    assert manager.prune() == 0
+    assert manager.prune(now=time.time() + 7200) == 1
+    assert manager.get(status["job_id"]) is None
+
+
+def test_prune_skips_unreadable_status(tmp_path, manager_factory):
+    broken = tmp_path / uuid.uuid4().hex
+    broken.mkdir()
+    (broken / STATUS_FILE).write_text("{not json", encoding="utf-8")
+    manager = manager_factory(retention_seconds=1)
+    assert manager.prune(now=time.time() + 3600) == 0
+    assert broken.exists()
+
+
+def test_background_pruner_runs_periodically(tmp_path, manager_factory):
+    manager_factory(retention_seconds=3600, prune_interval=0.02)
+    job_id = _write_job(tmp_path, "succeeded", finished_hours_ago=2)
+    deadline = time.monotonic() + 5.0
+    while (tmp_path / job_id).exists() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert not (tmp_path / job_id).exists()
@@ -0,0 +1,149 @@
+"""
+Memory-regression tests.
+
+Runs each pipeline stage on increasing input sizes under tracemalloc and
+compares its peak against the budgets in memory_budgets.json. A stage fails
+when its peak exceeds the recorded baseline by more than the tolerance.
+tracemalloc sees Python and numpy allocations (not pyarrow buffers), and
+inference is measured with the stub model.
+
+After an intentional change, re-record the budgets (from Backend/):
+    python -m tests.test_memory --update
+"""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import numpy as np
+import pytest
+
+from app.api.predict import parse_csv
+from app.api.responses import FastJSONResponse, build_schedule_response, quantile_arrays
+from app.ml import loader
+from app.ml.feature_engineering import build_features
+from app.ml.preprocess import create_sequences, preprocess_input
+from app.ml.scheduler import generate_schedule
+from benchmarks.pipeline import peak_bytes
+from benchmarks.synthetic import hourly_frame
+
+BUDGETS_PATH = Path(__file__).with_name("memory_budgets.json")
+
+STAGES = ("parsing", "features", "sequences", "inference", "schedule_serialization")
+SIZES = (720, 2160, 8760)  # hours of hourly demand: one month, one quarter, one year
+
+DEFAULT_TOLERANCE = 0.20
+# Absolute slack so tiny stages do not fail on allocator noise
+DEFAULT_SLACK_BYTES = 256 * 1024
+
+
+def stage_runners(hours: int) -> Dict[str, Callable[[], Any]]:
+    """Zero-argument callables for each stage, fed real upstream outputs."""
+    content = hourly_frame(hours, seed=0).to_csv(index=False).encode("utf-8")
+    df = parse_csv(content)
+    config = loader.get_feature_config()
+    features = build_features(df, config)
+    numeric = features[config["feature_columns"]].to_numpy(dtype=np.float64)
+    inputs = preprocess_input(df)
+    model = loader.get_model()
+    p50 = dict(quantile_arrays(model.predict(inputs, verbose=0)))["p50"]
+    payload = {"predictions": [{"quantile": "p50", "values": p50.tolist()}]}
+
+    def schedule_serialization() -> bytes:
+        result = generate_schedule(prediction_payload=payload, capacity=50)
+        return FastJSONResponse(content=build_schedule_response(result)).body
+
+    return {
+        "parsing": lambda: parse_csv(content),
+        "features": lambda: build_features(df, config),
+        "sequences": lambda: create_sequences(numeric, config["sequence_length"]),
+        "inference": lambda: model.predict(inputs, verbose=0),
+        "schedule_serialization": schedule_serialization,
+    }
+
+
+def measure(sizes=SIZES) -> Dict[str, Dict[str, int]]:
+    peaks: Dict[str, Dict[str, int]] = {stage: {} for stage in STAGES}
+    for hours in sizes:
+        runners = stage_runners(hours)
+        for stage in STAGES:
+            runners[stage]()  # warm caches (config, scaler) outside the trace
+            peaks[stage][str(hours)] = peak_bytes(runners[stage])
+    return peaks
+
+
+def load_budgets() -> Dict[str, Any]:
+    with open(BUDGETS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def peaks():
+    return measure()
+
+
+@pytest.fixture(scope="module")
+def budgets():
+    return load_budgets()
+
+
+@pytest.mark.parametrize("stage", STAGES)
+def test_stage_peak_within_budget(stage, peaks, budgets):
+    tolerance = budgets.get("tolerance", DEFAULT_TOLERANCE)
+    slack = budgets.get("slack_bytes", DEFAULT_SLACK_BYTES)
+    failures = []
+    for hours, peak in peaks[stage].items():
+        baseline = budgets["stages"][stage][hours]
+        limit = baseline * (1 + tolerance) + slack
+        if peak > limit:
+            failures.append(
+                f"{hours}h: {peak / 2**20:.2f} MiB > {limit / 2**20:.2f} MiB "
+                f"(baseline {baseline / 2**20:.2f} MiB, +{tolerance:.0%})"
+            )
+    assert not failures, f"{stage} peak memory regressed: " + "; ".join(failures)
+
+
+@pytest.mark.parametrize("stage", STAGES)
+def test_stage_peak_grows_at_most_linearly(stage, peaks):
+    # Peak per input hour must not grow with input size (no quadratic blow-up)
+    sizes = sorted(int(hours) for hours in peaks[stage])
+    small, large = sizes[0], sizes[-1]
+    per_hour_small = peaks[stage][str(small)] / small
+    per_hour_large = peaks[stage][str(large)] / large
+    assert per_hour_large <= per_hour_small * 1.5 + DEFAULT_SLACK_BYTES / large
+
+
+def test_sequences_peak_bounded_by_output_size():
+    hours = SIZES[-1]
+    config = loader.get_feature_config()
+    numeric = np.random.default_rng(0).random((hours, len(config["feature_columns"])))
+    output_bytes = create_sequences(numeric, config["sequence_length"]).nbytes
+    # One output-sized buffer plus bookkeeping; intermediate copies would exceed this
+    assert peak_bytes(lambda: create_sequences(numeric, config["sequence_length"])) <= output_bytes * 1.25
+
+
+def update_budgets() -> None:
+    previous = load_budgets() if BUDGETS_PATH.exists() else {}
+    budgets = {
+        "tolerance": previous.get("tolerance", DEFAULT_TOLERANCE),
+        "slack_bytes": previous.get("slack_bytes", DEFAULT_SLACK_BYTES),
+        "stages": measure(),
+    }
+    with open(BUDGETS_PATH, "w", encoding="utf-8") as f:
+        json.dump(budgets, f, indent=2)
+        f.write("\n")
+    for stage, by_size in budgets["stages"].items():
+        sizes = ", ".join(f"{hours}h={peak / 2**20:.2f}MiB" for hours, peak in by_size.items())
+        print(f"{stage:<24}{sizes}")
+    print(f"wrote {BUDGETS_PATH}")
+
+
+if __name__ == "__main__":
+    if "--update" not in sys.argv[1:]:
+        sys.exit("usage: python -m tests.test_memory --update")
+    from app.ml.stub_model import StubQuantileModel
+
+    loader.set_model(StubQuantileModel())
+    update_budgets()
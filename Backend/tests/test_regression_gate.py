@@ -0,0 +1,101 @@
+"""
+Performance regression gate (benchmarks.regression).
+"""
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from benchmarks import pipeline
+from benchmarks.regression import compare, has_regression, median_standard_error
+
+GATE = {"threshold": 0.10, "noise": 3.0, "min_ms": 0.5, "memory_threshold": 0.20}
+
+
+def _report(samples, stage="build_features", calibration_ms=10.0, peak_bytes=1000):
+    row = {
+        "stage": stage,
+        "hours": 720,
+        "routes": 1,
+        **pipeline.summarize(list(samples)),
+        "peak_bytes": peak_bytes,
+    }
+    return {"calibration_ms": calibration_ms, "results": [row]}
+
+
+def _noisy(median_ms, seed, n=25):
+    rng = np.random.default_rng(seed)
+    samples = median_ms * (1 + 0.08 * rng.standard_normal(n))
+    # A few scheduler hiccups: they widen the IQR but barely move the MAD
+    samples[:3] *= 2.5
+    return samples
+
+
+def _status(baseline, current, **overrides):
+    (verdict,) = compare(baseline, current, **{**GATE, **overrides})
+    return verdict["status"]
+
+
+def test_same_distribution_is_ok():
+    assert _status(_report(_noisy(35.0, seed=1)), _report(_noisy(35.0, seed=2))) == "ok"
+
+
+def test_thirty_percent_slowdown_is_a_regression():
+    baseline = _report(_noisy(35.0, seed=1))
+    current = _report(_noisy(35.0, seed=2) * 1.3)
+    assert _status(baseline, current) == "regression"
+    assert has_regression(compare(baseline, current, **GATE))
+
+
+def test_speedup_is_improved():
+    assert _status(_report(_noisy(35.0, seed=1)), _report(_noisy(35.0, seed=2) * 0.7)) == "improved"
+
+
+def test_noisy_samples_need_a_larger_shift():
+    rng = np.random.default_rng(0)
+    baseline = _report(35.0 * (1 + 0.6 * rng.standard_normal(25)))
+    current = _report(35.0 * (1 + 0.6 * rng.standard_normal(25)) + 5.0)
+    assert median_standard_error(baseline["results"][0]) > 2.0
+    assert _status(baseline, current) == "ok"
+
+
+def test_tiny_cases_ignored_below_min_ms():
+    assert _status(_report([0.8] * 25, stage="inference"), _report([1.0] * 25, stage="inference")) == "ok"
+
+
+def test_normalization_is_opt_in():
+    baseline = _report(_noisy(35.0, seed=1), calibration_ms=10.0)
+    slower_machine = _report(_noisy(35.0, seed=2) * 2, calibration_ms=20.0)
+    assert _status(baseline, slower_machine) == "regression"
+    assert _status(baseline, slower_machine, normalize=True) == "ok"
+
+
+def test_memory_growth_is_a_regression():
+    baseline = _report(_noisy(35.0, seed=1), peak_bytes=1000)
+    (verdict,) = compare(baseline, _report(_noisy(35.0, seed=1), peak_bytes=1300), **GATE)
+    assert verdict["status"] == "ok" and verdict["memory_status"] == "regression"
+
+
+def test_gate_catches_injected_build_features_slowdown(stub_model):
+    funcs, _ = pipeline.stage_inputs(720, 1, stub_model)
+    build_features = funcs["build_features"]
+
+    def slowed():
+        started = time.perf_counter()
+        build_features()
+        deadline = time.perf_counter() + 0.3 * (time.perf_counter() - started)
+        while time.perf_counter() < deadline:
+            pass
+
+    verdicts = []
+    # A run that straddles a CPU frequency change is too noisy to resolve 30%
+    # (the gate then says "ok" and flags it noisy); such runs get a retry
+    for _ in range(5):
+        # Interleaved like the gate's own runs, so machine drift hits both alike
+        before, after = pipeline.sample_interleaved([build_features, slowed], repeat=15, warmup=2)
+        (verdict,) = compare(_report(before), _report(after), **GATE)
+        verdicts.append(verdict)
+        if verdict["status"] == "regression" or not verdict["noisy"]:
+            break
+    assert verdicts[-1]["status"] == "regression", verdicts
@@ -0,0 +1,65 @@
+"""
+JSON encoding of response payloads, with and without orjson.
+"""
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from app.api import responses
+from app.api.responses import dumps
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(responses, "orjson", None)
+    return request.param
+
+
+PAYLOAD = {
+    "finite": 1.5,
+    "nan": float("nan"),
+    "inf": [float("inf"), -float("inf"), 2.0],
+    "array": np.array([1.0, np.nan, np.inf], dtype=np.float32),
+    "matrix": np.array([[np.nan, 3.0]]),
+    "scalar": np.float64("nan"),
+    "integer": np.int64(7),
+    "nested": {"values": (float("nan"), "text", None)},
+}
+
+EXPECTED = {
+    "finite": 1.5,
+    "nan": None,
+    "inf": [None, None, 2.0],
+    "array": [1.0, None, None],
+    "matrix": [[None, 3.0]],
+    "scalar": None,
+    "integer": 7,
+    "nested": {"values": [None, "text", None]},
+}
+
+
+def test_non_finite_values_become_null(encoder):
+    assert json.loads(dumps(PAYLOAD)) == EXPECTED
+
+
+def test_finite_payload_round_trips(encoder):
+    payload = {"values": np.arange(3, dtype=np.float64), "label": "é", "count": np.int32(3)}
+    assert json.loads(dumps(payload)) == {"values": [0.0, 1.0, 2.0], "label": "é", "count": 3}
+
+
+def test_both_encoders_agree(monkeypatch):
+    pytest.importorskip("orjson")
+    with_orjson = json.loads(dumps(PAYLOAD))
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(dumps(PAYLOAD)) == with_orjson
+
+
+def test_unsupported_type_still_raises(encoder):
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
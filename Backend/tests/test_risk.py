@@ -0,0 +1,100 @@
+"""
+Monte Carlo overload risk: engine accuracy and /v1/risk validation.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.ml.risk import RiskConfig, assess_overload_risk, build_quantile_table
+
+# Quantiles at 100 x level: the tails extend linearly to 0 and 100, so
+# demand is Uniform(0, 100) in every hour
+UNIFORM_PAYLOAD: Dict[str, Any] = {
+    "predictions": [
+        {"quantile": "p10", "values": [10.0, 10.0]},
+        {"quantile": "p50", "values": [50.0, 50.0]},
+        {"quantile": "p90", "values": [90.0, 90.0]},
+        {"quantile": "p99", "values": [99.0, 99.0]},
+    ]
+}
+# capacity 50 with 20% standing: one bus carries 60, so P(overload) = 0.4
+CAPACITY = 50
+TOLERANCE = 0.01
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def test_quantile_table_is_uniform_inverse_cdf():
+    levels, values = build_quantile_table(UNIFORM_PAYLOAD)
+    assert levels.tolist() == pytest.approx([0.0, 0.1, 0.5, 0.9, 0.99, 1.0])
+    assert values[0].tolist() == pytest.approx([0.0, 10.0, 50.0, 90.0, 99.0, 100.0])
+
+
+def test_overload_probability_matches_closed_form():
+    result = assess_overload_risk(
+        UNIFORM_PAYLOAD, CAPACITY, config=RiskConfig(draws=200_000, seed=1, standing_ratio=0.2)
+    )
+    for item in result["risk"]:
+        assert item["overload_probability"] == pytest.approx(0.4, abs=TOLERANCE)
+        # 95th percentile of Uniform(0, 100) is 95 -> ceil(95 / 60) buses
+        assert item["service_level_demand"] == pytest.approx(95.0, abs=0.5)
+        assert item["buses_for_service_level"] == 2
+    summary = result["summary"]
+    # Hours are independent: E[overloaded hours] = 2 * 0.4, P(any) = 1 - 0.6^2
+    assert summary["expected_overloaded_hours"] == pytest.approx(0.8, abs=2 * TOLERANCE)
+    assert summary["probability_any_overload"] == pytest.approx(0.64, abs=TOLERANCE)
+
+
+def test_extra_bus_removes_overload():
+    result = assess_overload_risk(
+        UNIFORM_PAYLOAD, CAPACITY, buses=[2, 2], config=RiskConfig(draws=10_000, seed=0)
+    )
+    assert result["summary"]["max_overload_probability"] == 0.0
+
+
+def test_seed_makes_results_reproducible():
+    config = RiskConfig(draws=5000, seed=42)
+    assert assess_overload_risk(UNIFORM_PAYLOAD, CAPACITY, config=config) == assess_overload_risk(
+        UNIFORM_PAYLOAD, CAPACITY, config=config
+    )
+
+
+def test_endpoint_matches_engine(client):
+    response = client.post(
+        "/v1/risk",
+        json={"prediction_output": UNIFORM_PAYLOAD, "capacity": CAPACITY, "draws": 50_000, "buses": [1, 1]},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["overload_probability"] for item in body["risk"]] == pytest.approx([0.4, 0.4], abs=0.02)
+    assert body["parameters"]["draws"] == 50_000
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"draws": 200_001},
+        {"draws": 0},
+        {"capacity": 0},
+        {"target_service_level": 1.0},
+        {"standing_ratio": -0.1},
+    ],
+)
+def test_endpoint_rejects_out_of_range_parameters(client, overrides):
+    body = {"prediction_output": UNIFORM_PAYLOAD, "capacity": CAPACITY, **overrides}
+    assert client.post("/v1/risk", json=body).status_code == 422
+
+
+def test_endpoint_rejects_mismatched_buses(client):
+    response = client.post(
+        "/v1/risk",
+        json={"prediction_output": UNIFORM_PAYLOAD, "capacity": CAPACITY, "buses": [1]},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,149 @@
+"""
+Current-vs-optimized schedule comparison.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.ml.schedule_diff import DIFF_COLUMNS, align_current_buses, diff_schedules, schedule_columns
+from benchmarks.synthetic import hourly_frame
+
+
+def _items(hours: List[str], buses: List[int], load_factors: List[float]) -> List[Dict[str, Any]]:
+    return [
+        {"timestamp": hour, "buses_assigned": count, "extra_buses": count - 1, "load_factor": load_factor}
+        for hour, count, load_factor in zip(hours, buses, load_factors)
+    ]
+
+
+def _current(rows: Dict[str, int]) -> pd.DataFrame:
+    return pd.DataFrame({"hour": pd.to_datetime(list(rows)), "current_buses": list(rows.values())})
+
+
+OPTIMIZED = schedule_columns(
+    _items(
+        ["2026-01-17 05:00:00", "2026-01-17 06:00:00", "2026-01-17 07:00:00"],
+        [1, 3, 2],
+        [0.4, 1.1, 0.9],
+    )
+)
+
+
+def test_schedule_columns_floors_hours():
+    frame = schedule_columns(_items(["2026-01-17 05:42:10"], [2], [0.5]))
+    assert frame["hour"].tolist() == [pd.Timestamp("2026-01-17 05:00:00")]
+    assert frame["extra_buses"].tolist() == [1]
+
+
+def test_join_on_hour_regardless_of_row_order():
+    current = _current({"2026-01-17 07:00": 1, "2026-01-17 05:00": 2, "2026-01-17 06:00": 3})
+    diff = diff_schedules(current, OPTIMIZED)
+    rows = list(diff.iter_rows())
+    assert [row["hour"] for row in rows] == ["2026-01-17 05:00:00", "2026-01-17 06:00:00", "2026-01-17 07:00:00"]
+    assert [row["delta"] for row in rows] == [-1, 0, 1]
+    assert list(rows[0]) == DIFF_COLUMNS
+    assert diff.summary == {
+        "total_hours": 3,
+        "total_added_buses": 1,
+        "total_removed_buses": 1,
+        "peak_overload_hours": 1,
+        "unmatched_current_hours": 0,
+        "unmatched_predicted_hours": 0,
+    }
+
+
+def test_hours_in_only_one_schedule_are_counted_not_joined():
+    current = _current({"2026-01-17 04:00": 5, "2026-01-17 06:00": 1, "2026-01-17 09:00": 2})
+    diff = diff_schedules(current, OPTIMIZED)
+    assert diff.refined_schedule() == [
+        {"hour": "2026-01-17 06:00:00", "current_buses": 1, "optimized_buses": 3, "delta": 2}
+    ]
+    assert diff.summary["unmatched_current_hours"] == 2
+    assert diff.summary["unmatched_predicted_hours"] == 2
+
+
+def test_duplicate_hours_rejected():
+    current = _current({"2026-01-17 05:00": 1})
+    current = pd.concat([current, current], ignore_index=True)
+    with pytest.raises(ValueError, match="duplicate hours"):
+        diff_schedules(current, OPTIMIZED)
+
+
+def test_no_overlap_rejected():
+    with pytest.raises(ValueError, match="do not overlap"):
+        diff_schedules(_current({"2026-02-01 00:00": 1}), OPTIMIZED)
+
+
+def test_optimized_without_timestamps_rejected():
+    optimized = schedule_columns(_items([None], [1], [0.5]))
+    with pytest.raises(ValueError, match="no timestamps"):
+        diff_schedules(_current({"2026-01-17 05:00": 1}), optimized)
+
+
+def test_align_current_buses_requires_every_hour():
+    current = _current({"2026-01-17 05:00": 2, "2026-01-17 06:00": 4})
+    assert align_current_buses(current, ["2026-01-17 06:00:00", "2026-01-17 05:00:00"]) == [4, 2]
+    assert align_current_buses(current, ["2026-01-17 05:00:00", "2026-01-17 07:00:00"]) is None
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def upload():
+    return hourly_frame(200, seed=0).to_csv(index=False).encode("utf-8")
+
+
+@pytest.fixture(scope="module")
+def predicted_hours(client, upload):
+    response = client.post("/v1/predict-schedule?last_n=4", files={"file": ("d.csv", upload, "text/csv")})
+    assert response.status_code == 200
+    return [item["timestamp"] for item in response.json()["schedule"]["schedule"]]
+
+
+def _post(client, upload, schedule_csv: str):
+    return client.post(
+        "/v1/predict-schedule?last_n=4",
+        files={
+            "file": ("d.csv", upload, "text/csv"),
+            "schedule_file": ("s.csv", schedule_csv.encode("utf-8"), "text/csv"),
+        },
+    )
+
+
+def test_endpoint_joins_uploaded_schedule(client, upload, predicted_hours):
+    # Rows in reverse order plus an hour outside the prediction window
+    lines = [f"{hour},2" for hour in reversed(predicted_hours)] + ["2000-01-01 00:00:00,9"]
+    response = _post(client, upload, "hour,current_buses\n" + "\n".join(lines) + "\n")
+    assert response.status_code == 200
+    body = response.json()
+    assert [row["hour"] for row in body["refined_schedule"]] == predicted_hours
+    assert all(row["current_buses"] == 2 for row in body["refined_schedule"])
+    assert body["refined_summary"]["unmatched_current_hours"] == 1
+    assert body["refined_summary"]["unmatched_predicted_hours"] == 0
+
+
+def test_endpoint_rejects_duplicate_hours(client, upload, predicted_hours):
+    lines = [f"{hour},2" for hour in predicted_hours] + [f"{predicted_hours[0]},3"]
+    response = _post(client, upload, "hour,current_buses\n" + "\n".join(lines) + "\n")
+    assert response.status_code == 400
+    assert response.json()["detail"] == {
+        "stage": "csv",
+        "message": f"schedule CSV contains duplicate hours: {predicted_hours[0]}",
+    }
+
+
+def test_endpoint_duplicate_after_flooring_rejected(client, upload, predicted_hours):
+    # 05:10 and 05:40 both floor to the same hour
+    first = pd.Timestamp(predicted_hours[0])
+    lines = [f"{first + pd.Timedelta(minutes=10)},1", f"{first + pd.Timedelta(minutes=40)},2"]
+    response = _post(client, upload, "hour,current_buses\n" + "\n".join(lines) + "\n")
+    assert response.status_code == 400
+    assert response.json()["detail"]["stage"] == "csv"
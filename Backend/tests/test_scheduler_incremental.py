@@ -0,0 +1,174 @@
+"""
+Incremental rescheduling must agree with a full run on the same inputs.
+"""
+from __future__ import annotations
+
+import random
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pytest
+
+from app.ml.fleet import BusType
+from app.ml.scheduler import SchedulerConfig, generate_schedule
+
+CAPACITY = 50
+FLEET = [BusType("midi", 30, 0.8), BusType("standard", 50, 1.0), BusType("articulated", 80, 1.4)]
+
+
+def _payload(p50: List[float]) -> Dict[str, Any]:
+    return {"predictions": [{"quantile": "p50", "values": list(p50)}]}
+
+
+def _full(p50: List[float], current: Optional[List[int]] = None, fleet=None) -> Dict[str, Any]:
+    return generate_schedule(_payload(p50), CAPACITY, current_buses=current, fleet=fleet)
+
+
+def _incremental(
+    p50: List[float],
+    changes: Dict[int, float],
+    current: Optional[List[int]] = None,
+    fleet=None,
+) -> Dict[str, Any]:
+    previous = _full(p50, current, fleet)
+    return generate_schedule(
+        None,
+        CAPACITY,
+        previous_result=previous,
+        changed_indices=list(changes),
+        changed_p50=list(changes.values()),
+        fleet=fleet,
+    )
+
+
+def _updated(p50: List[float], changes: Dict[int, float]) -> List[float]:
+    values = list(p50)
+    for idx, value in changes.items():
+        values[idx] = value
+    return values
+
+
+def _assert_same_summary(incremental: Dict[str, Any], full: Dict[str, Any]) -> None:
+    assert incremental["summary"].keys() == full["summary"].keys()
+    for key, value in full["summary"].items():
+        assert incremental["summary"][key] == value, key
+    assert incremental["schedule"] == full["schedule"]
+
+
+@pytest.mark.parametrize(
+    "p50, changes",
+    [
+        # Just below the low-demand threshold: the rounded load factor is 0.5
+        ([24.99999, 60.0], {0: 40.0}),
+        ([40.0, 60.0], {0: 24.99999}),
+        # Just above seated capacity: rounds to load factor 1.0
+        ([50.00001, 10.0], {0: 20.0}),
+        ([60.00001, 10.0, 75.0], {0: 5.0, 2: 60.00001}),
+    ],
+)
+def test_threshold_boundaries_match_full_run(p50, changes):
+    incremental = _incremental(p50, changes)
+    _assert_same_summary(incremental, _full(_updated(p50, changes)))
+
+
+def test_current_buses_boundary_matches_full_run():
+    p50 = [50.00001, 100.00001, 20.0]
+    current = [1, 2, 1]
+    changes = {0: 10.0, 1: 99.0}
+    incremental = _incremental(p50, changes, current)
+    _assert_same_summary(incremental, _full(_updated(p50, changes), current))
+
+
+@pytest.mark.parametrize("fleet", [None, FLEET])
+def test_random_updates_match_full_run(fleet):
+    rng = random.Random(0)
+    p50 = [rng.uniform(0, 200) for _ in range(200)]
+    current = [rng.randint(0, 4) for _ in p50]
+    changes = {idx: rng.uniform(0, 200) for idx in rng.sample(range(len(p50)), 20)}
+    incremental = _incremental(p50, changes, current, fleet)
+    _assert_same_summary(incremental, _full(_updated(p50, changes), current, fleet))
+
+
+def test_repeated_updates_match_full_run():
+    p50 = [24.99999, 60.0, 10.0, 130.0]
+    result = _full(p50)
+    for changes in ({0: 40.0}, {0: 24.99999, 3: 10.0}, {1: 25.0, 3: 130.0}):
+        result = generate_schedule(
+            None,
+            CAPACITY,
+            previous_result=result,
+            changed_indices=list(changes),
+            changed_p50=list(changes.values()),
+        )
+        p50 = _updated(p50, changes)
+        _assert_same_summary(result, _full(p50))
+
+
+def test_previous_schedule_updated_in_place():
+    previous = _full([10.0, 20.0, 30.0])
+    schedule = previous["schedule"]
+    result = generate_schedule(
+        None, CAPACITY, previous_result=previous, changed_indices=[1], changed_p50=[90.0]
+    )
+    assert result["schedule"] is schedule
+    assert schedule[1]["p90_demand"] == 90.0
+    assert [change["trip_index"] for change in result["changes"]] == [1]
+
+
+def test_previous_result_without_aggregates_rejected():
+    previous = _full([24.99999, 60.0])
+    del previous["contributions"]
+    with pytest.raises(ValueError, match="full schedule"):
+        generate_schedule(
+            None, CAPACITY, previous_result=previous, changed_indices=[0], changed_p50=[40.0]
+        )
+
+
+def test_config_mismatch_rejected():
+    previous = _full([10.0, 20.0])
+    with pytest.raises(ValueError, match="full schedule"):
+        generate_schedule(
+            None,
+            CAPACITY,
+            config=SchedulerConfig(low_load_threshold=0.4),
+            previous_result=previous,
+            changed_indices=[0],
+            changed_p50=[40.0],
+        )
+
+
+def test_failed_update_leaves_previous_result_unchanged():
+    p50 = [10.0, 20.0, 30.0]
+    previous = _full(p50)
+    schedule = list(previous["schedule"])
+    with pytest.raises(ValueError, match="out of range"):
+        generate_schedule(
+            None, CAPACITY, previous_result=previous, changed_indices=[0, 9], changed_p50=[100.0, 1.0]
+        )
+    assert previous["schedule"] == schedule
+
+    result = generate_schedule(
+        None, CAPACITY, previous_result=previous, changed_indices=[1], changed_p50=[50.0]
+    )
+    _assert_same_summary(result, _full(_updated(p50, {1: 50.0})))
+
+
+def test_numpy_changes_accepted():
+    p50 = [10.0, 20.0, 30.0]
+    changes = {0: 100.0, 2: 5.0}
+    result = generate_schedule(
+        None,
+        CAPACITY,
+        previous_result=_full(p50),
+        changed_indices=np.array(list(changes)),
+        changed_p50=np.array(list(changes.values()), dtype=np.float32),
+    )
+    _assert_same_summary(result, _full(_updated(p50, changes)))
+
+
+def test_duplicate_index_applies_last_value():
+    p50 = [10.0, 20.0]
+    result = generate_schedule(
+        None, CAPACITY, previous_result=_full(p50), changed_indices=[0, 0], changed_p50=[80.0, 30.0]
+    )
+    _assert_same_summary(result, _full([30.0, 20.0]))
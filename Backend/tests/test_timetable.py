@@ -0,0 +1,145 @@
+"""
+Timetable expansion and the streaming /v1/timetable endpoint.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Any, Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.streaming import StreamAborted
+from app.main import app
+from app.ml.timetable import TIMETABLE_COLUMNS, iter_departures
+
+
+def _item(trip_index: int, headway: float, buses: int = 1, timestamp: str = None) -> Dict[str, Any]:
+    return {
+        "trip_index": trip_index,
+        "trip_id": f"T{trip_index}",
+        "timestamp": timestamp,
+        "adjusted_headway_minutes": headway,
+        "buses_assigned": buses,
+    }
+
+
+def _times(rows: List[Dict[str, Any]]) -> List[str]:
+    return [row["departure_time"][11:16] for row in rows]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+def test_headway_carries_over_hour_boundaries():
+    schedule = [
+        _item(0, 22.5, timestamp="2026-01-17 05:00:00"),
+        _item(1, 22.5, timestamp="2026-01-17 06:00:00"),
+    ]
+    rows = list(iter_departures(schedule))
+    # 05:00, 05:22:30, 05:45, then 06:07:30 rather than restarting at 06:00
+    assert _times(rows) == ["05:00", "05:22", "05:45", "06:07", "06:30", "06:52"]
+    assert [row["departure_id"] for row in rows] == list(range(6))
+
+
+def test_buses_staggered_within_slot():
+    rows = list(iter_departures([_item(0, 30, buses=3, timestamp="2026-01-17 05:00:00")]))
+    assert [row["departure_time"][11:] for row in rows[:3]] == ["05:00:00", "05:10:00", "05:20:00"]
+    assert [row["bus_index"] for row in rows] == [0, 1, 2, 0, 1, 2]
+    assert all(row["buses_assigned"] == 3 for row in rows)
+
+
+def test_service_start_used_without_timestamps():
+    rows = list(iter_departures([_item(0, 30), _item(1, 60)], service_start="2026-01-17 05:00:00"))
+    assert _times(rows) == ["05:00", "05:30", "06:00"]
+
+
+def test_gap_between_hours_restarts_slots():
+    schedule = [
+        _item(0, 45, timestamp="2026-01-17 05:00:00"),
+        _item(1, 45, timestamp="2026-01-17 09:00:00"),
+    ]
+    assert _times(list(iter_departures(schedule))) == ["05:00", "05:45", "09:00", "09:45"]
+
+
+def test_service_day_filter_keeps_alignment():
+    schedule = [
+        _item(0, 25, timestamp="2026-01-16 23:00:00"),
+        _item(1, 25, timestamp="2026-01-17 00:00:00"),
+    ]
+    everything = list(iter_departures(schedule))
+    filtered = list(iter_departures(schedule, service_day="2026-01-17"))
+    expected = [row["departure_time"] for row in everything if row["departure_time"].startswith("2026-01-17")]
+    assert [row["departure_time"] for row in filtered] == expected
+    # 23:00, 23:25, 23:50 then 00:15 carried over from the previous day
+    assert filtered[0]["departure_time"] == "2026-01-17 00:15:00"
+
+
+def test_empty_schedule_yields_nothing():
+    assert list(iter_departures([], service_start="2026-01-17 05:00:00")) == []
+
+
+@pytest.mark.parametrize(
+    "schedule, message",
+    [
+        ([_item(0, 15)], "service_start is required"),
+        ([_item(0, 0, timestamp="2026-01-17 05:00:00")], "non-positive headway"),
+        ([_item(0, 15, timestamp="not a time")], "Invalid timestamp"),
+    ],
+)
+def test_invalid_items_rejected(schedule, message):
+    with pytest.raises(ValueError, match=message):
+        list(iter_departures(schedule))
+
+
+def _request(values: List[float], timestamps: List[str], **extra: Any) -> Dict[str, Any]:
+    return {
+        "prediction_output": {"predictions": [{"quantile": "p50", "values": values}]},
+        "capacity": 50,
+        "timestamps": timestamps,
+        **extra,
+    }
+
+
+HOURS = [f"2026-01-17 {hour:02d}:00:00" for hour in range(5, 9)]
+
+
+def test_endpoint_streams_csv(client):
+    response = client.post("/v1/timetable?output=csv", json=_request([10.0, 60.0, 120.0, 10.0], HOURS))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == TIMETABLE_COLUMNS
+    assert [int(row["departure_id"]) for row in rows] == list(range(len(rows)))
+    # The 120-passenger hour needs two buses per slot
+    assert {row["buses_assigned"] for row in rows if row["trip_index"] == "2"} == {"2"}
+
+
+def test_endpoint_streams_ndjson(client):
+    response = client.post("/v1/timetable?output=ndjson", json=_request([10.0] * 4, HOURS))
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows and all("error" not in row for row in rows)
+    assert rows[0]["departure_time"] == "2026-01-17 05:00:00"
+
+
+def test_endpoint_rejects_error_before_first_row(client):
+    response = client.post("/v1/timetable", json=_request([10.0], ["garbage"]))
+    assert response.status_code == 400
+
+
+def test_ndjson_error_after_first_row_ends_with_marker(client):
+    response = client.post("/v1/timetable?output=ndjson", json=_request([10.0] * 5, HOURS + ["garbage"]))
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) > 1
+    assert lines[-1] == {"error": {"stage": "stream", "message": "Invalid timestamp in schedule: 'garbage'"}}
+    assert all("departure_id" in line for line in lines[:-1])
+
+
+def test_csv_error_after_first_row_aborts(client):
+    with pytest.raises(StreamAborted, match="Invalid timestamp"):
+        client.post("/v1/timetable?output=csv", json=_request([10.0] * 5, HOURS + ["garbage"]))
@@ -0,0 +1,82 @@
+"""
+Stage timing and the Server-Timing header.
+"""
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils import timing
+from app.utils.timing import RequestTimings, mark_stage, stage_timer
+from benchmarks.synthetic import hourly_frame
+
+
+@pytest.fixture
+def timings():
+    current = RequestTimings()
+    token = timing._current.set(current)
+    yield current
+    timing._current.reset(token)
+
+
+def _names(timings: RequestTimings):
+    return [name for name, _ in timings.stages]
+
+
+def test_timer_inside_stage_is_a_sub_stage(timings):
+    mark_stage("preprocess")
+    with stage_timer("features"):
+        with stage_timer("scale"):
+            pass
+    with stage_timer("sequences"):
+        pass
+    mark_stage("inference")
+    timings.close()
+    assert _names(timings) == [
+        "preprocess.features.scale",
+        "preprocess.features",
+        "preprocess.sequences",
+        "preprocess",
+        "inference",
+    ]
+
+
+def test_timer_outside_any_stage_is_top_level(timings):
+    with stage_timer("admission"):
+        pass
+    mark_stage("read")
+    timings.close()
+    assert _names(timings) == ["admission", "read"]
+
+
+def test_nesting_unwinds_after_error(timings):
+    mark_stage("preprocess")
+    with pytest.raises(ValueError):
+        with stage_timer("features"):
+            raise ValueError("boom")
+    with stage_timer("sequences"):
+        pass
+    assert _names(timings) == ["preprocess.features", "preprocess.sequences"]
+
+
+def test_timer_without_request_is_a_no_op():
+    with stage_timer("features"):
+        pass
+
+
+def test_top_level_stages_do_not_exceed_total():
+    client = TestClient(app)
+    upload = hourly_frame(200, seed=0).to_csv(index=False).encode("utf-8")
+    response = client.post("/v1/predict?last_n=4", files={"file": ("d.csv", upload, "text/csv")})
+    assert response.status_code == 200
+    entries = dict(
+        (name, float(dur.split("=")[1]))
+        for name, dur in (entry.split(";") for entry in response.headers["server-timing"].split(", "))
+    )
+    assert "preprocess.features" in entries and "preprocess.sequences" in entries
+    assert "features" not in entries
+    assert entries["preprocess.features"] <= entries["preprocess"]
+    top_level = sum(value for name, value in entries.items() if "." not in name and name != "total")
+    # Rounded to 0.1 ms per entry
+    assert top_level <= entries["total"] + 0.1 * len(entries)